@@ -9,24 +9,40 @@ This module implements the BibleCharacter class that handles:
 - Session management with timeout
 """
 
-from typing import Dict, Optional, List, Deque
-from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, List, Deque, Set, Tuple
+from dataclasses import dataclass, field
+from functools import cached_property
 from datetime import datetime, timedelta
 from collections import deque
-import uuid
+from itertools import islice
+import os
+import heapq
 import asyncio
 import logging
+import openai
+from core.single_flight import SingleFlight
+from core.tokens import count_tokens
+from core.tracing import span
+from .character_parser import CharacterParseError, parse_character_response
 from .prompts.bible_character_agent import (
+    get_character_prefix,
     get_character_prompt,
-    get_response_prompt,
+    get_memory_summary_prompt,
+    get_character_response_format,
     get_system_prompt,
-    CHARACTER_SYSTEM_PROMPT
+    CONVERSATION_SUMMARY_TEMPLATE,
+    MEMORY_SUMMARY_SYSTEM_PROMPT
 )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+UNAVAILABLE = "Información no disponible"
+
+# Room for all five sections in Spanish; at 500 JSON contexts were regularly cut short
+EXTRACTION_MAX_TOKENS = 1200
+
 @dataclass
 class CharacterContext:
     """Stores extracted information about a biblical character."""
@@ -49,6 +65,20 @@ class CharacterContext:
             "bible_verses": self.bible_verses
         }
 
+    def to_record(self) -> Dict:
+        """Convert to a JSON-serializable dictionary, including the extraction time."""
+        return {**self.to_dict(), "extracted_at": self.extracted_at.isoformat()}
+
+    @classmethod
+    def from_record(cls, record: Dict) -> "CharacterContext":
+        """Rebuild a context from :meth:`to_record` output."""
+        return cls(**{**record, "extracted_at": datetime.fromisoformat(record["extracted_at"])})
+
+    @cached_property
+    def prompt_prefix(self) -> str:
+        """System message for chats with this character, rendered once per context."""
+        return get_character_prefix(self.name, self.to_dict())
+
 @dataclass
 class UserSession:
     """Manages user session state and timeout."""
@@ -59,62 +89,192 @@ class UserSession:
 
 @dataclass
 class ConversationMemory:
-    """Stores conversation history for a user session with window-based memory."""
+    """
+    Stores conversation history for a user session within a token budget.
+    
+    Each message's token count is computed once when it is added. When the
+    history exceeds ``token_budget``, the oldest messages are evicted into
+    ``unsummarized`` and later folded into ``summary`` by a background call,
+    so the prompt stays bounded however long the conversation runs.
+    """
     user_id: str
     character_name: str
-    messages: Deque[Dict[str, str]]
+    messages: Deque[Dict[str, Any]]
     created_at: datetime
     last_updated: datetime
-    window_size: int = 8  # Number of exchanges to keep (16 total messages)
+    token_budget: int = 1200
+    summary: str = ""
+    history_tokens: int = 0
+    unsummarized: List[Dict[str, Any]] = field(default_factory=list)
+    summarizing: bool = False
+    # Revision of the shared store row this copy was loaded from or saved as
+    revision: str = ""
+    _chat_messages: Deque[Dict[str, str]] = field(default_factory=deque, repr=False)
 
     def __post_init__(self):
-        """Initialize the messages deque with the specified window size."""
+        """Rebuild the token totals and chat messages for any initial messages."""
         if not isinstance(self.messages, deque):
-            self.messages = deque(maxlen=self.window_size * 2)  # *2 because each exchange has 2 messages
+            self.messages = deque(self.messages)
+        for msg in self.messages:
+            msg.setdefault("tokens", count_tokens(msg["content"]))
+        self.history_tokens = sum(msg["tokens"] for msg in self.messages)
+        self._chat_messages = deque({"role": msg["role"], "content": msg["content"]} for msg in self.messages)
 
     def add_message(self, role: str, content: str):
-        """Add a message to the conversation history."""
+        """Add a message to the conversation history, evicting the oldest ones over budget."""
+        tokens = count_tokens(content)
         self.messages.append({
             "role": role,
             "content": content,
-            "timestamp": datetime.utcnow()
+            "timestamp": datetime.utcnow(),
+            "tokens": tokens
         })
+        self._chat_messages.append({"role": role, "content": content})
+        self.history_tokens += tokens
         self.last_updated = datetime.utcnow()
 
+        # Always keep the newest message; never start the history with a character reply
+        while len(self.messages) > 1 and (
+            self.history_tokens > self.token_budget or self.messages[0]["role"] != "user"
+        ):
+            self._evict()
+
+    def _evict(self):
+        evicted = self.messages.popleft()
+        self._chat_messages.popleft()
+        self.history_tokens -= evicted["tokens"]
+        self.unsummarized.append(evicted)
+
+        # If summaries keep failing, drop the oldest unsummarized turns rather than growing forever
+        while sum(msg["tokens"] for msg in self.unsummarized) > self.token_budget * 4:
+            self.unsummarized.pop(0)
+
+    def to_record(self) -> Dict[str, Any]:
+        """Convert the verbatim history to a JSON-serializable dictionary (the summary is stored apart)."""
+        return {
+            "user_id": self.user_id,
+            "character_name": self.character_name,
+            "messages": [{**msg, "timestamp": msg["timestamp"].isoformat()} for msg in self.messages],
+            "created_at": self.created_at.isoformat(),
+            "last_updated": self.last_updated.isoformat()
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any], **fields) -> "ConversationMemory":
+        """Rebuild a memory from :meth:`to_record` output; ``fields`` sets the remaining attributes."""
+        return cls(
+            user_id=record["user_id"],
+            character_name=record["character_name"],
+            messages=deque(
+                {**msg, "timestamp": datetime.fromisoformat(msg["timestamp"])} for msg in record["messages"]
+            ),
+            created_at=datetime.fromisoformat(record["created_at"]),
+            last_updated=datetime.fromisoformat(record["last_updated"]),
+            **fields
+        )
+
+    def take_unsummarized(self) -> List[Dict[str, Any]]:
+        """Hand the evicted messages to the summarizer and clear the queue."""
+        pending, self.unsummarized = self.unsummarized, []
+        return pending
+
+    def as_chat_messages(self) -> List[Dict[str, str]]:
+        """Conversation history as chat messages, oldest first."""
+        return list(self._chat_messages)
+
+    def chat_messages_with(self, content: str) -> List[Dict[str, str]]:
+        """
+        Chat messages as they would be after adding a user message, without adding it.
+
+        The same messages are dropped as :meth:`add_message` would evict, so the
+        prompt is identical, but the turn only enters memory once it has a reply.
+        """
+        tokens = self.history_tokens + count_tokens(content)
+        dropped = 0
+        for msg in self.messages:
+            if tokens <= self.token_budget and msg["role"] == "user":
+                break
+            tokens -= msg["tokens"]
+            dropped += 1
+        return [*islice(self._chat_messages, dropped, None), {"role": "user", "content": content}]
+
     def get_formatted_history(self) -> str:
         """Format conversation history for the LLM prompt."""
-        formatted_history = []
-        for msg in self.messages:
-            role = "Usuario" if msg["role"] == "user" else "Personaje"
-            formatted_history.append(f"{role}: {msg['content']}")
-        return "\n".join(formatted_history)
+        return format_history(self.messages)
+
+def format_history(messages) -> str:
+    """Format messages as "Usuario:" / "Personaje:" lines."""
+    return "\n".join(
+        f"{'Usuario' if msg['role'] == 'user' else 'Personaje'}: {msg['content']}" for msg in messages
+    )
 
 class BibleCharacter:
-    def __init__(self, llm_client, session_timeout_minutes: int = 30):
+    def __init__(
+        self,
+        llm_client,
+        session_timeout_minutes: int = 30,
+        context_store=None,
+        json_mode: Optional[bool] = None,
+        memory_token_budget: Optional[int] = None,
+        session_store=None
+    ):
         """
         Initialize the Bible Character agent.
         
         Args:
-            llm_client: The LLM client instance for making API calls
+            llm_client (LLMGateway): Shared LLM gateway for making API calls
             session_timeout_minutes: Timeout duration for inactive sessions
+            context_store (Optional[CharacterContextStore]): Store for extracted
+                character contexts, in-memory only by default
+            json_mode (Optional[bool]): Extract contexts as schema-constrained JSON, which needs a
+                model with structured outputs; defaults to CHARACTER_EXTRACTION_MODE ("text" or "json")
+            memory_token_budget (Optional[int]): Tokens of recent history kept verbatim per
+                conversation; defaults to CHARACTER_MEMORY_TOKENS (1200)
+            session_store (Optional[SessionStore]): Where sessions and memories are shared
+                between workers, in this process only by default
         """
+        if json_mode is None:
+            json_mode = os.getenv("CHARACTER_EXTRACTION_MODE", "text").lower() == "json"
+        self.json_mode = json_mode
+        if memory_token_budget is None:
+            memory_token_budget = int(os.getenv("CHARACTER_MEMORY_TOKENS", "1200"))
+        self.memory_token_budget = memory_token_budget
+        if context_store is None:
+            from services.character_context_store import CharacterContextStore
+            context_store = CharacterContextStore()
+        if session_store is None:
+            from services.session_store import SessionStore
+            session_store = SessionStore()
+
         self.llm_client = llm_client
-        self.character_contexts: Dict[str, CharacterContext] = {}
-        self.conversation_memories: Dict[str, ConversationMemory] = {}
+        self.context_store = context_store
+        self.session_store = session_store
+        self.extractions: SingleFlight[CharacterContext] = SingleFlight()
+        self.conversation_memories: Dict[Tuple[str, str], ConversationMemory] = {}
+        # Memory keys per user, so clearing a user never scans other users' memories
+        self.user_memory_keys: Dict[str, Set[Tuple[str, str]]] = {}
         self.user_sessions: Dict[str, UserSession] = {}
         self.session_timeout = timedelta(minutes=session_timeout_minutes)
+        # (deadline, user_id) min-heap; an entry may be stale if the session was refreshed since
+        self._expiry_heap: List[Tuple[datetime, str]] = []
         self._cleanup_task = None
+        self._background_tasks: Set[asyncio.Task] = set()
         self.system_prompt = get_system_prompt()
         logger.info("BibleCharacter agent initialized successfully")
 
     async def start(self):
-        """Start the cleanup task."""
+        """Prepare the context store and start the cleanup task."""
+        await self.context_store.initialize()
         if self._cleanup_task is None:
             self._cleanup_task = asyncio.create_task(self._cleanup_inactive_sessions())
             logger.info("Cleanup task started")
 
     async def stop(self):
-        """Stop the cleanup task."""
+        """Stop the cleanup task and any summaries still running."""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
         if self._cleanup_task is not None:
             self._cleanup_task.cancel()
             try:
@@ -128,47 +288,84 @@ class BibleCharacter:
         """Periodically clean up inactive sessions."""
         while True:
             await asyncio.sleep(60)  # Check every minute
-            current_time = datetime.utcnow()
-            
-            # Find and remove inactive sessions
-            inactive_sessions = [
-                user_id for user_id, session in self.user_sessions.items()
-                if current_time - session.last_activity > self.session_timeout
-            ]
-            
-            for user_id in inactive_sessions:
-                await self._clear_user_session(user_id)
-                logger.info(f"Cleared inactive session for user: {user_id}")
+            expired = await self.expire_sessions()
+            if expired:
+                logger.info(f"Cleared {expired} inactive sessions")
+            # Sessions no worker has seen within the timeout, wherever they were last active
+            await self.session_store.expire(datetime.utcnow() - self.session_timeout)
 
-    async def _clear_user_session(self, user_id: str):
-        """Clear all session data for a user."""
-        # Remove user session
+    async def expire_sessions(self, now: Optional[datetime] = None, batch_size: int = 1000) -> int:
+        """
+        Clear every session inactive for longer than the timeout.
+
+        Only heap entries whose deadline has passed are popped, so a sweep costs
+        O(expired log n) rather than a scan of all sessions. Sessions refreshed
+        since their entry was pushed are re-pushed with their current deadline
+        (at most once per timeout period). The event loop is yielded to every
+        ``batch_size`` entries so a burst of expirations does not stall requests.
+
+        Args:
+            now (Optional[datetime]): Sweep time, defaults to the current UTC time
+            batch_size (int): Heap entries handled between yields to the event loop
+
+        Returns:
+            int: Number of sessions cleared
+        """
+        now = now or datetime.utcnow()
+        cleared = 0
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            cleared += self._expire_batch(now, batch_size)
+            await asyncio.sleep(0)
+        return cleared
+
+    def _expire_batch(self, now: datetime, batch_size: int) -> int:
+        heap = self._expiry_heap
+        cleared = 0
+        for _ in range(batch_size):
+            if not heap or heap[0][0] > now:
+                break
+            deadline, user_id = heapq.heappop(heap)
+            session = self.user_sessions.get(user_id)
+            # Entries left behind by a cleared session predate the current one
+            if session is None or deadline - self.session_timeout < session.created_at:
+                continue
+            current_deadline = session.last_activity + self.session_timeout
+            if current_deadline > now:
+                heapq.heappush(heap, (current_deadline, user_id))
+            else:
+                self._drop_user(user_id)
+                cleared += 1
+        return cleared
+
+    def _drop_user(self, user_id: str):
+        """Remove a user's session and conversation memories."""
         self.user_sessions.pop(user_id, None)
-        
-        # Remove all conversation memories for this user
-        memories_to_remove = [
-            key for key in self.conversation_memories.keys()
-            if key.startswith(f"{user_id}_")
-        ]
-        for key in memories_to_remove:
+        for key in self.user_memory_keys.pop(user_id, ()):
             self.conversation_memories.pop(key, None)
-        
+
+    async def _clear_user_session(self, user_id: str):
+        """Clear all session data for a user."""
+        self._drop_user(user_id)
         logger.info(f"Cleared all session data for user: {user_id}")
 
-    def _get_or_create_session(self, user_id: str) -> UserSession:
+    def _get_or_create_session(self, user_id: str, now: Optional[datetime] = None) -> UserSession:
         """Get existing session or create new one."""
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = UserSession(
+        now = now or datetime.utcnow()
+        session = self.user_sessions.get(user_id)
+        if session is None:
+            session = self.user_sessions[user_id] = UserSession(
                 user_id=user_id,
-                created_at=datetime.utcnow(),
-                last_activity=datetime.utcnow()
+                created_at=now,
+                last_activity=now
             )
-            logger.info(f"Created new session for user: {user_id}")
+            heapq.heappush(self._expiry_heap, (now + self.session_timeout, user_id))
+            logger.debug(f"Created new session for user: {user_id}")
         else:
-            # Update last activity
-            self.user_sessions[user_id].last_activity = datetime.utcnow()
+            # Update last activity; the expiry heap picks it up lazily
+            session.last_activity = now
+        self.session_store.touch_session(user_id, session.created_at, now)
         
-        return self.user_sessions[user_id]
+        return session
 
     async def get_character_context(self, character_name: str) -> CharacterContext:
         """
@@ -180,38 +377,79 @@ class BibleCharacter:
         Returns:
             CharacterContext: The character's context information
         """
-        # Return cached context if available
-        if character_name in self.character_contexts:
-            logger.info(f"Using cached context for character: {character_name}")
-            return self.character_contexts[character_name]
+        # Return stored context if available (this process or the shared database)
+        context = await self.context_store.get(character_name)
+        if context is not None:
+            logger.debug(f"Using cached context for character: {character_name}")
+            return context
 
-        logger.info(f"Extracting new context for character: {character_name}")
-        
-        # Chain 1: Extract new context
-        prompt = get_character_prompt(character_name)
-        response = self.llm_client.chat.completions.create(
+        # Concurrent first requests for the same character share one extraction
+        return await self.extractions.do(
+            self.context_store.key(character_name),
+            lambda: self._extract_character_context(character_name)
+        )
+
+    async def _request_character_context(self, character_name: str, json_mode: bool):
+        """Send the Chain 1 completion in JSON or text mode."""
+        params = {"response_format": get_character_response_format()} if json_mode else {}
+        return await self.llm_client.complete(
             model="gpt-3.5-turbo",
+            agent="character_extraction",
             messages=[
                 {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt}
+                {"role": "user", "content": get_character_prompt(character_name, json_mode=json_mode)}
             ],
             temperature=0.3,
-            max_tokens=500
+            max_tokens=EXTRACTION_MAX_TOKENS,
+            **params
         )
+
+    async def _extract_character_context(self, character_name: str) -> CharacterContext:
+        """Run Chain 1 for a character and store the result."""
+        # A call that finished between our miss and joining the flight may have stored it already
+        context = await self.context_store.get(character_name)
+        if context is not None:
+            return context
+
+        logger.info(f"Extracting new context for character: {character_name}")
+        
+        # Chain 1: Extract new context
+        if self.json_mode:
+            try:
+                response = await self._request_character_context(character_name, json_mode=True)
+            except openai.BadRequestError as e:
+                # The model does not take json_schema response formats; stop asking for them
+                logger.warning(f"JSON extraction rejected by the upstream, switching to text mode: {e}")
+                self.json_mode = False
+                response = await self._request_character_context(character_name, json_mode=False)
+        else:
+            response = await self._request_character_context(character_name, json_mode=False)
+        
+        # Parse and structure the response; an incomplete one is reused briefly but never persisted
+        try:
+            sections = parse_character_response(response.choices[0].message.content or "")
+        except CharacterParseError as e:
+            logger.warning(f"Incomplete context for character {character_name}, not persisting it: {e}")
+            context = CharacterContext(
+                name=character_name,
+                biographical_info=e.partial.get("biographical_info") or {"Época y lugar": UNAVAILABLE},
+                key_events=e.partial.get("key_events") or [UNAVAILABLE],
+                character_traits=e.partial.get("character_traits") or {"Rasgos principales": UNAVAILABLE},
+                legacy=e.partial.get("legacy") or {"Importancia bíblica": UNAVAILABLE},
+                bible_verses=e.partial.get("bible_verses") or [UNAVAILABLE],
+                extracted_at=datetime.utcnow()
+            )
+            await self.context_store.set(character_name, context, complete=False)
+            return context
         
-        # Parse and structure the response
         context = CharacterContext(
             name=character_name,
-            biographical_info=self._parse_biographical_info(response.choices[0].message.content),
-            key_events=self._parse_key_events(response.choices[0].message.content),
-            character_traits=self._parse_character_traits(response.choices[0].message.content),
-            legacy=self._parse_legacy(response.choices[0].message.content),
-            bible_verses=self._parse_bible_verses(response.choices[0].message.content),
+            **sections.model_dump(),
             extracted_at=datetime.utcnow()
         )
         
         # Cache the context
-        self.character_contexts[character_name] = context
+        await self.context_store.set(character_name, context)
         logger.info(f"Successfully extracted and cached context for character: {character_name}")
         return context
 
@@ -233,48 +471,186 @@ class BibleCharacter:
             str: Character's response
         """
         try:
-            # Update or create user session
-            self._get_or_create_session(user_id)
-            
-            # Get or create conversation memory
-            memory = self.get_or_create_memory(user_id, character_name)
+            with span("memory"):
+                # Update or create user session
+                self._get_or_create_session(user_id)
+                
+                # Get or create conversation memory, as last saved by any worker
+                memory = await self.load_memory(user_id, character_name)
             
             # Get character context (cached or newly extracted)
-            context = await self.get_character_context(character_name)
+            with span("context", character=character_name):
+                context = await self.get_character_context(character_name)
             
-            # Add user message to memory
-            memory.add_message("user", message)
+            with span("prompt"):
+                messages = self._build_response_messages(context, memory, message)
             
             # Chain 2: Generate response using context and conversation history
-            prompt = get_response_prompt(
-                character_name=character_name,
-                character_context=context.to_dict(),
-                conversation_history=memory.get_formatted_history(),
-                user_message=message
-            )
-            
-            response = self.llm_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=300
-            )
+            with span("generate"):
+                response = await self.llm_client.complete(
+                    model="gpt-3.5-turbo",
+                    agent="bible_character",
+                    messages=messages,
+                    temperature=0.7,
+                    max_tokens=300
+                )
             
             character_response = response.choices[0].message.content
             
-            # Add character response to memory
-            memory.add_message("assistant", character_response)
+            # Record the turn only once it has a reply; evicted turns are summarized off the request path
+            with span("save"):
+                memory.add_message("user", message)
+                memory.add_message("assistant", character_response)
+                await self.session_store.save_memory(memory)
+                self._schedule_summary(memory)
             
-            logger.info(f"Generated response for user {user_id} from character {character_name}")
+            logger.debug(f"Generated response for user {user_id} from character {character_name}")
             return character_response
             
         except Exception as e:
             logger.error(f"Error in chat_with_character: {str(e)}")
             raise
 
+    async def stream_chat_with_character(
+        self,
+        user_id: str,
+        character_name: str,
+        message: str
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a response from the character's perspective as SSE events.
+        
+        Args:
+            user_id (str): Unique identifier for the user
+            character_name (str): Name of the biblical character
+            message (str): User's message
+            
+        Yields:
+            Tuple[str, Any]: ``stage`` events, ``token`` events with text deltas
+            and a final ``done`` event carrying the full response
+        """
+        with span("memory"):
+            self._get_or_create_session(user_id)
+            memory = await self.load_memory(user_id, character_name)
+        yield "stage", {"name": "started"}
+        
+        with span("context", character=character_name):
+            context = await self.get_character_context(character_name)
+        yield "stage", {"name": "context_ready"}
+        
+        with span("prompt"):
+            messages = self._build_response_messages(context, memory, message)
+        chunks = []
+        async for delta in self.llm_client.stream(
+            model="gpt-3.5-turbo",
+            agent="bible_character",
+            messages=messages,
+            temperature=0.7,
+            max_tokens=300
+        ):
+            chunks.append(delta)
+            yield "token", {"text": delta}
+        
+        # Record the turn once the stream has completed; a failed or abandoned stream leaves no trace
+        character_response = "".join(chunks)
+        with span("save"):
+            memory.add_message("user", message)
+            memory.add_message("assistant", character_response)
+            await self.session_store.save_memory(memory)
+            self._schedule_summary(memory)
+        logger.debug(f"Streamed response for user {user_id} from character {character_name}")
+        yield "done", {"response": character_response}
+
+    def _build_response_messages(
+        self,
+        context: CharacterContext,
+        memory: ConversationMemory,
+        message: str
+    ) -> List[Dict[str, str]]:
+        """
+        Build the Chain 2 chat messages for a character response.
+        
+        The first message is the character's precompiled prefix, identical on
+        every turn. The running summary of evicted turns (if any) and the
+        budgeted history, ending with the current user message, follow it.
+        The user message is not added to memory here; the caller records the
+        turn once the reply has arrived.
+        """
+        messages = [{"role": "system", "content": context.prompt_prefix}]
+        if memory.summary:
+            messages.append({"role": "system", "content": CONVERSATION_SUMMARY_TEMPLATE.format(summary=memory.summary)})
+        messages.extend(memory.chat_messages_with(message))
+        return messages
+
+    def _schedule_summary(self, memory: ConversationMemory):
+        """Start folding evicted turns into the summary in the background, one task per memory."""
+        if not memory.unsummarized or memory.summarizing:
+            return
+        memory.summarizing = True
+        task = asyncio.create_task(self._summarize(memory))
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _summarize(self, memory: ConversationMemory):
+        """Fold evicted turns into the memory's summary, including turns evicted meanwhile."""
+        try:
+            while memory.unsummarized:
+                pending = memory.take_unsummarized()
+                try:
+                    response = await self.llm_client.complete(
+                        model="gpt-3.5-turbo",
+                        agent="character_summary",
+                        messages=[
+                            {"role": "system", "content": MEMORY_SUMMARY_SYSTEM_PROMPT},
+                            {"role": "user", "content": get_memory_summary_prompt(
+                                memory.character_name, memory.summary, format_history(pending)
+                            )}
+                        ],
+                        temperature=0.3,
+                        max_tokens=250
+                    )
+                except Exception as e:
+                    # Keep the turns for the next attempt
+                    logger.warning(f"Could not summarize conversation of user {memory.user_id}: {str(e)}")
+                    memory.unsummarized[:0] = pending
+                    return
+                summary = (response.choices[0].message.content or "").strip()
+                if summary:
+                    memory.summary = summary
+                    try:
+                        await self.session_store.save_summary(memory)
+                    except Exception as e:
+                        # The summary stays in this process; the next summary saves it
+                        logger.warning(f"Could not save conversation summary of user {memory.user_id}: {str(e)}")
+                logger.info(f"Summarized {len(pending)} evicted messages for user {memory.user_id}")
+        finally:
+            memory.summarizing = False
+
+    async def load_memory(self, user_id: str, character_name: str) -> ConversationMemory:
+        """
+        Get the conversation memory for a turn, refreshed from the session store.
+        
+        Another worker may have continued the conversation since this process
+        last saw it; the store then returns its newer copy, which replaces ours.
+        
+        Args:
+            user_id (str): Unique identifier for the user
+            character_name (str): Name of the biblical character
+            
+        Returns:
+            ConversationMemory: The current conversation memory
+        """
+        memory_key = (user_id, character_name)
+        cached = self.conversation_memories.get(memory_key)
+        memory = await self.session_store.load_memory(user_id, character_name, cached)
+        if memory is None:
+            return self.get_or_create_memory(user_id, character_name)
+        if memory is not cached:
+            memory.token_budget = self.memory_token_budget
+            self.conversation_memories[memory_key] = memory
+            self.user_memory_keys.setdefault(user_id, set()).add(memory_key)
+        return memory
+
     def get_or_create_memory(
         self, 
         user_id: str, 
@@ -290,7 +666,7 @@ class BibleCharacter:
         Returns:
             ConversationMemory: The conversation memory
         """
-        memory_key = f"{user_id}_{character_name}"
+        memory_key = (user_id, character_name)
         
         if memory_key in self.conversation_memories:
             return self.conversation_memories[memory_key]
@@ -298,120 +674,13 @@ class BibleCharacter:
         memory = ConversationMemory(
             user_id=user_id,
             character_name=character_name,
-            messages=deque(maxlen=16),  # 8 exchanges * 2 messages per exchange
+            messages=deque(),
             created_at=datetime.utcnow(),
-            last_updated=datetime.utcnow()
+            last_updated=datetime.utcnow(),
+            token_budget=self.memory_token_budget
         )
         
         self.conversation_memories[memory_key] = memory
-        logger.info(f"Created new conversation memory for user {user_id} with character {character_name}")
+        self.user_memory_keys.setdefault(user_id, set()).add(memory_key)
+        logger.debug(f"Created new conversation memory for user {user_id} with character {character_name}")
         return memory
-
-    def _parse_biographical_info(self, response: str) -> Dict[str, str]:
-        """Parse biographical information from LLM response."""
-        try:
-            # Extract the biographical section
-            bio_section = response.split("Biographical Information:")[1].split("Key Events:")[0].strip()
-            bio_items = [item.strip() for item in bio_section.split("\n") if item.strip()]
-            
-            bio_dict = {}
-            for item in bio_items:
-                if ":" in item:
-                    key, value = item.split(":", 1)
-                    # Clean up the key by removing any markdown formatting
-                    key = key.replace("*", "").replace("-", "").strip()
-                    bio_dict[key] = value.strip()
-            
-            return bio_dict
-        except Exception as e:
-            logger.error(f"Error parsing biographical info: {str(e)}")
-            return {
-                "Época y lugar": "Información no disponible",
-                "Antecedentes familiares": "Información no disponible",
-                "Ocupación principal": "Información no disponible"
-            }
-
-    def _parse_key_events(self, response: str) -> List[str]:
-        """Parse key events from LLM response."""
-        try:
-            # Extract the key events section
-            events_section = response.split("Key Events:")[1].split("Character Traits:")[0].strip()
-            events = []
-            for line in events_section.split("\n"):
-                line = line.strip()
-                if line and not line.startswith("-") and not line.startswith("###"):
-                    # Clean up the event by removing any markdown formatting
-                    event = line.replace("*", "").strip()
-                    if event:
-                        events.append(event)
-            return events
-        except Exception as e:
-            logger.error(f"Error parsing key events: {str(e)}")
-            return ["Información no disponible"]
-
-    def _parse_character_traits(self, response: str) -> Dict[str, str]:
-        """Parse character traits from LLM response."""
-        try:
-            # Extract the character traits section
-            traits_section = response.split("Character Traits:")[1].split("Legacy:")[0].strip()
-            traits_items = [item.strip() for item in traits_section.split("\n") if item.strip()]
-            
-            traits_dict = {}
-            for item in traits_items:
-                if ":" in item:
-                    key, value = item.split(":", 1)
-                    # Clean up the key by removing any markdown formatting
-                    key = key.replace("*", "").replace("-", "").strip()
-                    traits_dict[key] = value.strip()
-            
-            return traits_dict
-        except Exception as e:
-            logger.error(f"Error parsing character traits: {str(e)}")
-            return {
-                "Rasgos principales": "Información no disponible",
-                "Fortalezas": "Información no disponible",
-                "Debilidades": "Información no disponible",
-                "Relación con Dios": "Información no disponible"
-            }
-
-    def _parse_legacy(self, response: str) -> Dict[str, str]:
-        """Parse legacy information from LLM response."""
-        try:
-            # Extract the legacy section
-            legacy_section = response.split("Legacy:")[1].split("Bible Verses:")[0].strip()
-            legacy_items = [item.strip() for item in legacy_section.split("\n") if item.strip()]
-            
-            legacy_dict = {}
-            for item in legacy_items:
-                if ":" in item:
-                    key, value = item.split(":", 1)
-                    # Clean up the key by removing any markdown formatting
-                    key = key.replace("*", "").replace("-", "").strip()
-                    legacy_dict[key] = value.strip()
-            
-            return legacy_dict
-        except Exception as e:
-            logger.error(f"Error parsing legacy: {str(e)}")
-            return {
-                "Influencia histórica": "Información no disponible",
-                "Lecciones principales": "Información no disponible",
-                "Importancia bíblica": "Información no disponible"
-            }
-
-    def _parse_bible_verses(self, response: str) -> List[str]:
-        """Parse Bible verses from LLM response."""
-        try:
-            # Extract the Bible verses section
-            verses_section = response.split("Bible Verses:")[1].strip()
-            verses = []
-            for line in verses_section.split("\n"):
-                line = line.strip()
-                if line and not line.startswith("-") and not line.startswith("###"):
-                    # Clean up the verse by removing any markdown formatting
-                    verse = line.replace("*", "").strip()
-                    if verse:
-                        verses.append(verse)
-            return verses
-        except Exception as e:
-            logger.error(f"Error parsing Bible verses: {str(e)}")
-            return ["Información no disponible"] 
\ No newline at end of file
@@ -1,41 +1,69 @@
-from typing import List, Optional
-from langchain_community.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from core.llm_gateway import LLMGateway
 from dtos.bible_verse import BibleVerseRequest, BibleVerseResponse
 from .prompts.bible_verse_agent import BIBLE_VERSE_EXPLANATION_PROMPT, BIBLE_VERSE_SYSTEM_PROMPT
 
 class BibleVerseAgent:
-    def __init__(self, model_name: str = "gpt-3.5-turbo"):
-        self.llm = ChatOpenAI(model_name=model_name, temperature=0.7)
+    def __init__(self, llm_client: LLMGateway, model_name: str = "gpt-3.5-turbo"):
+        self.llm_client = llm_client
+        self.model_name = model_name
     
     async def explain_verses(self, request: BibleVerseRequest) -> BibleVerseResponse:
+        # Get explanation from the model
+        response = await self.llm_client.complete(
+            model=self.model_name,
+            agent="bible_verse",
+            messages=self._build_messages(request),
+            temperature=0.7
+        )
+        explanation = response.choices[0].message.content.strip()
+        
+        return BibleVerseResponse(
+            explanation=self._clean_explanation(explanation, request.verses),
+            verses=request.verses,
+            verse_texts=request.verse_texts or []
+        )
+
+    async def stream_explain_verses(self, request: BibleVerseRequest) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream the explanation as SSE events, ending with the cleaned response."""
+        yield "stage", {"name": "started"}
+        
+        chunks = []
+        async for delta in self.llm_client.stream(
+            model=self.model_name,
+            agent="bible_verse",
+            messages=self._build_messages(request),
+            temperature=0.7
+        ):
+            chunks.append(delta)
+            yield "token", {"text": delta}
+        
+        response = BibleVerseResponse(
+            explanation=self._clean_explanation("".join(chunks).strip(), request.verses),
+            verses=request.verses,
+            verse_texts=request.verse_texts or []
+        )
+        yield "done", response.model_dump()
+
+    def _build_messages(self, request: BibleVerseRequest) -> List[Dict[str, str]]:
         # Format verses and texts for the prompt
         verses_text = "\n".join([f"- {verse}" for verse in request.verses])
         verse_texts = "\n".join([f"- {text}" for text in (request.verse_texts or [])])
         
         # Create messages for the chat
-        messages = [
-            SystemMessage(content=BIBLE_VERSE_SYSTEM_PROMPT),
-            HumanMessage(content=BIBLE_VERSE_EXPLANATION_PROMPT.format(
+        return [
+            {"role": "system", "content": BIBLE_VERSE_SYSTEM_PROMPT},
+            {"role": "user", "content": BIBLE_VERSE_EXPLANATION_PROMPT.format(
                 verses=verses_text,
                 verse_texts=verse_texts
-            ))
+            )}
         ]
-        
-        # Get explanation from the model
-        response = await self.llm.agenerate([messages])
-        explanation = response.generations[0][0].text.strip()
-        
+
+    def _clean_explanation(self, explanation: str, verses: List[str]) -> str:
         # Clean up explanation to remove verse references
         explanation = explanation.replace("Versículo:", "").replace("Versículos:", "")
-        for verse in request.verses:
+        for verse in verses:
             explanation = explanation.replace(verse, "")
         
         # Clean up extra whitespace and newlines
-        explanation = " ".join(explanation.split())
-        
-        return BibleVerseResponse(
-            explanation=explanation,
-            verses=request.verses,
-            verse_texts=request.verse_texts or []
-        ) 
\ No newline at end of file
+        return " ".join(explanation.split())
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Character context parser
+
+Turns a Chain 1 extraction response into a validated CharacterExtractionResult:
+
+- JSON mode responses (``get_character_response_format``) are validated
+  directly against the schema by pydantic.
+- Sectioned text responses (``CHARACTER_INFO_TEMPLATE``, for models without
+  JSON mode) are tokenized in a single pass over the lines: heading lines
+  (Spanish or the older English ones, accents, emoji and markdown optional)
+  switch the current section, other lines become ``key: value`` pairs or list
+  items of that section.
+
+Either way the response is scanned once, and a response missing a section
+raises CharacterParseError instead of silently producing placeholder values.
+"""
+
+import json
+import re
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+from pydantic import ValidationError
+from dtos.bible_character import CharacterExtractionResult
+
+SECTIONS: Tuple[str, ...] = ("biographical_info", "key_events", "character_traits", "legacy", "bible_verses")
+DICT_SECTIONS = frozenset({"biographical_info", "character_traits", "legacy"})
+
+# Folded heading prefixes: the Spanish headings of CHARACTER_INFO_TEMPLATE plus the English ones of older prompts
+SECTION_HEADINGS: Tuple[Tuple[str, str], ...] = (
+    ("informacion biografica", "biographical_info"),
+    ("biographical information", "biographical_info"),
+    ("eventos transformadores", "key_events"),
+    ("eventos clave", "key_events"),
+    ("key events", "key_events"),
+    ("perfil psicologico", "character_traits"),
+    ("dimension espiritual", "character_traits"),
+    ("estilo de comunicacion", "character_traits"),
+    ("rasgos de caracter", "character_traits"),
+    ("character traits", "character_traits"),
+    ("legado", "legacy"),
+    ("legacy", "legacy"),
+    ("referencias biblicas", "bible_verses"),
+    ("versiculos", "bible_verses"),
+    ("bible verses", "bible_verses"),
+)
+
+_HEADING = re.compile("|".join(re.escape(prefix) for prefix, _ in SECTION_HEADINGS))
+_HEADING_SECTIONS = dict(SECTION_HEADINGS)
+_BULLET = re.compile(r"(?:[-*•+]|\d+[.)])\s+")
+# Second character of every bullet ("- x", "1. x", "12) x"); lets most lines skip the regex
+_BULLET_ENDS = frozenset(" \t.)0123456789")
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", re.DOTALL)
+
+class CharacterParseError(ValueError):
+    """Raised when an extraction response does not yield every section."""
+
+    def __init__(self, message: str, partial: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            message (str): What was wrong with the response
+            partial (Optional[Dict[str, Any]]): Sections that did parse, keyed by field name
+        """
+        super().__init__(message)
+        self.partial = partial or {}
+
+def _heading_section(line: str) -> Optional[str]:
+    """Section a heading line opens, or None if the line is not a known heading."""
+    # Decomposing and dropping non-ASCII removes accents and emoji in C
+    title = unicodedata.normalize("NFKD", line).encode("ascii", "ignore").decode("ascii")
+    match = _HEADING.match(title.lstrip("#*_-=> \t").lower())
+    return _HEADING_SECTIONS[match.group()] if match else None
+
+def parse_sections(content: str) -> CharacterExtractionResult:
+    """
+    Parse a sectioned text response in one pass over its lines.
+
+    Heading lines switch the current section; other lines become
+    ``key: value`` pairs or list items of that section. Only lines with no
+    text after a colon are checked against the headings.
+
+    Args:
+        content (str): Response following CHARACTER_INFO_TEMPLATE (or the older English headings)
+
+    Returns:
+        CharacterExtractionResult: The validated sections
+
+    Raises:
+        CharacterParseError: If a section is missing or empty
+    """
+    sections: Dict[str, Any] = {}
+    entries: Any = None
+    is_dict = False
+    last_key: Optional[str] = None
+
+    for raw_line in content.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        colon = line.find(":")
+        if colon == -1 or colon >= len(line) - 3:
+            section = _heading_section(line)
+            if section is not None:
+                is_dict = section in DICT_SECTIONS
+                entries = sections.setdefault(section, {} if is_dict else [])
+                last_key = None
+                continue
+        if entries is None:
+            continue
+
+        bullet = line[1:2] in _BULLET_ENDS and _BULLET.match(line)
+        if bullet:
+            line = line[bullet.end():]
+        if "*" in line:
+            line = line.replace("*", "").strip()
+        if not line:
+            continue
+
+        if is_dict:
+            key, separator, value = line.partition(":")
+            if separator:
+                last_key = key.strip(" -")
+                entries[last_key] = value.strip()
+            elif last_key is not None:
+                entries[last_key] = f"{entries[last_key]} {line}".lstrip()
+        elif bullet or not entries or raw_line[0] not in " \t":
+            entries.append(line)
+        else:
+            # Indented line under a list item continues that item
+            entries[-1] = f"{entries[-1]} {line}"
+
+    for name in DICT_SECTIONS:
+        if name in sections:
+            sections[name] = {key: value for key, value in sections[name].items() if key and value}
+
+    missing = [name for name in SECTIONS if not sections.get(name)]
+    if missing:
+        raise CharacterParseError(f"Missing or empty sections: {', '.join(missing)}", sections)
+    return CharacterExtractionResult.model_validate(sections)
+
+def parse_json(content: str) -> CharacterExtractionResult:
+    """
+    Validate a JSON mode response.
+
+    Args:
+        content (str): JSON object following CHARACTER_CONTEXT_SCHEMA, optionally in a code fence
+
+    Returns:
+        CharacterExtractionResult: The validated sections
+
+    Raises:
+        CharacterParseError: If the JSON is malformed or does not match the schema
+    """
+    text = content.strip()
+    if text.startswith("```"):
+        fenced = _CODE_FENCE.match(text)
+        text = fenced.group(1) if fenced else text.strip("`")
+    try:
+        return CharacterExtractionResult.model_validate_json(text)
+    except ValidationError as e:
+        partial = {}
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            partial = {
+                name: data[name] for name in SECTIONS
+                if data.get(name) and isinstance(data[name], dict if name in DICT_SECTIONS else list)
+            }
+        raise CharacterParseError(f"Invalid character JSON: {e.error_count()} errors", partial) from e
+
+def parse_character_response(content: str) -> CharacterExtractionResult:
+    """
+    Parse a Chain 1 response in whichever format it came back in.
+
+    Args:
+        content (str): Raw completion text
+
+    Returns:
+        CharacterExtractionResult: The validated sections
+
+    Raises:
+        CharacterParseError: If the response cannot produce every section
+    """
+    stripped = content.lstrip()
+    if stripped.startswith("{") or stripped.startswith("```"):
+        return parse_json(stripped)
+    return parse_sections(content)
@@ -1,16 +1,17 @@
 from typing import List, Optional, Dict
-from dtos.feeling_conversation import FeelingMessage, FeelingResponse, FeelingConversation
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
+from dtos.feeling_conversation import FeelingMessage, FeelingResponse, FeelingConversation, FusedFeelingResult
+from core.llm_gateway import LLMGateway
 import logging
 import json
+import openai
+from services.feeling import complete_fused
 from .prompts.feeling_agent import (
     FEELING_AGENT_SYSTEM_PROMPT,
     get_verse_prompt,
     get_devotional_prompt,
     get_conversation_prompt,
     get_feeling_identification_prompt,
+    get_fused_prompt,
     EMOTIONAL_RESPONSE_TEMPLATES
 )
 
@@ -18,25 +19,20 @@ from .prompts.feeling_agent import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 class FeelingAgent:
-    def __init__(self):
+    def __init__(self, llm_client: LLMGateway, fused: bool = False):
         self.conversations: dict[str, FeelingConversation] = {}
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            logger.error("OPENAI_API_KEY not found in environment variables")
-            raise ValueError("OPENAI_API_KEY environment variable is required")
-        
-        self.client = OpenAI(api_key=self.api_key)
+        self.llm_client = llm_client
+        self.fused = fused
         logger.info("FeelingAgent initialized successfully")
 
-    def _get_ai_response(self, prompt: str, system_prompt: str = FEELING_AGENT_SYSTEM_PROMPT, retry_count: int = 3) -> str:
+    async def _get_ai_response(self, prompt: str, system_prompt: str = FEELING_AGENT_SYSTEM_PROMPT, retry_count: int = 3) -> str:
         for attempt in range(retry_count):
             try:
-                logger.info(f"Attempting OpenAI API call (attempt {attempt + 1}/{retry_count})")
-                response = self.client.chat.completions.create(
+                logger.debug(f"Attempting OpenAI API call (attempt {attempt + 1}/{retry_count})")
+                response = await self.llm_client.complete(
                     model="gpt-3.5-turbo",
+                    agent="feeling",
                     messages=[
                         {"role": "system", "content": system_prompt},
                         {"role": "user", "content": prompt}
@@ -45,7 +41,7 @@ class FeelingAgent:
                     max_tokens=500
                 )
                 result = response.choices[0].message.content.strip()
-                logger.info("Successfully received response from OpenAI API")
+                logger.debug("Successfully received response from OpenAI API")
                 return result
             except Exception as e:
                 logger.error(f"Error during OpenAI API call: {str(e)}")
@@ -53,10 +49,10 @@ class FeelingAgent:
                     continue
                 return "Error al conectar con el servicio. Por favor, verifica tu conexión e intenta de nuevo."
 
-    def _analyze_feeling(self, text: str) -> Dict:
+    async def _analyze_feeling(self, text: str) -> Dict:
         """Analyze the text to identify feelings and emotional context."""
         prompt = get_feeling_identification_prompt(text)
-        response = self._get_ai_response(prompt)
+        response = await self._get_ai_response(prompt)
         try:
             return json.loads(response)
         except json.JSONDecodeError:
@@ -70,57 +66,90 @@ class FeelingAgent:
                 "urgencia": "gradual"
             }
 
+    async def _get_fused_response(self, text: str, conversation_history: str = "", feeling: str = "") -> FusedFeelingResult:
+        """
+        Get analysis, verse and devotional from a single structured completion; see
+        :func:`services.feeling.complete_fused`. Needs a model with structured outputs.
+        
+        Raises:
+            ValueError: If no completion was valid JSON matching the schema
+            openai.APIError: If the upstream rejected the request or kept failing
+        """
+        return await complete_fused(
+            self.llm_client,
+            "gpt-3.5-turbo",
+            [
+                {"role": "system", "content": FEELING_AGENT_SYSTEM_PROMPT},
+                {"role": "user", "content": get_fused_prompt(text, conversation_history, feeling)}
+            ],
+            max_tokens=1000
+        )
+
     def _get_conversation_history(self, conversation_id: str) -> str:
         """Format conversation history for context."""
         if conversation_id not in self.conversations:
             return ""
         
-        history = []
-        for msg in self.conversations[conversation_id].messages:
-            history.append(f"Usuario: {msg.text}")
-            if msg.response:
-                history.append(f"Asistente: {msg.response.devotional}")
+        conversation = self.conversations[conversation_id]
+        history = [f"Usuario: {msg.text}" for msg in conversation.messages]
+        if conversation.response:
+            history.append(f"Asistente: {conversation.response.devotional}")
         
         return "\n".join(history)
 
-    def process_message(self, conversation_id: str, text: str) -> FeelingResponse:
+    async def process_message(self, conversation_id: str, text: str) -> FeelingResponse:
         try:
             # Initialize or get conversation
             if conversation_id not in self.conversations:
                 self.conversations[conversation_id] = FeelingConversation(messages=[])
             
+            if self.fused:
+                conversation_history = self._get_conversation_history(conversation_id)
+                try:
+                    result = await self._get_fused_response(text, conversation_history)
+                    message = FeelingMessage(feeling=result.analisis.sentimiento_primario, text=text)
+                    self.conversations[conversation_id].messages.append(message)
+                    
+                    response = FeelingResponse(verse=result.verse, devotional=result.devocional)
+                    self.conversations[conversation_id].response = response
+                    
+                    logger.debug("Successfully processed message with a single structured completion")
+                    return response
+                except (ValueError, openai.APIError) as e:
+                    logger.warning(f"Structured response failed, falling back to chained calls: {str(e)}")
+            
             # Analyze feelings
-            feeling_analysis = self._analyze_feeling(text)
+            feeling_analysis = await self._analyze_feeling(text)
             feeling = feeling_analysis["sentimiento_primario"]
             
             # Create message
             message = FeelingMessage(feeling=feeling, text=text)
             self.conversations[conversation_id].messages.append(message)
             
-            logger.info(f"Processing message for feeling: {feeling}")
+            logger.debug(f"Processing message for feeling: {feeling}")
             
             # Get conversation history
             conversation_history = self._get_conversation_history(conversation_id)
             
             # Get verse using AI
             verse_prompt = get_verse_prompt(feeling, text, conversation_history)
-            verse = self._get_ai_response(verse_prompt)
+            verse = await self._get_ai_response(verse_prompt)
             
             # Get devotional using AI
             devotional_prompt = get_devotional_prompt(feeling, text, verse, conversation_history)
-            devotional = self._get_ai_response(devotional_prompt)
+            devotional = await self._get_ai_response(devotional_prompt)
             
             response = FeelingResponse(verse=verse, devotional=devotional)
             self.conversations[conversation_id].response = response
             
-            logger.info("Successfully processed message and generated response")
+            logger.debug("Successfully processed message and generated response")
             return response
             
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
             raise
 
-    def continue_conversation(self, conversation_id: str, user_response: str) -> FeelingResponse:
+    async def continue_conversation(self, conversation_id: str, user_response: str) -> FeelingResponse:
         """Continue an existing conversation with a new user response."""
         try:
             if conversation_id not in self.conversations:
@@ -147,7 +176,7 @@ class FeelingAgent:
             )
             
             # Get AI response
-            devotional = self._get_ai_response(continuation_prompt)
+            devotional = await self._get_ai_response(continuation_prompt)
             
             # Create response
             response = FeelingResponse(verse=original_verse, devotional=devotional)
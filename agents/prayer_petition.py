@@ -1,6 +1,6 @@
-from typing import List
-from langchain_community.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from core.llm_gateway import LLMGateway
+from core.tracing import span
 from dtos.prayer_petition import PrayerPetitionRequest, PrayerPetitionResponse
 from .prompts.prayer_petition_agent import PRAYER_PETITION_SYSTEM_PROMPT, PRAYER_PETITION_PROMPT
 import json
@@ -9,54 +9,86 @@ import logging
 logger = logging.getLogger(__name__)
 
 class PrayerPetitionAgent:
-    def __init__(self, model_name: str = "gpt-3.5-turbo"):
-        self.llm = ChatOpenAI(
-            model_name=model_name,
-            temperature=0.7,
-            max_tokens=1000,  # Ensure enough tokens for complete response
-            request_timeout=30  # Increase timeout for complete responses
-        )
+    def __init__(self, llm_client: LLMGateway, model_name: str = "gpt-3.5-turbo"):
+        self.llm_client = llm_client
+        self.model_name = model_name
     
     async def process_petition(self, request: PrayerPetitionRequest) -> PrayerPetitionResponse:
         """
         Procesa una petición de oración y devuelve versículos bíblicos relevantes y una oración
         """
         try:
-            # Create messages for the chat
-            messages = [
-                SystemMessage(content=PRAYER_PETITION_SYSTEM_PROMPT),
-                HumanMessage(content=PRAYER_PETITION_PROMPT.format(
-                    petition=request.petition
-                ))
-            ]
-            
             # Get response from the model
-            response = await self.llm.agenerate([messages])
-            result = response.generations[0][0].text.strip()
-            
-            # Try to parse JSON response
-            try:
-                parsed_response = json.loads(result)
-                
-                # Validate required fields
-                if not all(key in parsed_response for key in ["bible_verses", "prayer", "explanation"]):
-                    raise ValueError("Missing required fields in response")
-                
-                # Ensure bible_verses is a list with at least one verse
-                if not isinstance(parsed_response["bible_verses"], list) or not parsed_response["bible_verses"]:
-                    raise ValueError("Invalid or empty bible verses")
-                
-                return PrayerPetitionResponse(
-                    bible_verses=parsed_response["bible_verses"],
-                    prayer=parsed_response["prayer"],
-                    explanation=parsed_response["explanation"]
-                )
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {str(e)}")
-                logger.error(f"Raw response: {result}")
-                raise ValueError("Invalid response format from AI model")
+            response = await self.llm_client.complete(
+                model=self.model_name,
+                agent="prayer_petition",
+                messages=self._build_messages(request),
+                temperature=0.7,
+                max_tokens=1000,  # Ensure enough tokens for complete response
+                timeout=30  # Increase timeout for complete responses
+            )
+            result = response.choices[0].message.content.strip()
+            with span("parse"):
+                return self._parse_response(result)
                 
         except Exception as e:
             logger.error(f"Error processing prayer petition: {str(e)}")
-            raise ValueError(f"Error processing prayer petition: {str(e)}") 
\ No newline at end of file
+            raise ValueError(f"Error processing prayer petition: {str(e)}")
+
+    async def stream_petition(self, request: PrayerPetitionRequest) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Transmite la respuesta del modelo como eventos SSE y termina con la respuesta validada
+        """
+        yield "stage", {"name": "started"}
+        
+        chunks = []
+        async for delta in self.llm_client.stream(
+            model=self.model_name,
+            agent="prayer_petition",
+            messages=self._build_messages(request),
+            temperature=0.7,
+            max_tokens=1000,
+            timeout=30
+        ):
+            chunks.append(delta)
+            yield "token", {"text": delta}
+        
+        with span("parse"):
+            response = self._parse_response("".join(chunks).strip())
+        yield "done", response.model_dump()
+
+    def _build_messages(self, request: PrayerPetitionRequest) -> List[Dict[str, str]]:
+        # Create messages for the chat
+        return [
+            {"role": "system", "content": PRAYER_PETITION_SYSTEM_PROMPT},
+            {"role": "user", "content": PRAYER_PETITION_PROMPT.format(
+                petition=request.petition
+            )}
+        ]
+
+    def _parse_response(self, result: str) -> PrayerPetitionResponse:
+        """
+        Valida la respuesta JSON del modelo y la convierte en PrayerPetitionResponse
+        """
+        # Try to parse JSON response
+        try:
+            parsed_response = json.loads(result)
+            
+            # Validate required fields
+            if not all(key in parsed_response for key in ["bible_verses", "prayer", "explanation"]):
+                raise ValueError("Missing required fields in response")
+            
+            # Ensure bible_verses is a list with at least one verse
+            if not isinstance(parsed_response["bible_verses"], list) or not parsed_response["bible_verses"]:
+                raise ValueError("Invalid or empty bible verses")
+            
+            return PrayerPetitionResponse(
+                bible_verses=parsed_response["bible_verses"],
+                prayer=parsed_response["prayer"],
+                explanation=parsed_response["explanation"]
+            )
+            
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse JSON response: {str(e)}")
+            logger.error(f"Raw response: {result}")
+            raise ValueError("Invalid response format from AI model")
\ No newline at end of file
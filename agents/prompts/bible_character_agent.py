@@ -6,6 +6,8 @@ that create immersive, authentic biblical character interactions with deep
 contextual understanding and personality consistency.
 """
 
+import hashlib
+import json
 from typing import Dict
 
 # Chain 1: Deep Character Analysis & Extraction Template
@@ -62,19 +64,60 @@ MISIÓN: Realiza un análisis profundo y completo de {character_name} para crear
 Esta información debe ser exhaustiva y específica para crear un agente conversacional auténtico y profundo.
 """
 
-# Chain 2: Advanced Character Response Generation Template
-RESPONSE_TEMPLATE: str = """
+# Chain 1 (JSON mode): same analysis as a schema-constrained object, parsed without heuristics
+CHARACTER_JSON_TEMPLATE: str = """
+MISIÓN: Analiza a {character_name} para crear la base de un agente conversacional auténtico.
+
+Completa cada campo del objeto JSON con frases breves y específicas:
+- **biographical_info:** época y lugar, antecedentes familiares y ocupación principal
+- **key_events:** mínimo 5 eventos transformadores, cada uno con su impacto en su carácter y fe
+- **character_traits:** rasgos principales, fortalezas, debilidades y relación con Dios
+- **legacy:** influencia histórica, lecciones principales e importancia bíblica
+- **bible_verses:** mínimo 6 referencias bíblicas clave en español, cada una con su contexto ("Éxodo 3:10 - llamado en la zarza")
+
+Responde ÚNICAMENTE con el objeto JSON que cumple el esquema indicado.
+"""
+
+def _string_fields(*names: str) -> Dict:
+    return {
+        "type": "object",
+        "properties": {name: {"type": "string"} for name in names},
+        "required": list(names),
+        "additionalProperties": False
+    }
+
+# CharacterContext as a strict JSON schema; the fixed keys are the ones the chat response displays
+CHARACTER_CONTEXT_SCHEMA: Dict = {
+    "type": "object",
+    "properties": {
+        "biographical_info": _string_fields("Época y lugar", "Antecedentes familiares", "Ocupación principal"),
+        "key_events": {"type": "array", "items": {"type": "string"}},
+        "character_traits": _string_fields("Rasgos principales", "Fortalezas", "Debilidades", "Relación con Dios"),
+        "legacy": _string_fields("Influencia histórica", "Lecciones principales", "Importancia bíblica"),
+        "bible_verses": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["biographical_info", "key_events", "character_traits", "legacy", "bible_verses"],
+    "additionalProperties": False
+}
+
+# Chain 2: Advanced Character Response Generation Template, in three parts so the
+# per-character parts can be rendered once and reused as a stable prompt prefix
+CHARACTER_PROFILE_TEMPLATE: str = """
 🎭 **IDENTIDAD DE PERSONAJE ACTIVADA: {character_name}**
 
 📚 **CONTEXTO PROFUNDO DEL PERSONAJE:**
 {character_context}
+"""
 
+CONVERSATION_TURN_TEMPLATE: str = """
 📖 **HISTORIAL DE CONVERSACIÓN:**
 {conversation_history}
 
 💬 **MENSAJE ACTUAL DEL USUARIO:**
 {user_message}
+"""
 
+RESPONSE_INSTRUCTIONS_TEMPLATE: str = """
 🎯 **INSTRUCCIONES DE INTERPRETACIÓN OBLIGATORIAS:**
 
 **AUTENTICIDAD HISTÓRICA:**
@@ -116,6 +159,33 @@ RESPONSE_TEMPLATE: str = """
 Responde como {character_name} de manera completamente inmersiva, auténtica y espiritualmente nutritiva.
 """
 
+RESPONSE_TEMPLATE: str = CHARACTER_PROFILE_TEMPLATE + CONVERSATION_TURN_TEMPLATE + RESPONSE_INSTRUCTIONS_TEMPLATE
+
+# Closes the cached prefix; the history follows as regular chat messages
+CONVERSATION_NOTE: str = "💬 La conversación con el usuario continúa en los siguientes mensajes. Responde siempre a su último mensaje como el personaje."
+
+# Running summary of turns evicted from the conversation memory
+MEMORY_SUMMARY_SYSTEM_PROMPT: str = "Eres un asistente que resume conversaciones con precisión y brevedad, sin inventar nada."
+
+MEMORY_SUMMARY_TEMPLATE: str = """
+Actualiza el resumen de una conversación entre un usuario y {character_name}.
+
+📝 **RESUMEN ACTUAL:**
+{summary}
+
+💬 **MENSAJES NUEVOS A INCORPORAR:**
+{messages}
+
+Escribe un único resumen en español, en tercera persona y de máximo 120 palabras, que conserve:
+- Lo que el usuario compartió de sí mismo (situación, preocupaciones, nombres, decisiones)
+- Los consejos, versículos y promesas que {character_name} ya le dio
+- Preguntas que quedaron pendientes
+
+Responde solo con el resumen.
+"""
+
+CONVERSATION_SUMMARY_TEMPLATE: str = "📝 **RESUMEN DE LA CONVERSACIÓN ANTERIOR:**\n{summary}"
+
 # System Prompt for Character Consistency
 CHARACTER_SYSTEM_PROMPT: str = """
 IDENTIDAD PRINCIPAL: Eres un agente de inteligencia artificial especializado en interpretación auténtica de personajes bíblicos.
@@ -143,17 +213,91 @@ EVITAR ABSOLUTAMENTE:
 Tu objetivo es crear encuentros transformadores donde los usuarios experimenten la sabiduría y perspectiva únicas de cada personaje bíblico de manera auténtica y aplicable.
 """
 
-def get_character_prompt(character_name: str) -> str:
+# Changes whenever the extraction prompts change, so stored character contexts from older prompts are re-extracted
+CHARACTER_TEMPLATE_VERSION = hashlib.sha256(
+    (
+        CHARACTER_SYSTEM_PROMPT + CHARACTER_INFO_TEMPLATE + CHARACTER_JSON_TEMPLATE
+        + json.dumps(CHARACTER_CONTEXT_SCHEMA, sort_keys=True)
+    ).encode("utf-8")
+).hexdigest()[:12]
+
+def get_character_prompt(character_name: str, json_mode: bool = False) -> str:
     """
     Generate an optimized, comprehensive character analysis prompt for deep biblical character understanding.
     
     Args:
         character_name (str): The name of the biblical character to analyze
+        json_mode (bool): Ask for the JSON object described by ``CHARACTER_CONTEXT_SCHEMA``
+            instead of the sectioned text analysis
         
     Returns:
         str: Advanced prompt for extracting complete character information
     """
-    return CHARACTER_INFO_TEMPLATE.format(character_name=character_name)
+    template = CHARACTER_JSON_TEMPLATE if json_mode else CHARACTER_INFO_TEMPLATE
+    return template.format(character_name=character_name)
+
+def get_character_response_format() -> Dict:
+    """
+    Generate the ``response_format`` parameter for JSON-mode character extraction.
+    
+    Returns:
+        Dict: Strict JSON-schema format for ``CHARACTER_CONTEXT_SCHEMA``
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "character_context",
+            "strict": True,
+            "schema": CHARACTER_CONTEXT_SCHEMA
+        }
+    }
+
+def format_character_context(character_context: Dict) -> str:
+    """
+    Render a character context as Markdown sections for the character profile.
+    
+    Args:
+        character_context (Dict): Output of ``CharacterContext.to_dict()``
+        
+    Returns:
+        str: One bold heading per field, with list items and dictionary entries as bullets
+    """
+    sections = []
+    for key, value in character_context.items():
+        if isinstance(value, dict):
+            items = "\n".join(f"  • {name}: {text}" for name, text in value.items())
+            sections.append(f"**{key.upper()}:**\n{items}")
+        elif isinstance(value, (list, tuple)):
+            items = "\n".join(f"  • {item}" for item in value)
+            sections.append(f"**{key.upper()}:**\n{items}")
+        else:
+            sections.append(f"**{key.upper()}:** {value}")
+    return "\n\n".join(sections)
+
+def get_character_prefix(character_name: str, character_context: Dict) -> str:
+    """
+    Generate the system message shared by every chat turn with a character.
+    
+    The system prompt, character profile and interpretation instructions only
+    depend on the character, so the result is rendered once per context and is
+    byte-identical across turns and users, which lets provider-side prompt
+    caching reuse it. The conversation follows as regular chat messages.
+    
+    Args:
+        character_name (str): The biblical character's name
+        character_context (Dict): Comprehensive character analysis data
+        
+    Returns:
+        str: Static prompt prefix for the character
+    """
+    profile = CHARACTER_PROFILE_TEMPLATE.format(
+        character_name=character_name,
+        character_context=format_character_context(character_context)
+    )
+    instructions = RESPONSE_INSTRUCTIONS_TEMPLATE.format(character_name=character_name)
+    return "\n\n".join(
+        part.strip() for part in (CHARACTER_SYSTEM_PROMPT, profile, instructions, CONVERSATION_NOTE)
+    )
 
 def get_response_prompt(
     character_name: str,
@@ -164,6 +308,9 @@ def get_response_prompt(
     """
     Generate an advanced response prompt that ensures authentic, immersive biblical character interaction.
     
+    This is the single-message layout, with the history in the middle of the
+    prompt; the chat path uses :func:`get_character_prefix` instead.
+    
     Args:
         character_name (str): The biblical character's name
         character_context (Dict): Comprehensive character analysis data
@@ -192,6 +339,24 @@ def get_response_prompt(
         user_message=user_message
     )
 
+def get_memory_summary_prompt(character_name: str, summary: str, messages: str) -> str:
+    """
+    Generate the prompt that folds evicted conversation turns into the running summary.
+    
+    Args:
+        character_name (str): The biblical character's name
+        summary (str): Current summary, empty for the first one
+        messages (str): Evicted messages formatted as "Usuario:" / "Personaje:" lines
+        
+    Returns:
+        str: Prompt for the updated summary
+    """
+    return MEMORY_SUMMARY_TEMPLATE.format(
+        character_name=character_name,
+        summary=summary or "(sin resumen todavía)",
+        messages=messages
+    )
+
 def get_system_prompt() -> str:
     """
     Get the optimized system prompt for consistent character behavior.
@@ -1,3 +1,5 @@
+import hashlib
+
 BIBLE_VERSE_EXPLANATION_PROMPT = """
 Analiza y explica los siguientes versículos bíblicos de manera clara y práctica.
 
@@ -58,4 +60,9 @@ EVITA ABSOLUTAMENTE:
 ❌ Lenguaje que excluya o intimide
 
 Tu objetivo es que cada persona que lea tu explicación sienta que puede entender y vivir estos principios bíblicos desde hoy mismo.
-"""
\ No newline at end of file
+"""
+
+# Changes whenever either template changes, so cached explanations from older prompts are not served
+BIBLE_VERSE_PROMPT_VERSION = hashlib.sha256(
+    (BIBLE_VERSE_SYSTEM_PROMPT + BIBLE_VERSE_EXPLANATION_PROMPT).encode("utf-8")
+).hexdigest()[:12]
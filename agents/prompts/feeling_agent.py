@@ -229,18 +229,105 @@ def get_feeling_identification_prompt(text: str) -> str:
 - Evalúa si hay urgencia emocional o es reflexión tranquila
 
 **FORMATO DE RESPUESTA:**
-{
+{{
     "sentimiento_primario": "[emoción principal identificada]",
     "sentimientos_secundarios": ["[emoción 2]", "[emoción 3]"],
     "intensidad": "[baja/media/alta]",
     "necesidad_emocional": "[validación/consuelo/dirección/celebración/acompañamiento]",
     "tono_recomendado": "[descripción del tono de respuesta más apropiado]",
     "urgencia": "[si requiere respuesta inmediata o puede desarrollarse gradualmente]"
-}
+}}
 
 Analiza con sensibilidad pastoral y comprensión humana profunda, buscando el corazón detrás de las palabras.
 """
 
+# Esquema JSON para el modo fusionado (análisis + versículo + devocional en una sola llamada)
+FEELING_FUSED_SCHEMA: Dict = {
+    "type": "object",
+    "properties": {
+        "analisis": {
+            "type": "object",
+            "properties": {
+                "sentimiento_primario": {"type": "string"},
+                "sentimientos_secundarios": {"type": "array", "items": {"type": "string"}},
+                "intensidad": {"type": "string", "enum": ["baja", "media", "alta"]},
+                "necesidad_emocional": {"type": "string"},
+                "tono_recomendado": {"type": "string"},
+                "urgencia": {"type": "string"}
+            },
+            "required": [
+                "sentimiento_primario",
+                "sentimientos_secundarios",
+                "intensidad",
+                "necesidad_emocional",
+                "tono_recomendado",
+                "urgencia"
+            ],
+            "additionalProperties": False
+        },
+        "versiculo_referencia": {"type": "string"},
+        "versiculo_texto": {"type": "string"},
+        "devocional": {"type": "string"}
+    },
+    "required": ["analisis", "versiculo_referencia", "versiculo_texto", "devocional"],
+    "additionalProperties": False
+}
+
+def get_fused_response_format() -> Dict:
+    """
+    Genera el parámetro ``response_format`` para solicitar salida estructurada.
+    
+    Returns:
+        Dict: Formato JSON-schema estricto para el modo fusionado
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "feeling_response",
+            "strict": True,
+            "schema": FEELING_FUSED_SCHEMA
+        }
+    }
+
+def get_fused_prompt(text: str, conversation_history: str = "", feeling: str = "") -> str:
+    """
+    Genera un prompt que obtiene análisis emocional, versículo y devocional en una sola respuesta.
+    
+    Args:
+        text (str): El contexto proporcionado por el usuario
+        conversation_history (str): Historial de conversación previa
+        feeling (str): Sentimiento declarado por el usuario, si ya se conoce
+        
+    Returns:
+        str: Prompt para la respuesta estructurada fusionada
+    """
+    return f"""
+🎯 **MISIÓN INTEGRAL:** En una sola respuesta, analiza la emoción de la persona, selecciona el versículo bíblico más consolador y escribe un devocional empático basado en él.
+
+💭 **CONTEXTO EMOCIONAL:**
+- **Sentimiento Declarado:** {feeling if feeling else "No indicado, identifícalo"}
+- **Situación Específica:** {text}
+- **Conversación Previa:** {conversation_history if conversation_history else "Primera interacción"}
+
+🔍 **1. ANÁLISIS (campo "analisis"):**
+- Emoción primaria, emociones secundarias, intensidad (baja/media/alta)
+- Necesidad emocional, tono recomendado y urgencia
+
+📖 **2. VERSÍCULO (campos "versiculo_referencia" y "versiculo_texto"):**
+- Referencia completa en español: [Libro] [Capítulo]:[Versículo]
+- Texto completo del versículo en español, sin comillas adicionales
+- Debe resonar con la emoción y ofrecer consuelo sin sonar insensible
+
+🤗 **3. DEVOCIONAL (campo "devocional"):**
+- Apertura empática que valide el sentimiento
+- Integración natural del versículo seleccionado
+- Perspectiva esperanzadora y un paso práctico realizable
+- Termina con una pregunta o invitación a continuar la conversación
+- Máximo 150-200 palabras, usando "tú"
+
+Responde ÚNICAMENTE con el objeto JSON que cumple el esquema indicado.
+"""
+
 # Funciones auxiliares para diferentes tipos de respuesta emocional
 EMOTIONAL_RESPONSE_TEMPLATES: Dict[str, str] = {
     "dolor": """
@@ -9,7 +9,8 @@ from dtos.bible_character import (
     ChatRequestDTO,
     ChatResponseDTO
 )
-from core.dependencies import get_llm_client
+from core.registry import ServiceRegistry, get_registry
+from core.sse import sse_response
 
 router = APIRouter(
     prefix="/bible/characters",
@@ -19,17 +20,18 @@ router = APIRouter(
     },
 )
 
-async def get_bible_character_service() -> BibleCharacterService:
-    """Get or create BibleCharacterService instance."""
-    service = BibleCharacterService(get_llm_client())
-    await service.initialize()
-    return service
+def get_bible_character_service(
+    registry: ServiceRegistry = Depends(get_registry)
+) -> BibleCharacterService:
+    """Get the application-wide BibleCharacterService instance."""
+    return registry.bible_character_service
 
 @router.post("/chat", response_model=ChatResponseDTO)
 async def chat_with_character(
     request: Request,
     response: Response,
     chat_request: ChatRequestDTO,
+    stream: bool = False,
     service: BibleCharacterService = Depends(get_bible_character_service)
 ) -> ChatResponseDTO:
     """
@@ -39,11 +41,15 @@ async def chat_with_character(
         request (Request): FastAPI request object
         response (Response): FastAPI response object
         chat_request (ChatRequestDTO): The chat request containing user message and context
+        stream (bool): Stream the response as Server-Sent Events
         
     Returns:
-        ChatResponseDTO: The character's response and conversation history
+        ChatResponseDTO: The character's response and conversation history, or an
+        SSE stream of tokens ending with a ``done`` event when ``stream`` is set
     """
     try:
+        if stream:
+            return await sse_response(service.stream_chat_with_character(chat_request))
         return await service.chat_with_character(chat_request)
     except Exception as e:
         raise HTTPException(
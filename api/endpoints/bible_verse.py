@@ -1,7 +1,9 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from dtos.bible_verse import BibleVerseResponse
 from services.bible_verse import BibleVerseService
+from core.registry import ServiceRegistry, get_registry
+from core.sse import sse_response
 
 router = APIRouter(
     prefix="/verses",
@@ -12,12 +14,18 @@ router = APIRouter(
     }
 )
 
+def get_bible_verse_service(registry: ServiceRegistry = Depends(get_registry)) -> BibleVerseService:
+    """Get the application-wide BibleVerseService instance."""
+    return registry.bible_verse_service
+
 @router.post("/explain", response_model=BibleVerseResponse)
 async def explain_verses(
     request: Request,
     response: Response,
     verses: List[str],
-    verse_texts: Optional[List[str]] = None
+    verse_texts: Optional[List[str]] = None,
+    stream: bool = False,
+    service: BibleVerseService = Depends(get_bible_verse_service)
 ) -> BibleVerseResponse:
     """
     Get a unified explanation for a list of Bible verses.
@@ -27,6 +35,8 @@ async def explain_verses(
         response (Response): FastAPI response object for setting headers
         verses (List[str]): List of verse references (e.g., ["Josue 1:9", "Filipenses 4:13"])
         verse_texts (Optional[List[str]]): Optional list of verse texts
+        stream (bool): Stream the explanation as Server-Sent Events
+        service (BibleVerseService): The shared verse service instance
         
     Returns:
         BibleVerseResponse: Contains the explanation and processed verses
@@ -35,7 +45,8 @@ async def explain_verses(
         HTTPException: If there's an error processing the request
     """
     try:
-        service = BibleVerseService()
+        if stream:
+            return await sse_response(service.stream_explain_verses(verses=verses, verse_texts=verse_texts))
         return await service.explain_verses(verses=verses, verse_texts=verse_texts)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
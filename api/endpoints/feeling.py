@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from dtos.feeling_conversation import FeelingMessage, FeelingResponse, FeelingConversation
 from controllers.feeling_controller import FeelingController
+from core.registry import ServiceRegistry, get_registry
+from core.sse import sse_response
 from typing import Optional
 import uuid
 
@@ -10,14 +12,15 @@ router = APIRouter(
     }
 )
 
-def get_controller() -> FeelingController:
-    return FeelingController()
+def get_controller(registry: ServiceRegistry = Depends(get_registry)) -> FeelingController:
+    return registry.feeling_controller
 
 @router.post("/feeling", response_model=FeelingResponse)
 async def process_feeling(
     request: Request,
     response: Response,
     message: FeelingMessage,
+    stream: bool = False,
     controller: FeelingController = Depends(get_controller)
 ):
     """
@@ -27,14 +30,26 @@ async def process_feeling(
         request (Request): FastAPI request object
         response (Response): FastAPI response object
         message (FeelingMessage): The feeling message to process, including whether to include an SVG
+        stream (bool): Stream the verse and devotional as Server-Sent Events
         controller (FeelingController): The feeling controller instance
         
     Returns:
-        FeelingResponse: The processed feeling response
+        FeelingResponse: The processed feeling response, or an SSE stream with a
+        ``verse_ready`` stage before the devotional when ``stream`` is set. The
+        conversation ID is returned in the ``X-Conversation-ID`` header, or in the
+        ``started`` stage when streaming.
     """
     try:
         conversation_id = str(uuid.uuid4())
-        return controller.process_feeling(
+        response.headers["X-Conversation-ID"] = conversation_id
+        if stream:
+            return await sse_response(controller.stream_feeling(
+                conversation_id=conversation_id,
+                feeling=message.feeling,
+                text=message.text,
+                include_svg=message.include_svg
+            ))
+        return await controller.process_feeling(
             conversation_id=conversation_id,
             feeling=message.feeling,
             text=message.text,
@@ -63,9 +78,11 @@ async def get_conversation(
         Optional[FeelingConversation]: The conversation if found, None otherwise
     """
     try:
-        conversation = controller.get_conversation(conversation_id)
+        conversation = await controller.get_conversation(conversation_id)
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
         return conversation
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from dtos.prayer_petition import PrayerPetitionRequest, PrayerPetitionResponse
 from services.prayer_petition import PrayerPetitionService
+from core.registry import ServiceRegistry, get_registry
+from core.sse import sse_response
 
 router = APIRouter(
     prefix="/prayers",
@@ -11,11 +13,17 @@ router = APIRouter(
     }
 )
 
+def get_prayer_petition_service(registry: ServiceRegistry = Depends(get_registry)) -> PrayerPetitionService:
+    """Get the application-wide PrayerPetitionService instance."""
+    return registry.prayer_petition_service
+
 @router.post("/petition", response_model=PrayerPetitionResponse)
 async def process_prayer_petition(
     request: Request,
     response: Response,
-    petition: PrayerPetitionRequest
+    petition: PrayerPetitionRequest,
+    stream: bool = False,
+    service: PrayerPetitionService = Depends(get_prayer_petition_service)
 ) -> PrayerPetitionResponse:
     """
     Process a prayer petition and return relevant Bible verses and a prayer.
@@ -24,6 +32,8 @@ async def process_prayer_petition(
         request (Request): FastAPI request object for getting client IP
         response (Response): FastAPI response object for setting headers
         petition (PrayerPetitionRequest): The prayer petition to process
+        stream (bool): Stream the model output as Server-Sent Events
+        service (PrayerPetitionService): The shared prayer petition service instance
         
     Returns:
         PrayerPetitionResponse: Contains Bible verses, prayer, and explanation
@@ -32,7 +42,8 @@ async def process_prayer_petition(
         HTTPException: If there's an error processing the request
     """
     try:
-        service = PrayerPetitionService()
+        if stream:
+            return await sse_response(service.stream_petition(request=petition))
         return await service.process_petition(request=petition)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
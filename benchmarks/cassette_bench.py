@@ -0,0 +1,85 @@
+"""
+Benchmark: LLM cassette record and replay.
+
+Records ``--requests`` completions and as many streams from the local stub
+LLM, with log-normal latency. It then replays them:
+
+1. at once (LLM_CASSETTE_LATENCY=0), reporting the gateway's cost per call;
+2. with the recorded delays (LLM_CASSETTE_LATENCY=1), comparing each call's
+   latency, and each stream's time to first chunk, with the recording.
+
+Every replayed answer must match the recorded one.
+
+    python -m benchmarks.cassette_bench --requests 200 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List, Tuple
+from benchmarks.feeling_fused_bench import percentile
+from benchmarks.stub_llm_server import StubLLMServer
+from core.llm_cassette import CassetteGateway
+
+def prompt(index: int):
+    return [{"role": "user", "content": f"Explica el versículo número {index}"}]
+
+async def run(gateway: CassetteGateway, requests: int) -> Tuple[List[str], List[float], List[float]]:
+    """Send every completion and stream once; returns the answers, latencies and stream first-chunk times."""
+    answers, latencies, first_chunks = [], [], []
+    for index in range(requests):
+        start = time.perf_counter()
+        response = await gateway.complete(prompt(index), agent="bench", temperature=0.7)
+        latencies.append(time.perf_counter() - start)
+        answers.append(response.choices[0].message.content)
+
+        start = time.perf_counter()
+        deltas = []
+        async for delta in gateway.stream(prompt(index), agent="bench", temperature=0.7):
+            if not deltas:
+                first_chunks.append(time.perf_counter() - start)
+            deltas.append(delta)
+        latencies.append(time.perf_counter() - start)
+        answers.append("".join(deltas))
+    return answers, latencies, first_chunks
+
+def compare(label: str, recorded: List[float], replayed: List[float]):
+    errors = sorted(abs(b - a) * 1000 for a, b in zip(recorded, replayed))
+    print(
+        f"{label:<12} recorded p50 {percentile(recorded, 50) * 1000:6.1f}ms p99 {percentile(recorded, 99) * 1000:6.1f}ms  "
+        f"replayed p50 {percentile(replayed, 50) * 1000:6.1f}ms p99 {percentile(replayed, 99) * 1000:6.1f}ms  "
+        f"per-call error p50 {percentile(errors, 50):.2f}ms max {errors[-1]:.2f}ms"
+    )
+
+async def main(requests: int, latency: float, jitter: float, token_delay: float):
+    server = StubLLMServer(latency=latency, distribution="lognormal", jitter=jitter, token_delay=token_delay)
+    await server.start()
+    directory = tempfile.mkdtemp(prefix="cassettes-")
+
+    recorder = CassetteGateway("record", directory, api_key="stub", base_url=server.base_url, warm_connections=0)
+    recorded, recorded_latencies, recorded_first = await run(recorder, requests)
+    await recorder.close()
+    await server.stop()
+    print(f"recorded {2 * requests} calls in {directory}")
+
+    instant = CassetteGateway("replay", directory)
+    start = time.perf_counter()
+    replayed, _, _ = await run(instant, requests)
+    print(f"replay at once: {(time.perf_counter() - start) / (2 * requests) * 1e6:.0f}us/call")
+    assert replayed == recorded, "replayed answers differ from the recording"
+
+    timed = CassetteGateway("replay", directory, latency_scale=1.0)
+    replayed, replayed_latencies, replayed_first = await run(timed, requests)
+    assert replayed == recorded, "replayed answers differ from the recording"
+    compare("latency", recorded_latencies, replayed_latencies)
+    compare("first chunk", recorded_first, replayed_first)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM cassette benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency, args.jitter, args.token_delay))
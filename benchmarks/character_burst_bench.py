@@ -0,0 +1,90 @@
+"""
+Benchmark: burst of first requests for uncached characters.
+
+Fires ``--callers`` concurrent ``get_character_context`` calls spread over a
+few characters against an agent with an empty context store, and checks that
+exactly one extraction reaches the upstream per character and every other
+caller is coalesced onto it. A second burst against a failing upstream checks
+that every caller receives the error and that the failure is not cached (the
+next call retries). Exits non-zero if any check fails.
+
+    python -m benchmarks.character_burst_bench --callers 200 --latency 0.3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+from benchmarks.fake_gateway import FakeLLMGateway
+from benchmarks.character_context_store_bench import CHARACTERS, respond
+from agents.bible_character import BibleCharacter
+
+class UpstreamError(Exception):
+    pass
+
+async def burst(agent: BibleCharacter, names: List[str]) -> List[object]:
+    return await asyncio.gather(*(agent.get_character_context(name) for name in names), return_exceptions=True)
+
+async def main(callers: int, characters: int, latency: float) -> int:
+    names = [CHARACTERS[index % characters] for index in range(callers)]
+    prompts: Counter = Counter()
+    problems = []
+
+    def counting(messages: List[Dict[str, str]], params: Dict) -> str:
+        prompts[next(name for name in CHARACTERS if name in messages[-1]["content"])] += 1
+        return respond(messages, params)
+
+    gateway = FakeLLMGateway(counting, latency=latency)
+    agent = BibleCharacter(gateway)
+    start = time.perf_counter()
+    results = await burst(agent, names)
+    elapsed = time.perf_counter() - start
+    failed = sum(isinstance(result, Exception) for result in results)
+    print(
+        f"success burst: callers={callers} characters={characters} upstream calls={gateway.calls} "
+        f"max per character={max(prompts.values())} failed={failed} elapsed={elapsed * 1000:.0f}ms"
+    )
+    stats = agent.extractions.stats()
+    print(f"  single-flight: {stats}")
+    if gateway.calls != characters or sorted(prompts.values()) != [1] * characters:
+        problems.append(f"success burst made {gateway.calls} upstream calls ({dict(prompts)}), expected one per character")
+    if stats["coalesced"] != callers - characters:
+        problems.append(f"success burst coalesced {stats['coalesced']} callers, expected {callers - characters}")
+    if failed:
+        problems.append(f"success burst: {failed} callers failed")
+
+    def failing(messages: List[Dict[str, str]], params: Dict) -> str:
+        raise UpstreamError("upstream unavailable")
+
+    gateway = FakeLLMGateway(failing, latency=latency)
+    agent = BibleCharacter(gateway)
+    results = await burst(agent, names)
+    errors = sum(isinstance(result, UpstreamError) for result in results)
+    print(f"failure burst: upstream calls={gateway.calls} callers that got the error={errors}/{callers}")
+    if errors != callers:
+        problems.append(f"failure burst: only {errors}/{callers} callers got the upstream error")
+    failed_calls = gateway.calls
+
+    gateway.responder = respond
+    retried = await agent.get_character_context(names[0])
+    print(f"  retry after failure: upstream calls={gateway.calls} (one more than the burst)")
+    print(f"  single-flight: {agent.extractions.stats()}")
+    if gateway.calls != failed_calls + 1 or retried is None:
+        problems.append(f"retry after failure made {gateway.calls - failed_calls} upstream calls, expected one that succeeds")
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character extraction burst benchmark")
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--characters", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.3, help="Simulated extraction latency in seconds")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.callers, args.characters, args.latency)))
@@ -0,0 +1,71 @@
+"""
+Benchmark: character context extraction across workers and restarts.
+
+Two ``BibleCharacter`` agents stand in for two uvicorn workers sharing one
+SQLite file. The first extracts a set of characters; the second starts cold
+and asks for the same characters (spelled differently). Reports extraction
+calls per worker and lookup latency for the LLM, database and memory tiers.
+
+    python -m benchmarks.character_context_store_bench --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, List
+from benchmarks.fake_gateway import FakeLLMGateway
+from benchmarks.feeling_fused_bench import percentile
+from agents.bible_character import BibleCharacter
+from database import build_engine
+from services.character_context_store import CharacterContextStore
+
+CHARACTERS = ["Moisés", "David", "Pablo", "Pedro", "María", "Abraham", "Elías", "Rut", "Ester", "Josué"]
+
+def respond(messages: List[Dict[str, str]], params: Dict) -> str:
+    return (
+        "Biographical Information:\nÉpoca y lugar: Antiguo Israel\nOcupación principal: Pastor\n"
+        "Key Events:\nLlamado de Dios\nCharacter Traits:\nRasgos principales: Fiel\n"
+        "Legacy:\nImportancia bíblica: Líder del pueblo\nBible Verses:\nÉxodo 3:10"
+    )
+
+async def lookups(agent: BibleCharacter, names: List[str]) -> List[float]:
+    latencies = []
+    for name in names:
+        start = time.perf_counter()
+        await agent.get_character_context(name)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def report(label: str, gateway: FakeLLMGateway, latencies: List[float]):
+    print(
+        f"{label:<22} extraction calls={gateway.calls:<3} "
+        f"p50={percentile(latencies, 50) * 1000:8.3f}ms p99={percentile(latencies, 99) * 1000:8.3f}ms"
+    )
+
+async def main(latency: float):
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_engine(f"sqlite:///{os.path.join(directory, 'contexts.db')}")
+
+        first = FakeLLMGateway(respond, latency=latency)
+        worker = BibleCharacter(first, context_store=CharacterContextStore(engine=engine))
+        await worker.context_store.initialize()
+        report("worker 1, cold", first, await lookups(worker, CHARACTERS))
+        first.calls = 0
+        report("worker 1, warm", first, await lookups(worker, CHARACTERS))
+
+        second = FakeLLMGateway(respond, latency=latency)
+        restarted = BibleCharacter(second, context_store=CharacterContextStore(engine=engine))
+        await restarted.context_store.initialize()
+        respelled = [name.upper() if index % 2 else name.lower() for index, name in enumerate(CHARACTERS)]
+        report("worker 2, cold (db)", second, await lookups(restarted, respelled))
+        report("worker 2, warm", second, await lookups(restarted, CHARACTERS))
+        print(f"worker 2 store: {restarted.context_store.stats()}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character context store benchmark")
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated extraction latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency))
@@ -0,0 +1,99 @@
+"""
+Benchmark: prompt size and latency over a long character conversation.
+
+Runs ``--turns`` chat turns with a mix of short and very long user messages
+through ``BibleCharacter.chat_with_character``. Summary calls are made slower
+than chat calls to show that they stay off the request path. Reports chat
+prompt tokens per turn for the previous 16-message window and for the token
+budget with a running summary, plus request latency and summary calls.
+
+    python -m benchmarks.character_memory_bench --turns 60 --budget 1200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+from agents.bible_character import BibleCharacter, CharacterContext
+from agents.prompts.bible_character_agent import MEMORY_SUMMARY_SYSTEM_PROMPT
+from benchmarks.character_parser_bench import CHARACTERS
+from benchmarks.character_prompt_bench import REPLY
+from benchmarks.fake_gateway import FakeLLMGateway
+from benchmarks.feeling_fused_bench import percentile
+from core.tokens import count_message_tokens, preload_encoding
+
+SUMMARY = (
+    "El usuario contó que tiene miedo de hablar en público en su nueva iglesia y que discutió con su "
+    "hermano. Moisés le habló de la zarza ardiente y de Éxodo 4:12, y le animó a dar un paso de fe."
+)
+SENTENCE = "Me cuesta mucho confiar en Dios cuando las cosas en el trabajo y en casa salen mal. "
+
+class SummaryGateway(FakeLLMGateway):
+    """Fake gateway whose summary calls are slower than chat calls and which records prompt sizes."""
+
+    def __init__(self, latency: float, summary_latency: float):
+        super().__init__(self.respond, latency=latency)
+        self.summary_latency = summary_latency
+        self.summary_calls = 0
+        self.chat_prompt_tokens: List[int] = []
+
+    def respond(self, messages: List[Dict[str, str]], params: Dict) -> str:
+        return SUMMARY if messages[0]["content"] == MEMORY_SUMMARY_SYSTEM_PROMPT else REPLY
+
+    async def complete(self, messages: List[Dict[str, str]], model: str = "stub", **params):
+        if messages[0]["content"] == MEMORY_SUMMARY_SYSTEM_PROMPT:
+            self.summary_calls += 1
+            await asyncio.sleep(self.summary_latency)
+        else:
+            self.chat_prompt_tokens.append(count_message_tokens(messages))
+        return await super().complete(messages, model, **params)
+
+async def main(turns: int, budget: int, latency: float, summary_latency: float):
+    exact = await preload_encoding()
+    rng = random.Random(3)
+    gateway = SummaryGateway(latency, summary_latency)
+    agent = BibleCharacter(gateway, memory_token_budget=budget)
+    context = CharacterContext(name="Moisés", **CHARACTERS["Moisés"], extracted_at=datetime.utcnow())
+    await agent.context_store.set("Moisés", context)
+
+    window: deque = deque(maxlen=16)
+    window_tokens: List[int] = []
+    latencies: List[float] = []
+    for turn in range(turns):
+        message = SENTENCE * (rng.choice([1, 1, 2, 3, 25]))
+        start = time.perf_counter()
+        await agent.chat_with_character("bench", "Moisés", message)
+        latencies.append(time.perf_counter() - start)
+
+        # What the previous fixed 16-message window would have sent this turn
+        window.append({"role": "user", "content": message})
+        window_tokens.append(count_message_tokens([{"role": "system", "content": context.prompt_prefix}, *window]))
+        window.append({"role": "assistant", "content": REPLY})
+
+    await asyncio.gather(*agent._background_tasks)
+    memory = agent.get_or_create_memory("bench", "Moisés")
+    budgeted = gateway.chat_prompt_tokens
+    print(f"{turns} turns, budget={budget} tokens, {'exact' if exact else 'estimated'} token counts")
+    for label, tokens in (("16-message window", window_tokens), ("token budget", budgeted)):
+        print(
+            f"{label:<18} prompt tokens p50={percentile(tokens, 50):6.0f} max={max(tokens):6.0f} "
+            f"last 10 turns max={max(tokens[-10:]):6.0f}"
+        )
+    print(
+        f"request latency p50={percentile(latencies, 50) * 1000:.1f}ms max={max(latencies) * 1000:.1f}ms "
+        f"(chat {latency * 1000:.0f}ms, summary {summary_latency * 1000:.0f}ms) "
+        f"summary calls={gateway.summary_calls} kept messages={len(memory.messages)} "
+        f"history tokens={memory.history_tokens}"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character memory benchmark")
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--budget", type=int, default=1200)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated chat latency in seconds")
+    parser.add_argument("--summary-latency", type=float, default=0.2, help="Simulated summary latency in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.budget, args.latency, args.summary_latency))
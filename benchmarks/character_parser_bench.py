@@ -0,0 +1,202 @@
+"""
+Benchmark: character context parsers.
+
+Compares the previous five ``split``-based section parsers with the one-pass
+tokenizer and JSON validation of ``agents.character_parser`` on realistic
+Chain 1 responses in three shapes: the English headings the old parsers were
+written for, the Spanish headings ``CHARACTER_INFO_TEMPLATE`` actually asks
+for, and JSON mode. Reports parse time and how many sections came back as
+"Información no disponible" placeholders or failed validation.
+
+    python -m benchmarks.character_parser_bench --iterations 2000
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+from agents.character_parser import CharacterParseError, parse_character_response
+
+CHARACTERS: Dict[str, Dict] = {
+    "Moisés": {
+        "biographical_info": {
+            "Época y lugar": "Siglo XIII a.C., Egipto y el desierto del Sinaí",
+            "Antecedentes familiares": "Hijo de Amram y Jocabed, de la tribu de Leví; hermano de Aarón y María",
+            "Ocupación principal": "Pastor en Madián y luego libertador y legislador de Israel"
+        },
+        "key_events": [
+            "Rescatado de las aguas del Nilo: crece en la corte del faraón",
+            "La zarza ardiente: Dios lo llama a liberar a su pueblo",
+            "Las diez plagas: confronta al faraón con la palabra de Dios",
+            "El cruce del mar Rojo: guía a Israel fuera de Egipto",
+            "La entrega de la Ley en el Sinaí: recibe los diez mandamientos",
+            "Las aguas de Meriba: su desobediencia le impide entrar a Canaán"
+        ],
+        "character_traits": {
+            "Rasgos principales": "Humilde, perseverante, intercesor",
+            "Fortalezas": "Fidelidad, paciencia con un pueblo difícil, intimidad con Dios",
+            "Debilidades": "Ira impulsiva, inseguridad al hablar en público",
+            "Relación con Dios": "Hablaba con Dios cara a cara, como con un amigo"
+        },
+        "legacy": {
+            "Influencia histórica": "Fundador de la identidad nacional y religiosa de Israel",
+            "Lecciones principales": "Dios usa a personas imperfectas que confían en Él",
+            "Importancia bíblica": "Mediador del pacto y figura que anticipa a Cristo"
+        },
+        "bible_verses": [
+            "Éxodo 3:10 - el llamado en la zarza ardiente",
+            "Éxodo 14:13 - estad firmes y ved la salvación de Jehová",
+            "Éxodo 33:11 - hablaba Jehová a Moisés cara a cara",
+            "Números 12:3 - el hombre más manso de la tierra",
+            "Deuteronomio 34:10 - nunca más se levantó profeta como Moisés",
+            "Hebreos 11:24-26 - rehusó llamarse hijo de la hija de Faraón"
+        ]
+    },
+    "Rut": {
+        "biographical_info": {
+            "Época y lugar": "Período de los jueces, Moab y Belén",
+            "Antecedentes familiares": "Moabita, nuera de Noemí, viuda de Mahlón",
+            "Ocupación principal": "Espigadora en los campos de Booz"
+        },
+        "key_events": [
+            "La muerte de su esposo en Moab: queda viuda y sin hijos",
+            "Su decisión de seguir a Noemí: tu pueblo será mi pueblo",
+            "El trabajo en los campos de Booz: encuentra favor",
+            "La noche en la era: pide la protección del pariente redentor",
+            "Su matrimonio con Booz: se convierte en bisabuela de David"
+        ],
+        "character_traits": {
+            "Rasgos principales": "Leal, trabajadora, valiente",
+            "Fortalezas": "Fidelidad en la adversidad, humildad",
+            "Debilidades": "Vulnerabilidad como extranjera y viuda",
+            "Relación con Dios": "Se refugia bajo las alas del Dios de Israel"
+        },
+        "legacy": {
+            "Influencia histórica": "Antepasada del rey David",
+            "Lecciones principales": "La lealtad y la bondad abren camino a la redención",
+            "Importancia bíblica": "Una extranjera incluida en la genealogía de Jesús"
+        },
+        "bible_verses": [
+            "Rut 1:16 - tu pueblo será mi pueblo, y tu Dios mi Dios",
+            "Rut 2:12 - bajo cuyas alas has venido a refugiarte",
+            "Rut 3:11 - todos saben que eres mujer virtuosa",
+            "Rut 4:13 - Booz tomó a Rut y ella fue su mujer",
+            "Rut 4:17 - Obed, padre de Isaí, padre de David",
+            "Mateo 1:5 - Booz engendró de Rut a Obed"
+        ]
+    }
+}
+
+ENGLISH_HEADINGS = ("Biographical Information", "Key Events", "Character Traits", "Legacy", "Bible Verses")
+SPANISH_HEADINGS = (
+    "📊 **INFORMACIÓN BIOGRÁFICA ESENCIAL:**",
+    "⚡ **EVENTOS TRANSFORMADORES (mínimo 5):**",
+    "🧠 **PERFIL PSICOLÓGICO COMPLETO:**",
+    "🌟 **LEGADO Y RELEVANCIA:**",
+    "📖 **REFERENCIAS BÍBLICAS CLAVE (mínimo 6):**"
+)
+FIELDS = ("biographical_info", "key_events", "character_traits", "legacy", "bible_verses")
+PLACEHOLDER = "Información no disponible"
+
+def render_text(data: Dict, headings) -> str:
+    """Render a response the way the model writes sectioned text."""
+    english = headings is ENGLISH_HEADINGS
+    lines = [f"Análisis de personaje:\n"]
+    for heading, field in zip(headings, FIELDS):
+        lines.append(f"{heading}:" if english else heading)
+        value = data[field]
+        if isinstance(value, dict):
+            lines.extend(f"- **{key}:** {text}" for key, text in value.items())
+        else:
+            for index, item in enumerate(value, start=1):
+                title, _, detail = item.replace(" - ", ": ", 1).partition(": ")
+                lines.append(f"**{item}**" if english else f"{index}. **{title}:** {detail}")
+        lines.append("")
+    return "\n".join(lines)
+
+# The parsers BibleCharacter used before agents.character_parser, kept verbatim in behaviour
+
+def _legacy_dict(response: str, start: str, end: str, fallback: Dict[str, str]) -> Dict[str, str]:
+    try:
+        section = response.split(start)[1].split(end)[0].strip()
+        result = {}
+        for item in [item.strip() for item in section.split("\n") if item.strip()]:
+            if ":" in item:
+                key, value = item.split(":", 1)
+                result[key.replace("*", "").replace("-", "").strip()] = value.strip()
+        return result
+    except Exception:
+        return fallback
+
+def _legacy_list(response: str, start: str, end) -> List[str]:
+    try:
+        section = response.split(start)[1]
+        section = (section.split(end)[0] if end else section).strip()
+        items = []
+        for line in section.split("\n"):
+            line = line.strip()
+            if line and not line.startswith("-") and not line.startswith("###"):
+                item = line.replace("*", "").strip()
+                if item:
+                    items.append(item)
+        return items
+    except Exception:
+        return [PLACEHOLDER]
+
+def legacy_parse(response: str) -> Dict:
+    return {
+        "biographical_info": _legacy_dict(response, "Biographical Information:", "Key Events:", {"Época y lugar": PLACEHOLDER}),
+        "key_events": _legacy_list(response, "Key Events:", "Character Traits:"),
+        "character_traits": _legacy_dict(response, "Character Traits:", "Legacy:", {"Rasgos principales": PLACEHOLDER}),
+        "legacy": _legacy_dict(response, "Legacy:", "Bible Verses:", {"Importancia bíblica": PLACEHOLDER}),
+        "bible_verses": _legacy_list(response, "Bible Verses:", None)
+    }
+
+def new_parse(response: str) -> Dict:
+    return parse_character_response(response).model_dump()
+
+def placeholders(result: Dict) -> int:
+    return sum(
+        1 for value in result.values()
+        if (PLACEHOLDER in value.values() if isinstance(value, dict) else PLACEHOLDER in value)
+    )
+
+def run(parser: Callable[[str], Dict], responses: List[str], iterations: int):
+    failures = missing = 0
+    for response in responses:
+        try:
+            missing += placeholders(parser(response))
+        except CharacterParseError:
+            failures += 1
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for response in responses:
+            try:
+                parser(response)
+            except CharacterParseError:
+                pass
+    per_parse = (time.perf_counter() - start) / (iterations * len(responses))
+    return per_parse, missing, failures
+
+def main(iterations: int):
+    shapes = {
+        "english headings": [render_text(data, ENGLISH_HEADINGS) for data in CHARACTERS.values()],
+        "template headings": [render_text(data, SPANISH_HEADINGS) for data in CHARACTERS.values()],
+        "json mode": [json.dumps(data, ensure_ascii=False) for data in CHARACTERS.values()]
+    }
+    for shape, responses in shapes.items():
+        size = sum(len(response) for response in responses) // len(responses)
+        for label, parser in (("legacy splits", legacy_parse), ("character_parser", new_parse)):
+            if label == "legacy splits" and shape == "json mode":
+                continue
+            per_parse, missing, failures = run(parser, responses, iterations)
+            print(
+                f"{shape:<18} {label:<17} {per_parse * 1e6:8.1f}us/parse  "
+                f"placeholder sections={missing:<3} rejected={failures}  ({size} chars)"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character parser benchmark")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.iterations)
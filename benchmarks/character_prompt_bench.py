@@ -0,0 +1,121 @@
+"""
+Benchmark: chat prompt build time and prompt-cache friendliness.
+
+Replays a multi-turn conversation with one character and builds the Chain 2
+request for every turn in two layouts:
+
+- single message: ``get_response_prompt`` re-renders the context and the whole
+  template each turn, with the history in the middle of the prompt;
+- prefix: the character's precompiled system prefix followed by the history
+  as chat messages (what ``BibleCharacter`` sends).
+
+For each layout it reports build time per turn, input tokens per turn and how
+many of them repeat the previous turn's request byte for byte (the prefix a
+provider-side prompt cache can serve; OpenAI caches prefixes of at least 1024
+tokens in 128-token steps).
+
+    python -m benchmarks.character_prompt_bench --turns 12 --repeat 200
+"""
+
+import argparse
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List
+from agents.bible_character import BibleCharacter, CharacterContext, ConversationMemory
+from agents.prompts.bible_character_agent import get_response_prompt, get_system_prompt
+from benchmarks.character_parser_bench import CHARACTERS
+from core.tokens import count_message_tokens, count_tokens, load_encoding
+
+MESSAGES = [
+    "Hola Moisés, ¿cómo supiste que Dios te estaba llamando?",
+    "Yo también siento miedo de hablar en público, ¿qué hiciste tú?",
+    "¿Cómo mantuviste la paciencia con el pueblo en el desierto?",
+    "A veces me enojo rápido como tú en Meriba, ¿cómo lo superaste?",
+    "¿Qué aprendiste al no poder entrar a la tierra prometida?",
+    "¿Cómo era hablar con Dios cara a cara?",
+]
+REPLY = (
+    "Hijo mío, también yo temblé ante la zarza que ardía sin consumirse. Le dije al Señor que era torpe "
+    "de lengua, y Él me respondió que estaría con mi boca. No esperes sentirte capaz para obedecer: "
+    "da el primer paso y deja que Él haga lo que tú no puedes. ¿Qué paso darás hoy con fe?"
+)
+
+def new_context() -> CharacterContext:
+    return CharacterContext(name="Moisés", **CHARACTERS["Moisés"], extracted_at=datetime.utcnow())
+
+def new_memory() -> ConversationMemory:
+    return ConversationMemory(
+        user_id="bench", character_name="Moisés", messages=deque(maxlen=16),
+        created_at=datetime.utcnow(), last_updated=datetime.utcnow()
+    )
+
+def single_message(agent: BibleCharacter, context: CharacterContext, memory: ConversationMemory, message: str):
+    return [
+        {"role": "system", "content": get_system_prompt()},
+        {"role": "user", "content": get_response_prompt(
+            context.name, context.to_dict(), memory.get_formatted_history(), message
+        )}
+    ]
+
+def prefixed(agent: BibleCharacter, context: CharacterContext, memory: ConversationMemory, message: str):
+    return agent._build_response_messages(context, memory, message)
+
+def serialize(messages: List[Dict[str, str]]) -> str:
+    return "".join(f"<|{message['role']}|>{message['content']}" for message in messages)
+
+def common_prefix(a: str, b: str) -> int:
+    length = min(len(a), len(b))
+    index = 0
+    while index < length and a[index] == b[index]:
+        index += 1
+    return index
+
+def provider_cached(tokens: int) -> int:
+    return 0 if tokens < 1024 else 1024 + (tokens - 1024) // 128 * 128
+
+def run(build: Callable, turns: int, repeat: int) -> Dict[str, float]:
+    agent = BibleCharacter(llm_client=None)
+    build_seconds = 0.0
+    input_tokens = shared_tokens = cached_tokens = 0
+    for iteration in range(repeat):
+        context, memory = new_context(), new_memory()
+        previous = ""
+        for turn in range(turns):
+            message = MESSAGES[turn % len(MESSAGES)]
+            start = time.perf_counter()
+            messages = build(agent, context, memory, message)
+            build_seconds += time.perf_counter() - start
+            memory.add_message("user", message)
+            memory.add_message("assistant", REPLY)
+
+            if iteration == 0:
+                request = serialize(messages)
+                shared = count_tokens(request[:common_prefix(previous, request)]) if previous else 0
+                input_tokens += count_message_tokens(messages)
+                shared_tokens += shared
+                cached_tokens += provider_cached(shared)
+                previous = request
+    return {
+        "build_us": build_seconds / (turns * repeat) * 1e6,
+        "input": input_tokens / turns,
+        "shared": shared_tokens / turns,
+        "cached": cached_tokens / turns
+    }
+
+def main(turns: int, repeat: int):
+    print(f"{turns} turns, {'exact' if load_encoding() else 'estimated'} token counts, averages per turn")
+    for label, build in (("single message", single_message), ("prefix + history", prefixed)):
+        result = run(build, turns, repeat)
+        print(
+            f"{label:<17} build={result['build_us']:7.1f}us input={result['input']:6.0f} tokens "
+            f"repeated prefix={result['shared']:6.0f} provider-cacheable={result['cached']:6.0f} "
+            f"uncached={result['input'] - result['cached']:6.0f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character chat prompt benchmark")
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main(args.turns, args.repeat)
@@ -0,0 +1,67 @@
+"""
+In-process stand-in for ``LLMGateway`` used by the micro-benchmarks.
+
+It exposes the same ``complete`` coroutine, sleeps for a simulated upstream
+latency and answers through a pluggable responder, without any sockets.
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+from openai.types.chat import ChatCompletion
+
+Responder = Callable[[List[Dict[str, str]], Dict], str]
+
+def build_completion(content: str, model: str = "stub") -> ChatCompletion:
+    """Wrap plain text in a ChatCompletion object."""
+    return ChatCompletion.model_validate({
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    })
+
+class FakeLLMGateway:
+    """Gateway double with configurable latency and canned responses."""
+
+    def __init__(self, responder: Responder, latency: float = 0.0, jitter: float = 0.0, seed: Optional[int] = 7):
+        """
+        Args:
+            responder (Responder): Returns the completion text for (messages, params)
+            latency (float): Median simulated latency in seconds
+            jitter (float): Log-normal sigma applied around ``latency``
+            seed (Optional[int]): Seed for reproducible latency samples
+        """
+        self.responder = responder
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        if not self.latency:
+            return 0.0
+        if not self.jitter:
+            return self.latency
+        return self.latency * self._random.lognormvariate(0.0, self.jitter)
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def complete(self, messages: List[Dict[str, str]], model: str = "stub", **params) -> ChatCompletion:
+        self.calls += 1
+        delay = self.sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        return build_completion(self.responder(messages, params), model)
@@ -0,0 +1,77 @@
+"""
+Concurrency check for the feeling pipeline.
+
+Runs ``main:app`` in-process against the local stub LLM with a slow
+completion latency, keeps many ``POST /api/v1/feeling`` requests in flight
+and measures how long ``GET /test`` takes meanwhile. With the async
+pipeline ``/test`` answers in milliseconds and the whole burst finishes in
+roughly two upstream latencies (verse + devotional). Exits non-zero if
+``/test`` was delayed past ``--max-test-latency``.
+
+    python -m benchmarks.feeling_concurrency --in-flight 200 --latency 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import httpx
+from benchmarks.stub_llm_server import StubLLMServer
+
+async def main(in_flight: int, latency: float, max_test_latency: float) -> int:
+    server = StubLLMServer(latency=latency)
+    await server.start()
+    os.environ.update(
+        API_KEY="bench",
+        OPENAI_API_KEY="stub",
+        OPENAI_API_BASE=server.base_url,
+        LLM_MAX_CONNECTIONS=str(in_flight * 2),
+        # Every request sends the same message; measure the pipeline, not the semantic cache
+        FEELING_CACHE_CAPACITY="0",
+        RATE_LIMIT_ENABLED="0",
+        REQUEST_LOG_FILE=os.path.join(tempfile.mkdtemp(prefix="feeling-concurrency-"), "requests.jsonl")
+    )
+    from main import app
+
+    headers = {"X-API-Key": "bench"}
+    payload = {"feeling": "ansiedad", "text": "Estoy ansioso por mi trabajo"}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            start = time.perf_counter()
+            feelings = [
+                asyncio.create_task(client.post("/api/v1/feeling", json=payload, headers=headers))
+                for _ in range(in_flight)
+            ]
+            # Let the burst reach the upstream before probing /test
+            await asyncio.sleep(latency / 2)
+
+            probe_start = time.perf_counter()
+            probe = await client.get("/test", headers=headers)
+            test_latency = time.perf_counter() - probe_start
+
+            responses = await asyncio.gather(*feelings)
+            total = time.perf_counter() - start
+
+    await server.stop()
+
+    ok = sum(1 for response in responses if response.status_code == 200)
+    print(f"feeling requests: {ok}/{in_flight} ok in {total:.2f}s (upstream latency {latency:.2f}s per call)")
+    print(f"/test status={probe.status_code} latency={test_latency * 1000:.1f}ms while feelings were in flight")
+
+    if probe.status_code != 200 or test_latency > max_test_latency or ok != in_flight:
+        print("FAIL: event loop was blocked or feeling requests failed")
+        return 1
+    print("OK")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feeling pipeline concurrency check")
+    parser.add_argument("--in-flight", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--max-test-latency", type=float, default=0.1)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.in_flight, args.latency, args.max_test_latency)))
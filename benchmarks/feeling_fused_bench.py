@@ -0,0 +1,102 @@
+"""
+Benchmark: fused (single structured completion) versus chained feeling pipeline.
+
+Drives ``FeelingAgent.process_message`` and ``FeelingService.process_feeling``
+against an in-process stub LLM with log-normal latency and reports p50/p99
+end-to-end latency and upstream calls per request for both modes.
+
+    python -m benchmarks.feeling_fused_bench --requests 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+from agents.feeling_agent import FeelingAgent
+from benchmarks.fake_gateway import FakeLLMGateway
+from services.feeling import FeelingService
+
+FUSED_PAYLOAD = {
+    "analisis": {
+        "sentimiento_primario": "ansiedad",
+        "sentimientos_secundarios": ["miedo", "cansancio"],
+        "intensidad": "media",
+        "necesidad_emocional": "consuelo",
+        "tono_recomendado": "cálido y sereno",
+        "urgencia": "gradual"
+    },
+    "versiculo_referencia": "Filipenses 4:6",
+    "versiculo_texto": "Por nada estéis afanosos; sino sean notorias vuestras peticiones delante de Dios.",
+    "devocional": "Entiendo que el trabajo pesa sobre ti. Dios te invita a presentarle cada preocupación en oración, "
+                  "y su paz guardará tu corazón. ¿Qué preocupación puedes entregarle hoy?"
+}
+
+def respond(messages: List[Dict[str, str]], params: Dict) -> str:
+    if "response_format" in params:
+        return json.dumps(FUSED_PAYLOAD, ensure_ascii=False)
+    prompt = messages[-1]["content"]
+    if "ANÁLISIS EMOCIONAL" in prompt:
+        return json.dumps(FUSED_PAYLOAD["analisis"], ensure_ascii=False)
+    # End with a period so FeelingService's completeness check does not retry
+    return f"{FUSED_PAYLOAD['versiculo_referencia']} - {FUSED_PAYLOAD['devocional']} Amén."
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+async def measure(requests: int, concurrency: int, call: Callable[[int], Awaitable[None]]) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(index)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return latencies
+
+async def main(requests: int, concurrency: int, latency: float, jitter: float):
+    for fused in (False, True):
+        mode = "fused" if fused else "chain"
+
+        gateway = FakeLLMGateway(respond, latency=latency, jitter=jitter)
+        agent = FeelingAgent(gateway, fused=fused)
+        agent_latencies = await measure(
+            requests, concurrency,
+            lambda index: agent.process_message(f"conv-{index}", "Estoy ansioso por mi trabajo")
+        )
+        agent_calls = gateway.calls / requests
+
+        gateway = FakeLLMGateway(respond, latency=latency, jitter=jitter)
+        service = FeelingService(gateway, fused=fused)
+        # Every request sends the same message; measure the pipeline, not the semantic cache
+        service.semantic_cache = None
+        service_latencies = await measure(
+            requests, concurrency,
+            lambda index: service.process_feeling(f"conv-{index}", "ansiedad", "Estoy ansioso por mi trabajo")
+        )
+        service_calls = gateway.calls / requests
+
+        for name, latencies, calls in (
+            ("FeelingAgent", agent_latencies, agent_calls),
+            ("FeelingService", service_latencies, service_calls)
+        ):
+            print(
+                f"{name:<15} {mode:<6} calls/req={calls:.1f} "
+                f"mean={statistics.mean(latencies) * 1000:7.1f}ms "
+                f"p50={percentile(latencies, 50) * 1000:7.1f}ms "
+                f"p99={percentile(latencies, 99) * 1000:7.1f}ms"
+            )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fused vs chained feeling pipeline")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Median stub latency per call in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma of the stub latency")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency, args.jitter))
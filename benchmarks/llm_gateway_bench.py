@@ -0,0 +1,94 @@
+"""
+Benchmark: per-call OpenAI clients versus the shared pooled LLM gateway.
+
+Starts a local OpenAI-compatible stub and issues the same number of chat
+completions twice: once constructing a new client per call (the previous
+behaviour of the agents) and once through a single ``LLMGateway``. Reports
+mean/p50/p99 latency per call and the number of TCP connections the stub
+accepted.
+
+    python -m benchmarks.llm_gateway_bench --calls 200 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+from openai import AsyncOpenAI
+from core.llm_gateway import LLMGateway
+from benchmarks.stub_llm_server import StubLLMServer
+
+MESSAGES = [
+    {"role": "system", "content": "Eres un asistente bíblico."},
+    {"role": "user", "content": "Dame un versículo sobre la paz."}
+]
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run(calls: int, concurrency: int, call: Callable[[], Awaitable[None]]) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+def report(name: str, latencies: List[float], server: StubLLMServer):
+    print(
+        f"{name:<16} mean={statistics.mean(latencies) * 1000:7.2f}ms "
+        f"p50={percentile(latencies, 50) * 1000:7.2f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.2f}ms "
+        f"connections_opened={server.connections_opened} "
+        f"still_open={server.connections_open}"
+    )
+
+async def main(calls: int, concurrency: int, latency: float):
+    # Per-call clients, never closed, as the agents used to do
+    server = StubLLMServer(latency=latency)
+    await server.start()
+    leaked = []
+
+    async def per_call():
+        client = AsyncOpenAI(api_key="stub", base_url=server.base_url)
+        leaked.append(client)
+        await client.chat.completions.create(model="stub", messages=MESSAGES)
+
+    report("per-call client", await run(calls, concurrency, per_call), server)
+    for client in leaked:
+        await client.close()
+    await server.stop()
+
+    # One pooled gateway for every call
+    server = StubLLMServer(latency=latency)
+    await server.start()
+    gateway = LLMGateway(
+        api_key="stub",
+        base_url=server.base_url,
+        max_keepalive_connections=concurrency,
+        warm_connections=concurrency
+    )
+    await gateway.start()
+
+    async def pooled():
+        await gateway.complete(model="stub", messages=MESSAGES)
+
+    report("shared gateway", await run(calls, concurrency, pooled), server)
+    await gateway.close()
+    await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub latency per completion in seconds")
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.concurrency, args.latency))
@@ -0,0 +1,443 @@
+"""
+End-to-end load benchmark.
+
+Starts ``main:app`` under uvicorn against the in-process stub LLM. For each
+scenario it keeps ``concurrency`` clients sending requests back to back for
+``--duration`` seconds, once per step of ``--concurrency``. Each step reports:
+
+- requests per second;
+- p50/p95/p99 latency and time to first byte, measured by the client;
+- the app's event loop lag, read from its /metrics (sampled every 10ms);
+- the app's resident memory, also read from /metrics.
+
+Scenarios:
+
+- chat: POST /bible/characters/chat, one conversation per client
+- chat_stream: the same with ``?stream=true``
+- feeling: POST /api/v1/feeling
+- petition: POST /prayers/petition
+- verses: POST /verses/explain
+
+The stub answers every prompt in the shape its caller parses. Its latency
+follows ``--distribution`` around ``--latency``. Streams send one chunk per
+word, ``--token-delay`` apart, and ``--error-rate`` injects upstream 500s.
+The response caches (feeling semantic cache, verse explanations) are off, so
+every request reaches the stub; pass --caches to keep them. Character
+contexts are still extracted once per character, during the warm-up.
+
+Results are written as JSON to ``--output``. They are checked against
+``--thresholds`` (benchmarks/load_thresholds.json, calibrated for the default
+stub settings):
+
+- max_error_rate, max_p99_ms, max_loop_lag_ms and max_rss_mb apply to every step;
+- min_rps applies to the scenario's best step.
+
+With ``--baseline`` each step is also compared with the same step of an
+earlier results file. It fails when RPS fell, or p99 rose, by more than
+``--tolerance``. The exit status is 1 when any check fails.
+
+Nothing leaves the machine. The stub listens on 127.0.0.1, and the app's
+database, request log and traces go to a temporary directory.
+
+    python -m benchmarks.load_bench --concurrency 1,8,32 --duration 10
+    python -m benchmarks.load_bench --scenarios chat,feeling --baseline load_results.json --output after.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import httpx
+from agents.prompts.bible_character_agent import CHARACTER_INFO_TEMPLATE
+from agents.prompts.prayer_petition_agent import PRAYER_PETITION_SYSTEM_PROMPT
+from benchmarks.character_context_store_bench import CHARACTERS
+from benchmarks.feeling_fused_bench import FUSED_PAYLOAD, percentile
+from benchmarks.session_store_workers import HEADERS, free_port, wait_ready
+from benchmarks.stub_llm_server import DISTRIBUTIONS, StubLLMServer
+
+THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_thresholds.json")
+
+CHARACTER_PAYLOAD = {
+    "biographical_info": {
+        "Época y lugar": "Egipto y el desierto de Sinaí, siglo XIII a.C.",
+        "Antecedentes familiares": "Hijo de Amram y Jocabed, criado en la casa del faraón",
+        "Ocupación principal": "Pastor, profeta y legislador de Israel"
+    },
+    "key_events": ["La zarza ardiente", "Las plagas de Egipto", "El cruce del mar Rojo", "La entrega de la Ley"],
+    "character_traits": {
+        "Rasgos principales": "Humilde y perseverante",
+        "Fortalezas": "Intercesor fiel ante Dios por su pueblo",
+        "Debilidades": "Ira e inseguridad al hablar",
+        "Relación con Dios": "Hablaba con Dios cara a cara"
+    },
+    "legacy": {
+        "Influencia histórica": "Fundador de la identidad de Israel como pueblo",
+        "Lecciones principales": "Dios capacita a quien llama",
+        "Importancia bíblica": "Mediador del pacto del Sinaí"
+    },
+    "bible_verses": ["Éxodo 3:10", "Números 12:3", "Deuteronomio 34:10"]
+}
+
+PETITION_PAYLOAD = {
+    "bible_verses": ["Filipenses 4:6-7", "Salmos 55:22"],
+    "prayer": "Padre, pongo en tus manos esta preocupación y confío en que tu paz guardará mi corazón. Amén.",
+    "explanation": "Estos versículos invitan a entregar las cargas a Dios en oración y a descansar en su cuidado."
+}
+
+# Ends with a period so FeelingService's completeness check accepts it in chained mode
+REPLY = (
+    "Hijo mío, en el desierto aprendí que Dios no abandona a quien camina con Él. Cuando el mar se "
+    "levantaba delante de nosotros y el ejército nos seguía, no vi salida alguna, pero el Señor abrió "
+    "camino donde no lo había. Confía en Él hoy como yo confié entonces, un paso a la vez, y verás "
+    "que su provisión llega cada mañana, como el maná que nunca faltó."
+)
+
+FEELINGS = [
+    ("ansiedad", "Estoy ansioso por mi trabajo"),
+    ("tristeza", "Extraño a mi madre que falleció"),
+    ("miedo", "Tengo miedo de los resultados médicos"),
+    ("soledad", "Me mudé a otra ciudad y no conozco a nadie"),
+    ("gratitud", "Hoy conseguí el empleo que esperaba")
+]
+
+PETITIONS = [
+    "Pido por la salud de mi padre que está en el hospital",
+    "Necesito sabiduría para una decisión importante en mi familia",
+    "Oro por paz en mi hogar y por mis hijos",
+    "Pido fortaleza para terminar mis estudios"
+]
+
+VERSES = [["Juan 3:16"], ["Salmos 23:1", "Filipenses 4:13"], ["Josué 1:9"], ["Romanos 8:28", "Isaías 41:10"]]
+
+_EXTRACTION_PROMPT = CHARACTER_INFO_TEMPLATE.split("{character_name}")[0]
+
+def respond(request: Dict) -> str:
+    """Answer each prompt in the shape its caller parses."""
+    schema = (request.get("response_format") or {}).get("json_schema", {}).get("name")
+    messages = request.get("messages") or [{}]
+    # The character parser takes JSON in text mode too
+    if schema == "character_context" or messages[-1].get("content", "").startswith(_EXTRACTION_PROMPT):
+        return json.dumps(CHARACTER_PAYLOAD, ensure_ascii=False)
+    if schema == "feeling_response":
+        return json.dumps(FUSED_PAYLOAD, ensure_ascii=False)
+    if messages[0].get("content") == PRAYER_PETITION_SYSTEM_PROMPT:
+        return json.dumps(PETITION_PAYLOAD, ensure_ascii=False)
+    return REPLY
+
+class Scenario(NamedTuple):
+    name: str
+    path: str
+    # (client, request index) -> JSON body
+    body: Callable[[int, int], Any]
+    stream: bool = False
+
+SCENARIOS = [
+    Scenario("chat", "/bible/characters/chat", lambda client, index: {
+        "user_id": f"load-{client}",
+        "character_name": CHARACTERS[client % len(CHARACTERS)],
+        "message": f"Pregunta {index + 1}: ¿cómo confiaste en Dios en los momentos difíciles?"
+    }),
+    Scenario("chat_stream", "/bible/characters/chat?stream=true", lambda client, index: {
+        "user_id": f"load-stream-{client}",
+        "character_name": CHARACTERS[client % len(CHARACTERS)],
+        "message": f"Pregunta {index + 1}: ¿qué aprendiste de tus errores?"
+    }, stream=True),
+    Scenario("feeling", "/api/v1/feeling", lambda client, index: {
+        "feeling": FEELINGS[index % len(FEELINGS)][0], "text": FEELINGS[index % len(FEELINGS)][1]
+    }),
+    Scenario("petition", "/prayers/petition", lambda client, index: {"petition": PETITIONS[index % len(PETITIONS)]}),
+    Scenario("verses", "/verses/explain", lambda client, index: {"verses": VERSES[(client + index) % len(VERSES)]})
+]
+
+class Sample(NamedTuple):
+    latency: float
+    ttfb: float
+    ok: bool
+
+async def send(client: httpx.AsyncClient, url: str, scenario: Scenario, client_id: int, index: int) -> Sample:
+    start = time.perf_counter()
+    first = None
+    body = b""
+    try:
+        async with client.stream("POST", url + scenario.path, json=scenario.body(client_id, index), headers=HEADERS) as response:
+            async for chunk in response.aiter_raw():
+                if first is None:
+                    first = time.perf_counter()
+                body += chunk
+            status = response.status_code
+    except httpx.HTTPError:
+        status = 0
+    end = time.perf_counter()
+    # Streams report failures after the 200 as an error event
+    ok = status == 200 and not (scenario.stream and b"event: error" in body)
+    return Sample(end - start, (first or end) - start, ok)
+
+async def drive(client: httpx.AsyncClient, url: str, scenario: Scenario, concurrency: int, duration: float) -> Tuple[List[Sample], float]:
+    """Keep ``concurrency`` clients busy for ``duration`` seconds; returns the samples and the elapsed time."""
+    samples: List[Sample] = []
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker(client_id: int):
+        index = 0
+        while time.perf_counter() < deadline:
+            samples.append(await send(client, url, scenario, client_id, index))
+            index += 1
+
+    await asyncio.gather(*(worker(client_id) for client_id in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$', re.MULTILINE)
+
+def parse_metrics(text: str) -> Dict[Tuple[str, str], float]:
+    """Map (name, labels) to value for every sample of a Prometheus exposition."""
+    return {(name, labels or ""): float(value) for name, labels, value in _SAMPLE.findall(text)}
+
+def lag_buckets(samples: Dict[Tuple[str, str], float]) -> List[Tuple[float, float]]:
+    """Cumulative ``event_loop_lag_seconds`` buckets as (upper bound, count), in bound order."""
+    buckets = []
+    for (name, labels), value in samples.items():
+        if name == "event_loop_lag_seconds_bucket":
+            bound = labels.split('le="', 1)[1].rstrip('"')
+            buckets.append((math.inf if bound == "+Inf" else float(bound), value))
+    return sorted(buckets)
+
+def lag_quantile(before: List[Tuple[float, float]], after: List[Tuple[float, float]], quantile: float) -> Optional[float]:
+    """
+    Upper bound in milliseconds of the bucket holding a quantile of the lag samples taken between two scrapes.
+
+    Returns:
+        Optional[float]: None if it falls in the +Inf bucket, 0 if there were no samples
+    """
+    deltas = [(bound, count - previous) for (bound, count), (_, previous) in zip(after, before)]
+    total = deltas[-1][1] if deltas else 0
+    if not total:
+        return 0.0
+    for bound, cumulative in deltas:
+        if cumulative >= quantile * total:
+            return None if bound == math.inf else bound * 1000
+    return None
+
+def memory_mb(samples: Dict[Tuple[str, str], float]) -> Tuple[Optional[float], Optional[float]]:
+    """Current and peak resident memory of the app in MiB; current is None where the app cannot read it."""
+    current = samples.get(("process_resident_memory_bytes", ""), math.nan)
+    peak = samples.get(("process_max_resident_memory_bytes", ""), math.nan)
+    return (
+        None if math.isnan(current) else round(current / 2 ** 20, 1),
+        None if math.isnan(peak) else round(peak / 2 ** 20, 1)
+    )
+
+def percentiles(samples: List[float], pcts: Tuple[int, ...]) -> Dict[str, Optional[float]]:
+    """Rounded ``p50``-style percentiles, None when every request failed."""
+    return {f"p{pct}": round(percentile(samples, pct), 1) if samples else None for pct in pcts}
+
+async def scrape(client: httpx.AsyncClient, url: str) -> Dict[Tuple[str, str], float]:
+    response = await client.get(f"{url}/metrics")
+    response.raise_for_status()
+    return parse_metrics(response.text)
+
+async def run_step(
+    client: httpx.AsyncClient, url: str, server: StubLLMServer, scenario: Scenario, concurrency: int, duration: float
+) -> Dict[str, Any]:
+    before = await scrape(client, url)
+    upstream = server.requests_served
+    samples, elapsed = await drive(client, url, scenario, concurrency, duration)
+    after = await scrape(client, url)
+
+    ok = [sample for sample in samples if sample.ok]
+    latencies = [sample.latency * 1000 for sample in ok]
+    ttfbs = [sample.ttfb * 1000 for sample in ok]
+    rss, peak_rss = memory_mb(after)
+    lag_before, lag_after = lag_buckets(before), lag_buckets(after)
+    return {
+        "scenario": scenario.name,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0,
+        "rps": round(len(ok) / elapsed, 2),
+        "latency_ms": percentiles(latencies, (50, 95, 99)),
+        "ttfb_ms": percentiles(ttfbs, (50, 99)),
+        "loop_lag_ms": {"p99": lag_quantile(lag_before, lag_after, 0.99), "max": lag_quantile(lag_before, lag_after, 1.0)},
+        "rss_mb": rss,
+        "peak_rss_mb": peak_rss,
+        "upstream_calls_per_request": round((server.requests_served - upstream) / len(samples), 2) if samples else 0.0
+    }
+
+def print_step(result: Dict[str, Any]):
+    lag = result["loop_lag_ms"]["p99"]
+    rss = result["rss_mb"] if result["rss_mb"] is not None else result["peak_rss_mb"]
+    print(
+        f"{result['scenario']:<12} c={result['concurrency']:<4} {result['requests']:>6} req "
+        f"{result['errors']:>4} err {result['rps']:>8.1f} rps  "
+        f"p50 {result['latency_ms']['p50']:>7.1f}  p95 {result['latency_ms']['p95']:>7.1f}  "
+        f"p99 {result['latency_ms']['p99']:>7.1f}  ttfb p50 {result['ttfb_ms']['p50']:>7.1f} ms  "
+        f"lag p99 {'>2500' if lag is None else f'<={lag:g}'}ms  rss {rss}MiB  "
+        f"upstream {result['upstream_calls_per_request']}/req"
+    )
+
+def check_thresholds(results: List[Dict[str, Any]], thresholds: Dict[str, Any]) -> List[str]:
+    """Describe every result that breaks its scenario's thresholds."""
+    failures = []
+    for name in sorted({result["scenario"] for result in results}):
+        limits = {**thresholds.get("default", {}), **thresholds.get("scenarios", {}).get(name, {})}
+        steps = [result for result in results if result["scenario"] == name]
+        for step in steps:
+            where = f"{name} c={step['concurrency']}"
+            lag = step["loop_lag_ms"]["p99"]
+            rss = step["rss_mb"] if step["rss_mb"] is not None else step["peak_rss_mb"]
+            if "max_error_rate" in limits and step["error_rate"] > limits["max_error_rate"]:
+                failures.append(f"{where}: error rate {step['error_rate']:.2%} > {limits['max_error_rate']:.2%}")
+            if "max_p99_ms" in limits and not step["latency_ms"]["p99"] <= limits["max_p99_ms"]:
+                failures.append(f"{where}: p99 {step['latency_ms']['p99']}ms > {limits['max_p99_ms']}ms")
+            if "max_loop_lag_ms" in limits and (lag is None or lag > limits["max_loop_lag_ms"]):
+                failures.append(f"{where}: loop lag p99 {lag}ms > {limits['max_loop_lag_ms']}ms")
+            if "max_rss_mb" in limits and rss is not None and rss > limits["max_rss_mb"]:
+                failures.append(f"{where}: rss {rss}MiB > {limits['max_rss_mb']}MiB")
+        best = max(step["rps"] for step in steps)
+        if "min_rps" in limits and best < limits["min_rps"]:
+            failures.append(f"{name}: best throughput {best} rps < {limits['min_rps']} rps")
+    return failures
+
+def check_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float) -> List[str]:
+    """Describe every step that got slower than the same step of an earlier run."""
+    earlier = {(step["scenario"], step["concurrency"]): step for step in baseline}
+    failures = []
+    for step in results:
+        before = earlier.get((step["scenario"], step["concurrency"]))
+        if before is None:
+            continue
+        where = f"{step['scenario']} c={step['concurrency']}"
+        if step["rps"] < before["rps"] * (1 - tolerance):
+            failures.append(f"{where}: {step['rps']} rps, baseline {before['rps']} rps")
+        if step["latency_ms"]["p99"] > before["latency_ms"]["p99"] * (1 + tolerance):
+            failures.append(f"{where}: p99 {step['latency_ms']['p99']}ms, baseline {before['latency_ms']['p99']}ms")
+    return failures
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def main(args) -> int:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    scenarios = [scenario for scenario in SCENARIOS if scenario.name in args.scenarios]
+    steps = sorted(args.concurrency)
+
+    server = StubLLMServer(
+        latency=args.latency, token_delay=args.token_delay, distribution=args.distribution, jitter=args.jitter,
+        error_rate=args.error_rate, responder=respond
+    )
+    await server.start()
+    directory = tempfile.mkdtemp(prefix="load-bench-")
+    env = {
+        **os.environ,
+        "API_KEY": "bench",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_API_BASE": server.base_url,
+        "LLM_MAX_CONNECTIONS": str(max(100, 4 * steps[-1])),
+        "DATABASE_URL": f"sqlite:///{directory}/bible_api.db",
+        "RATE_LIMIT_ENABLED": "0",
+        "METRICS_ENABLED": "1",
+        "LOOP_LAG_INTERVAL_MS": "10",
+        "REQUEST_LOG_FILE": os.path.join(directory, "requests.jsonl"),
+        "TRACE_LOG_FILE": os.path.join(directory, "traces.jsonl"),
+        "TRACING_ENABLED": "1" if args.tracing else "0"
+    }
+    env.pop("METRICS_API_KEY", None)
+    if not args.caches:
+        env.update(FEELING_CACHE_CAPACITY="0", VERSE_CACHE_MAX_ENTRIES="0", VERSE_CACHE_DIR="")
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    log = os.path.join(directory, "app.log")
+    with open(log, "w") as output:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            env=env, stdout=output, stderr=subprocess.STDOUT
+        )
+
+    results = []
+    try:
+        limits = httpx.Limits(max_connections=steps[-1] + 2, max_keepalive_connections=steps[-1] + 2)
+        async with httpx.AsyncClient(timeout=120.0, limits=limits) as client:
+            await wait_ready(client, url, log)
+            print(
+                f"stub: {args.distribution} latency {args.latency * 1000:.0f}ms, token delay {args.token_delay * 1000:.0f}ms, "
+                f"error rate {args.error_rate:.1%}; {args.duration:.0f}s per step; app log {log}"
+            )
+            for scenario in scenarios:
+                # Extract the character contexts and open the connections before measuring
+                await asyncio.gather(*(send(client, url, scenario, client_id, 0) for client_id in range(steps[-1])))
+                for concurrency in steps:
+                    result = await run_step(client, url, server, scenario, concurrency, args.duration)
+                    print_step(result)
+                    results.append(result)
+    finally:
+        process.terminate()
+        process.wait()
+        # Let the stub see the app's connections close before stopping it
+        await asyncio.sleep(0.2)
+        await server.stop()
+
+    with open(args.thresholds) as f:
+        failures = check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += check_baseline(results, json.load(f)["results"], args.tolerance)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "config": {
+            "duration": args.duration, "concurrency": steps, "latency": args.latency, "distribution": args.distribution,
+            "jitter": args.jitter, "token_delay": args.token_delay, "error_rate": args.error_rate,
+            "caches": args.caches, "tracing": args.tracing
+        },
+        "thresholds": os.path.abspath(args.thresholds),
+        "baseline": os.path.abspath(args.baseline) if args.baseline else None,
+        "results": results,
+        "failures": failures
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{'FAIL' if failures else 'PASS'}: results written to {args.output}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark against a local stub LLM")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=[scenario.name for scenario in SCENARIOS])
+    parser.add_argument("--concurrency", type=lambda value: [int(step) for step in value.split(",")], default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency step")
+    parser.add_argument("--latency", type=float, default=0.2, help="Typical upstream latency in seconds")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Log-normal sigma")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="Seconds between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream completions that fail")
+    parser.add_argument("--caches", action="store_true", help="Keep the feeling and verse response caches on")
+    parser.add_argument("--tracing", action="store_true", help="Run the app with TRACING_ENABLED=1")
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--thresholds", default=THRESHOLDS)
+    parser.add_argument("--baseline", help="Earlier results file to compare each step with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative RPS drop or p99 rise against --baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,69 @@
+"""
+Benchmark: cost of recording metrics.
+
+Times, per sample, a histogram observation on a child the caller keeps, the
+same through a ``labels()`` lookup (what the gateway and the middleware do),
+and a labelled counter increment. Then drives a minimal ASGI app directly
+with and without MetricsMiddleware, and renders an exposition of
+``--series`` histogram series, as a scrape would.
+
+    python -m benchmarks.metrics_bench
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from core.metrics import MetricsMiddleware, MetricsRegistry
+from benchmarks.request_log_bench import app, per_request
+
+def per_call(function, samples: int) -> float:
+    start = time.perf_counter()
+    function(samples)
+    return (time.perf_counter() - start) / samples
+
+def main(samples: int, requests: int, series: int):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "Benchmark latencies", ("agent",))
+    counter = registry.counter("bench_total", "Benchmark events", ("agent", "outcome"))
+    child = histogram.labels("bible_character")
+    values = [random.lognormvariate(-1, 1.5) for _ in range(1024)]
+
+    def empty(n):
+        for index in range(n):
+            values[index & 1023]
+
+    def observe_child(n):
+        for index in range(n):
+            child.observe(values[index & 1023])
+
+    def observe_labels(n):
+        for index in range(n):
+            histogram.labels("bible_character").observe(values[index & 1023])
+
+    def increment(n):
+        for index in range(n):
+            values[index & 1023]
+            counter.labels("bible_character", "ok").inc()
+
+    loop = per_call(empty, samples)
+    for label, function in (("histogram child.observe", observe_child), ("histogram labels().observe", observe_labels), ("counter labels().inc", increment)):
+        print(f"{label:<28} {(per_call(function, samples) - loop) * 1e9:6.0f}ns/sample")
+
+    bare = asyncio.run(per_request(app, requests))
+    measured = asyncio.run(per_request(MetricsMiddleware(app), requests))
+    print(f"middleware: bare {bare * 1e6:.2f}us  measured {measured * 1e6:.2f}us  (+{(measured - bare) * 1e6:.2f}us/request)")
+
+    for index in range(series):
+        histogram.labels(f"agent_{index}").observe(values[index & 1023])
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"render: {series} histogram series, {len(text) / 1024:.0f}KiB in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Metrics recording benchmark")
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--series", type=int, default=100)
+    args = parser.parse_args()
+    main(args.samples, args.requests, args.series)
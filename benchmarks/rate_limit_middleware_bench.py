@@ -0,0 +1,91 @@
+"""
+Benchmark: cost of the rate limiting middleware per request.
+
+Drives a minimal ASGI app directly (no sockets, no Starlette request
+objects) with and without ``RateLimitMiddleware`` in front of it, for an
+unlimited route, allowed requests on a limited route and requests that get
+a 429, and reports the middleware's added microseconds per request. Then
+checks the headers and the 429 against a real limiter.
+
+    python -m benchmarks.rate_limit_middleware_bench --requests 200000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from core.rate_limit import RateLimitMiddleware
+from services.rate_limiter import RateLimiter
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+def scope_for(method: str, path: str, ip: str) -> dict:
+    return {"type": "http", "method": method, "path": path, "client": (ip, 50000), "headers": []}
+
+async def per_request(asgi, scopes, requests: int) -> float:
+    messages = []
+    send = messages.append
+
+    async def capture(message):
+        send(message)
+
+    start = time.perf_counter()
+    for index in range(requests):
+        await asgi(scopes[index % len(scopes)], receive, capture)
+        if len(messages) > 1000:
+            messages.clear()
+    return (time.perf_counter() - start) / requests
+
+async def call(asgi, scope) -> dict:
+    messages = []
+
+    async def capture(message):
+        messages.append(message)
+
+    await asgi(scope, receive, capture)
+    start = messages[0]
+    return {"status": start["status"], **{name.decode(): value.decode() for name, value in start["headers"]}}
+
+async def main(requests: int, ips: int):
+    path = os.path.join(tempfile.mkdtemp(prefix="rate-limits-"), "rate_limits.json")
+    # Allowed requests: a limit nobody reaches; limited requests: a limit everybody has used up
+    limiter = RateLimiter(storage_file=path, limits={"bible_character_chat": 10 ** 9, "feeling_process": 1})
+    middleware = RateLimitMiddleware(app, limiter=limiter)
+
+    cases = {
+        "unlimited route": [scope_for("GET", "/", f"10.0.{i // 256}.{i % 256}") for i in range(ips)],
+        "allowed": [scope_for("POST", "/bible/characters/chat", f"10.0.{i // 256}.{i % 256}") for i in range(ips)],
+        "429": [scope_for("POST", "/api/v1/feeling", f"10.0.{i // 256}.{i % 256}") for i in range(ips)],
+    }
+    for scope in cases["429"]:
+        await call(middleware, scope)
+
+    bare = await per_request(app, cases["allowed"], requests)
+    print(f"bare app {bare * 1e6:6.2f}us/request")
+    for name, scopes in cases.items():
+        wrapped = await per_request(middleware, scopes, requests)
+        print(f"{name:>16}  {wrapped * 1e6:6.2f}us/request  middleware +{(wrapped - bare) * 1e6:5.2f}us")
+
+    limiter = RateLimiter(storage_file=path + ".check", limits={"prayer_petition": 2})
+    middleware = RateLimitMiddleware(app, limiter=limiter)
+    scope = scope_for("POST", "/prayers/petition", "192.168.0.1")
+    for _ in range(3):
+        response = await call(middleware, scope)
+        print(
+            f"  {response['status']}  limit {response['x-ratelimit-limit']} remaining {response['x-ratelimit-remaining']} "
+            f"reset {response['x-ratelimit-reset']}s  retry-after {response.get('retry-after', '-')}"
+        )
+    assert response["status"] == 429 and response["retry-after"] == "43200"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate limiting middleware benchmark")
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--ips", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.ips))
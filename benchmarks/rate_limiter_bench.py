@@ -0,0 +1,112 @@
+"""
+Benchmark: rate limiter cost per request against the number of tracked IPs.
+
+For tables of ``--sizes`` IPs on one endpoint, measures ``is_rate_limited``
+with the previous behaviour (the whole table serialized to the JSON file on
+every counted request, under the lock) and with the in-memory counters whose
+changes are appended to a log in the background. Also reports how long a
+log append, a compaction into a new snapshot and a startup replay take, all
+of which run off the request path.
+
+    python -m benchmarks.rate_limiter_bench --sizes 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+from services.rate_limiter import Counters, RateLimiter
+
+ENDPOINT = "bible_character_chat"
+
+class LegacyRateLimiter(RateLimiter):
+    """Counts like RateLimiter but rewrites the whole file on every counted request, as before."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counters: Counters = {}
+
+    def _save_data(self):
+        with open(self.storage_file, 'w') as f:
+            json.dump({
+                endpoint: {ip: (count, timestamp.isoformat()) for ip, (count, timestamp) in ip_data.items()}
+                for endpoint, ip_data in self.counters.items()
+            }, f)
+
+    def is_rate_limited(self, endpoint: str, ip: str) -> bool:
+        limited = super().is_rate_limited(endpoint, ip)
+        if not limited:
+            with self.lock:
+                self.counters.setdefault(endpoint, {})[ip] = (self._dirty[(endpoint, ip)][0], datetime.now())
+                self._save_data()
+        return limited
+
+def fill(limiter: RateLimiter, size: int) -> Counters:
+    start = datetime.now() - timedelta(hours=1)
+    counters = {ENDPOINT: {
+        f"10.{index // 65536}.{index // 256 % 256}.{index % 256}": (1, start) for index in range(size)
+    }}
+    limiter.restore(counters)
+    return counters
+
+def per_request(limiter: RateLimiter, requests: int) -> float:
+    start = time.perf_counter()
+    for index in range(requests):
+        # New clients, so every request changes a counter
+        limiter.is_rate_limited(ENDPOINT, f"192.168.{index // 256 % 256}.{index % 256}")
+    return (time.perf_counter() - start) / requests
+
+async def run(size: int, requests: int, legacy_requests: int):
+    directory = tempfile.mkdtemp(prefix="rate-limits-")
+
+    legacy = LegacyRateLimiter(storage_file=os.path.join(directory, "legacy.json"))
+    legacy.counters = fill(legacy, size)
+    legacy_seconds = per_request(legacy, legacy_requests)
+
+    path = os.path.join(directory, "rate_limits.json")
+    limiter = RateLimiter(storage_file=path)
+    counters = fill(limiter, size)
+    # Log every tracked IP once so the compaction has the whole table to fold
+    limiter._dirty.update(
+        ((ENDPOINT, ip), (count, timestamp.timestamp())) for ip, (count, timestamp) in counters[ENDPOINT].items()
+    )
+    await asyncio.to_thread(limiter._append_log)
+    new_seconds = per_request(limiter, requests)
+
+    start = time.perf_counter()
+    await asyncio.to_thread(limiter._append_log)
+    append_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    await limiter.compact()
+    compact_ms = (time.perf_counter() - start) * 1000
+    # One more batch in the log so startup both loads the snapshot and replays
+    per_request(limiter, requests)
+    await asyncio.to_thread(limiter._append_log)
+    start = time.perf_counter()
+    restored = RateLimiter(storage_file=path)
+    replay_ms = (time.perf_counter() - start) * 1000
+    sample = list(counters[ENDPOINT])[::max(1, size // 100)] + [f"192.168.0.{index}" for index in range(100)]
+    assert all(abs(restored._used(ENDPOINT, ip) - limiter._used(ENDPOINT, ip)) < 1e-3 for ip in sample)
+
+    print(
+        f"{size:>7} IPs  legacy {legacy_seconds * 1e6:9.1f}us/request  write-behind {new_seconds * 1e6:5.2f}us/request  "
+        f"| background: append {append_ms:6.1f}ms compact {compact_ms:7.1f}ms  startup replay {replay_ms:7.1f}ms"
+    )
+
+async def main(sizes: List[int], requests: int, legacy_requests: int):
+    logging.getLogger("services.rate_limiter").setLevel(logging.WARNING)
+    for size in sizes:
+        await run(size, requests, legacy_requests)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate limiter persistence benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--legacy-requests", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.requests, args.legacy_requests))
@@ -0,0 +1,110 @@
+"""
+Benchmark: rate limiter memory and throughput against millions of client IPs.
+
+For each of ``--sizes`` distinct IPv4 clients on one endpoint, fills a
+RateLimiter through ``check`` (clearing the dirty map every 100k requests as
+the persist loop would) and reports the bytes of its tables per client, the
+cost of a check for new and for returning clients and how long dropping
+expired tables takes. The previous layout, a dict of
+``{ip: (tokens, datetime)}``, is measured with tracemalloc up to
+``--legacy-max`` clients, along with its trim (a sort of every entry by
+timestamp). One IPv6 run shows the cost of the 64-bit keys.
+
+    python -m benchmarks.rate_limiter_memory_bench --sizes 1000000 10000000
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+from services.rate_limiter import WINDOW_SECONDS, RateLimiter
+
+ENDPOINT = "bible_character_chat"
+CHUNK = 100000
+
+def ipv4(index: int) -> str:
+    return f"{10 + index // 16777216}.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+
+def ipv6(index: int) -> str:
+    # One client per /64
+    return f"2001:db8:{index // 65536:x}:{index % 65536:x}::1"
+
+def legacy(size: int):
+    tracemalloc.start()
+    now = datetime.now()
+    counters = {}
+    for index in range(size):
+        counters[ipv4(index)] = (1.0, now + timedelta(microseconds=index))
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    sorted(counters.items(), key=lambda x: x[1][1])
+    trim_seconds = time.perf_counter() - start
+    print(
+        f"{size:>9} IPv4  legacy dict   {memory / size:6.1f} B/client ({memory / 1e6:7.1f}MB)  "
+        f"trim sort {trim_seconds * 1000:7.0f}ms"
+    )
+    return memory / size
+
+def compact(size: int, address=ipv4, label: str = "IPv4"):
+    directory = tempfile.mkdtemp(prefix="rate-limits-")
+    limiter = RateLimiter(storage_file=os.path.join(directory, "rate_limits.json"))
+    start = time.perf_counter()
+    for chunk in range(0, size, CHUNK):
+        for index in range(chunk, min(size, chunk + CHUNK)):
+            limiter.check(ENDPOINT, address(index))
+        limiter._dirty.clear()
+    fill_seconds = time.perf_counter() - start
+    buckets = limiter.buckets[ENDPOINT]
+    memory = sys.getsizeof(buckets.other) + sum(
+        sys.getsizeof(table.keys) + sys.getsizeof(table.deadlines)
+        for tables in buckets.tables.values() for table in tables
+    )
+
+    new = [address(size + index) for index in range(CHUNK // 10)]
+    start = time.perf_counter()
+    for ip in new:
+        limiter.check(ENDPOINT, ip)
+    new_seconds = (time.perf_counter() - start) / len(new)
+    returning = [address(random.randrange(size)) for _ in range(CHUNK // 10)]
+    start = time.perf_counter()
+    for ip in returning:
+        limiter.check(ENDPOINT, ip)
+    returning_seconds = (time.perf_counter() - start) / len(returning)
+
+    # A day later every bucket is full again: all tables but the current one go
+    tables = sum(len(tables) for tables in buckets.tables.values())
+    start = time.perf_counter()
+    dropped = buckets.expire(time.time() + WINDOW_SECONDS)
+    expire_ms = (time.perf_counter() - start) * 1000
+    print(
+        f"{size:>9} {label}  compact tables {memory / size:6.1f} B/client ({memory / 1e6:7.1f}MB)  "
+        f"fill {fill_seconds:5.0f}s  check new {new_seconds * 1e6:5.2f}us returning {returning_seconds * 1e6:5.2f}us  "
+        f"expire {tables} tables ({dropped} buckets) in {expire_ms:5.2f}ms"
+    )
+    return memory / size
+
+def main(sizes: List[int], legacy_max: int):
+    logging.getLogger("services.rate_limiter").setLevel(logging.WARNING)
+    random.seed(0)
+    legacy_per_client = None
+    for size in sizes:
+        if size <= legacy_max:
+            legacy_per_client = legacy(size)
+        per_client = compact(size)
+        if legacy_per_client:
+            print(f"{'':>15}{legacy_per_client / per_client:5.1f}x less memory per client")
+    compact(min(sizes), ipv6, "IPv6")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate limiter memory benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000000, 10000000])
+    parser.add_argument("--legacy-max", type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.sizes, args.legacy_max)
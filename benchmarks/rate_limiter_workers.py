@@ -0,0 +1,87 @@
+"""
+Benchmark: rate limit enforcement across worker processes.
+
+Starts ``--workers`` processes that each build their own limiter, as uvicorn
+workers do, wait on a barrier and then hammer the same ``--clients`` IPs:
+every worker tries each client ``--limit`` times, in its own shuffled order.
+With the in-memory backend every worker enforces its own quota, so a client
+gets up to workers x limit requests through. With SharedRateLimiter it must
+get exactly ``limit``. Reports the requests allowed per client and each
+worker's checks per second.
+
+    python -m benchmarks.rate_limiter_workers --workers 4 --clients 2000 --limit 50
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from services.rate_limiter import RateLimiter, SharedRateLimiter
+
+ENDPOINT = "bible_character_chat"
+
+def worker(backend: str, directory: str, clients: int, limit: int, seed: int, barrier, results):
+    logging.getLogger("services.rate_limiter").setLevel(logging.WARNING)
+    storage_file = os.path.join(directory, "rate_limits.json")
+    if backend == "shm":
+        limiter = SharedRateLimiter(storage_file=storage_file, limits={ENDPOINT: limit}, slots=1 << 16, stripes=256)
+    else:
+        limiter = RateLimiter(storage_file=storage_file, limits={ENDPOINT: limit})
+    attempts = [f"10.1.{index // 256}.{index % 256}" for index in range(clients)] * limit
+    random.Random(seed).shuffle(attempts)
+    allowed = Counter()
+
+    barrier.wait()
+    start = time.perf_counter()
+    for ip in attempts:
+        if not limiter.check(ENDPOINT, ip).limited:
+            allowed[ip] += 1
+    elapsed = time.perf_counter() - start
+    results.put((allowed, len(attempts) / elapsed, getattr(limiter, "evictions", 0)))
+
+def run(backend: str, workers: int, clients: int, limit: int):
+    directory = tempfile.mkdtemp(prefix="rate-limits-")
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(backend, directory, clients, limit, seed, barrier, results))
+        for seed in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    allowed = Counter()
+    for worker_allowed, _, _ in outcomes:
+        allowed.update(worker_allowed)
+    per_client = Counter(allowed.values())
+    rates = ", ".join(f"{rate / 1000:.0f}k" for _, rate, _ in outcomes)
+    evictions = sum(evicted for _, _, evicted in outcomes)
+    print(
+        f"{backend:>6}  {workers} workers  allowed per client (limit {limit}): "
+        f"{dict(sorted(per_client.items()))}  checks/s per worker: {rates}  evictions {evictions}  "
+        f"total {elapsed:.1f}s"
+    )
+    return per_client
+
+def main(workers: int, clients: int, limit: int):
+    run("memory", workers, clients, limit)
+    per_client = run("shm", workers, clients, limit)
+    assert per_client == {limit: clients}, per_client
+    print(f"shm: every one of {clients} clients got exactly {limit} requests through")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-worker rate limit benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    main(args.workers, args.clients, args.limit)
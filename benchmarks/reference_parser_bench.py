@@ -0,0 +1,57 @@
+"""
+Microbenchmark: Spanish Bible reference parsing throughput.
+
+Parses a mix of canonical names, abbreviations, accent variants, ranges and
+invalid references, and reports parses per second.
+
+    python -m benchmarks.reference_parser_bench --iterations 200000
+"""
+
+import argparse
+import time
+from core.bible_references import parse_reference
+
+SAMPLES = [
+    "Josué 1:9",
+    "Josue 1:9",
+    "Fil 4:13",
+    "Filipenses 4:13",
+    "Juan 3:16",
+    "Jn 3,16",
+    "Juan 3:16-18",
+    "1 Juan 4:7-8",
+    "Primera de Corintios 13:4-7",
+    "Sal 23",
+    "Salmos 119:105",
+    "Isaías 41:10",
+    "Ro 8:28",
+    "Mateo 11:28-30",
+    "Apocalipsis 21:4",
+    "Judas 24",
+    "Jaun 3:16",       # unknown book
+    "Juan 22:1",       # chapter out of range
+]
+
+def main(iterations: int):
+    workload = (SAMPLES * (iterations // len(SAMPLES) + 1))[:iterations]
+    failures = 0
+
+    start = time.perf_counter()
+    for text in workload:
+        try:
+            parse_reference(text)
+        except ValueError:
+            failures += 1
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"parsed {iterations} references in {elapsed:.3f}s: "
+        f"{iterations / elapsed:,.0f} parses/s, {elapsed / iterations * 1e6:.2f}us each "
+        f"({failures} rejected)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bible reference parser microbenchmark")
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+    main(args.iterations)
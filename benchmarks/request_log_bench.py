@@ -0,0 +1,136 @@
+"""
+Benchmark: request log cost on the request path.
+
+1. Drives a minimal ASGI app directly with and without RequestLogMiddleware
+   and reports the microseconds per request the middleware adds.
+2. Queues ``--records`` log lines as fast as possible while the writer
+   flushes in the background, and reports write() latency percentiles and
+   the lines per second that reached the file.
+3. Backpressure: a writer whose disk takes ``--slow-disk-ms`` per batch gets
+   the same flood through a small queue. write() must stay as cheap, the
+   event loop must keep ticking, and the excess must be dropped and counted.
+4. Rotation: a writer with a small ``max_bytes`` rotates and keeps
+   ``backups`` files.
+
+    python -m benchmarks.request_log_bench
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import tempfile
+import time
+from typing import List
+from benchmarks.feeling_fused_bench import percentile
+from core.jsonl_writer import JsonlBatchWriter
+from core.request_log import RequestLogMiddleware
+
+RECORD = {
+    "ts": "2026-01-01T00:00:00.000", "method": "POST", "route": "/bible/characters/chat", "status": 200,
+    "latency_ms": 812.4, "headers_ms": 95.1, "llm_calls": 1, "prompt_tokens": 1144, "completion_tokens": 212,
+    "cache_hits": 1, "client": "afd0982b7ea7968c"
+}
+
+async def app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def per_request(asgi, requests: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/bible/characters/chat", "client": ("10.0.0.1", 50000), "headers": []}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await asgi(scope, receive, send)
+    return (time.perf_counter() - start) / requests
+
+class SlowDiskWriter(JsonlBatchWriter):
+    """Writer whose every batch takes ``delay`` seconds, like a saturated disk."""
+
+    def __init__(self, *args, delay: float, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+
+    def _write_batch(self, batch):
+        time.sleep(self.delay)
+        super()._write_batch(batch)
+
+async def flood(writer: JsonlBatchWriter, records: int, per_tick: int = 200) -> List[float]:
+    """Queue ``records`` lines, yielding to the loop every ``per_tick``; returns write() latencies."""
+    latencies = []
+    for index in range(records):
+        start = time.perf_counter()
+        writer.write(RECORD)
+        latencies.append(time.perf_counter() - start)
+        if index % per_tick == 0:
+            await asyncio.sleep(0)
+    return latencies
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Worst lateness of a ticker while the flood runs."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+def summary(latencies: List[float]) -> str:
+    micros = sorted(latency * 1e6 for latency in latencies)
+    return f"write() p50 {percentile(micros, 50):.2f}us p99 {percentile(micros, 99):.2f}us max {micros[-1]:.0f}us"
+
+async def main(requests: int, records: int, slow_disk_ms: float):
+    directory = tempfile.mkdtemp(prefix="request-log-")
+
+    writer = JsonlBatchWriter(os.path.join(directory, "middleware.jsonl"), max_queue=requests + 1)
+    bare = await per_request(app, requests)
+    logged = await per_request(RequestLogMiddleware(app, writer=writer), requests)
+    print(f"middleware: bare {bare * 1e6:.2f}us  logged {logged * 1e6:.2f}us  (+{(logged - bare) * 1e6:.2f}us/request)")
+
+    writer = JsonlBatchWriter(os.path.join(directory, "requests.jsonl"), max_queue=records)
+    await writer.start()
+    start = time.perf_counter()
+    latencies = await flood(writer, records)
+    await writer.stop()
+    elapsed = time.perf_counter() - start
+    with open(writer.path) as f:
+        lines = sum(1 for _ in f)
+    print(f"throughput: {lines} lines in {elapsed:.2f}s ({lines / elapsed / 1000:.0f}k lines/s)  {summary(latencies)}  dropped {writer.dropped}")
+
+    slow = SlowDiskWriter(
+        os.path.join(directory, "slow.jsonl"), max_queue=2000, batch_size=500, flush_interval=0.05,
+        delay=slow_disk_ms / 1000
+    )
+    await slow.start()
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    latencies = await flood(slow, records)
+    stop.set()
+    worst_lag = await lag
+    await slow.stop()
+    print(
+        f"slow disk ({slow_disk_ms:.0f}ms/batch): {summary(latencies)}  loop lag max {worst_lag * 1000:.1f}ms  "
+        f"written {slow.written} dropped {slow.dropped}"
+    )
+    assert slow.written + slow.dropped == records
+
+    rotating = JsonlBatchWriter(os.path.join(directory, "rotating.jsonl"), max_bytes=64 * 1024, backups=3)
+    for _ in range(20):
+        await flood(rotating, 500)
+        await rotating.flush()
+    files = sorted(os.path.basename(path) for path in glob.glob(os.path.join(directory, "rotating.jsonl*")))
+    print(f"rotation: {rotating.rotations} rotations, kept {files}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Request log benchmark")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--records", type=int, default=200000)
+    parser.add_argument("--slow-disk-ms", type=float, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.records, args.slow_disk_ms))
@@ -0,0 +1,102 @@
+"""
+Benchmark: semantic cache hit rate and lookup latency.
+
+Fills ``SemanticCache`` with synthetic feeling messages, then queries it with
+near-duplicates of cached messages (gender/intensity changes, punctuation,
+accents) and with unseen messages whose cause and details never appear in the
+cache. Reports hit rate on each group (hits on unseen messages are false
+hits), hits that returned a different entry than the one perturbed, lookup
+latency and matrix memory.
+
+    python -m benchmarks.semantic_cache_bench --entries 100000 --queries 2000
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+from benchmarks.feeling_fused_bench import percentile
+from services.semantic_cache import NGramVectorizer, SemanticCache
+
+FEELINGS = ["ansiedad", "tristeza", "miedo", "soledad", "enojo", "culpa", "cansancio", "esperanza"]
+OPENINGS = ["estoy ansioso", "me siento triste", "tengo miedo", "me siento solo", "estoy enojado",
+            "me siento culpable", "estoy cansado", "estoy preocupado", "me siento perdido", "estoy agotado"]
+CAUSES = ["por mi trabajo", "por mi familia", "por mis estudios", "por mi salud", "por el dinero",
+          "por mi matrimonio", "por mis hijos", "por el futuro", "por una deuda", "por mi jefe",
+          "por mi mudanza", "por mi iglesia", "por mi examen", "por mi novia", "por mis padres"]
+DETAILS = ["desde hace semanas", "y no puedo dormir", "cada mañana", "aunque oro mucho",
+           "y no sé qué hacer", "desde que perdí mi empleo", "todos los domingos", "cuando llego a casa",
+           "y me cuesta concentrarme", "desde la última discusión", "en las noches", "sin razón aparente"]
+PEOPLE = ["", "con mi hermano", "con mi amigo Juan", "con mi esposa", "con mis compañeros", "con mi vecino",
+          "con mi pastor", "con mi abuela", "con mi mejor amiga", "con mi hijo mayor"]
+
+def message(rng: random.Random, held_out: bool = False) -> Tuple[str, str]:
+    """Synthetic message; held-out messages use causes and details never cached."""
+    causes = CAUSES[10:] if held_out else CAUSES[:10]
+    details = DETAILS[8:] if held_out else DETAILS[:8]
+    text = " ".join(part for part in (
+        rng.choice(OPENINGS), rng.choice(causes), rng.choice(details), rng.choice(PEOPLE),
+        f"hace {rng.randint(2, 40)} días"
+    ) if part)
+    return rng.choice(FEELINGS), text
+
+def perturb(text: str, rng: random.Random) -> str:
+    """Small surface edits a different user would make to the same message."""
+    edits = [
+        lambda t: t.replace("ansioso", "ansiosa").replace("solo", "sola").replace("cansado", "cansada"),
+        lambda t: t.capitalize() + "!",
+        lambda t: t.replace("mañana", "manana").replace("días", "dias"),
+        lambda t: t.replace("estoy ", "estoy muy ", 1),
+        lambda t: t + ".",
+    ]
+    return rng.choice(edits)(text)
+
+def main(entries: int, queries: int, dim: int, threshold: float):
+    rng = random.Random(5)
+    cache: SemanticCache[int] = SemanticCache(capacity=entries, threshold=threshold, vectorizer=NGramVectorizer(dim))
+
+    stored: List[Tuple[str, str]] = []
+    seen = set()
+    start = time.perf_counter()
+    while len(stored) < entries:
+        feeling, text = message(rng)
+        if (feeling, text) in seen:
+            continue
+        seen.add((feeling, text))
+        cache.add(feeling, text, len(stored))
+        stored.append((feeling, text))
+    fill_seconds = time.perf_counter() - start
+
+    for label, make_query in (
+        ("near-duplicate", lambda: (lambda i: (i, stored[i][0], perturb(stored[i][1], rng)))(rng.randrange(entries))),
+        ("unseen", lambda: (None, *message(rng, held_out=True))),
+    ):
+        cache.hits = cache.misses = 0
+        latencies: List[float] = []
+        wrong = 0
+        for _ in range(queries):
+            expected, feeling, text = make_query()
+            begin = time.perf_counter()
+            value, _, _ = cache.lookup(feeling, text)
+            latencies.append(time.perf_counter() - begin)
+            if value is not None and expected is not None and value != expected:
+                wrong += 1
+        stats = cache.stats()
+        print(
+            f"{label:<15} hit rate={stats['hit_rate']:6.1%} hits on another entry={wrong:<4} "
+            f"lookup p50={percentile(latencies, 50) * 1000:6.2f}ms p99={percentile(latencies, 99) * 1000:6.2f}ms"
+        )
+
+    print(
+        f"entries={len(cache)} dim={dim} threshold={threshold} "
+        f"matrix={cache.stats()['matrix_bytes'] / 2**20:.1f}MiB fill={fill_seconds:.1f}s"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Semantic cache benchmark")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+    main(args.entries, args.queries, args.dim, args.threshold)
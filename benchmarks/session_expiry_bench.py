@@ -0,0 +1,114 @@
+"""
+Benchmark: session expiry sweep cost and event loop blocking.
+
+Builds ``--users`` sessions (one conversation memory each) created uniformly
+over the last two timeouts, with a share of them active again since, then
+sweeps with ``BibleCharacter.expire_sessions``: once for the backlog left at
+startup and then for one 60-second steady-state interval. A ticker task
+measures the longest stall of the event loop during each sweep.
+
+The previous sweep scanned every session and, per expired user, every memory
+key for a ``f"{user_id}_"`` prefix. Its session scan is timed at full size;
+the prefix scans are timed for ``--legacy-samples`` users and extrapolated.
+
+    python -m benchmarks.session_expiry_bench --users 1000000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from agents.bible_character import BibleCharacter, ConversationMemory
+
+TIMEOUT_MINUTES = 30
+
+async def sweep(agent: BibleCharacter, now: datetime, batch_size: int):
+    """Run one sweep while a ticker records the longest gap between its wakeups."""
+    stalls = [0.0]
+    running = True
+
+    async def ticker():
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0)
+            current = time.perf_counter()
+            stalls[0] = max(stalls[0], current - last)
+            last = current
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    cleared = await agent.expire_sessions(now, batch_size)
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    return cleared, elapsed, stalls[0]
+
+def legacy_sweep(agent: BibleCharacter, now: datetime, samples: int):
+    """Time the previous full scan; the per-user prefix scans are extrapolated from a sample."""
+    start = time.perf_counter()
+    inactive = [
+        user_id for user_id, session in agent.user_sessions.items()
+        if now - session.last_activity > agent.session_timeout
+    ]
+    scan = time.perf_counter() - start
+
+    keys = [f"{user_id}_{character}" for user_id, character in agent.conversation_memories]
+    sample = inactive[:samples]
+    start = time.perf_counter()
+    for user_id in sample:
+        prefix = f"{user_id}_"
+        [key for key in keys if key.startswith(prefix)]
+    per_user = (time.perf_counter() - start) / max(len(sample), 1)
+    return len(inactive), scan + per_user * len(inactive)
+
+def populate(agent: BibleCharacter, users: int, active_share: float, base: datetime):
+    rng = random.Random(5)
+    span = agent.session_timeout.total_seconds() * 2
+    for index in range(users):
+        user_id = f"user-{index}"
+        created = base + timedelta(seconds=rng.uniform(0, span))
+        session = agent._get_or_create_session(user_id, created)
+        memory = ConversationMemory(
+            user_id=user_id, character_name="Moisés", messages=[], created_at=created, last_updated=created
+        )
+        agent.conversation_memories[(user_id, "Moisés")] = memory
+        agent.user_memory_keys.setdefault(user_id, set()).add((user_id, "Moisés"))
+        if rng.random() < active_share:
+            session.last_activity = created + timedelta(seconds=rng.uniform(0, span))
+    return base + timedelta(seconds=span)
+
+async def main(users: int, active_share: float, batch_size: int, legacy_samples: int):
+    logging.getLogger("agents.bible_character").setLevel(logging.WARNING)
+    agent = BibleCharacter(llm_client=None, session_timeout_minutes=TIMEOUT_MINUTES)
+    start = time.perf_counter()
+    now = populate(agent, users, active_share, datetime(2024, 1, 1))
+    print(
+        f"{users} sessions, timeout {TIMEOUT_MINUTES} min, {active_share:.0%} active again, "
+        f"batch_size={batch_size} (built in {time.perf_counter() - start:.1f}s)"
+    )
+
+    legacy_cleared, legacy_seconds = legacy_sweep(agent, now, legacy_samples)
+    print(
+        f"{'legacy scan':<20} cleared={legacy_cleared:>7} sweep={legacy_seconds:10.2f}s "
+        f"loop blocked={legacy_seconds:10.2f}s (prefix scans extrapolated from {legacy_samples} users)"
+    )
+
+    for label, at in (("startup backlog", now), ("steady state (60s)", now + timedelta(seconds=60))):
+        cleared, elapsed, stall = await sweep(agent, at, batch_size)
+        print(
+            f"{label:<20} cleared={cleared:>7} sweep={elapsed:10.3f}s loop blocked={stall * 1000:8.2f}ms max "
+            f"(heap {len(agent._expiry_heap)}, sessions {len(agent.user_sessions)}, "
+            f"memories {len(agent.conversation_memories)})"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Session expiry benchmark")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--active-share", type=float, default=0.2, help="Share of sessions active again after creation")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--legacy-samples", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.active_share, args.batch_size, args.legacy_samples))
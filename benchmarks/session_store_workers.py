@@ -0,0 +1,142 @@
+"""
+Multi-process check for the shared session store.
+
+Starts ``--workers`` uvicorn processes of ``main:app`` on separate ports,
+all backed by the local stub LLM and one SQLite database. It then:
+
+- sends a character conversation whose turns alternate between workers,
+  checking that every response's history holds all earlier turns;
+- posts a feeling on one worker and fetches the conversation from each of
+  the others.
+
+Exits non-zero on any miss. ``--store memory`` runs the same checks against
+per-process memory to show what they catch.
+
+    python -m benchmarks.session_store_workers --workers 2 --turns 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+import httpx
+from benchmarks.feeling_fused_bench import percentile
+from benchmarks.stub_llm_server import StubLLMServer
+
+HEADERS = {"X-API-Key": "bench"}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def wait_ready(client: httpx.AsyncClient, url: str, log: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get(f"{url}/test", headers=HEADERS)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Worker at {url} did not start, see {log}")
+        await asyncio.sleep(0.1)
+
+async def check_chat(client: httpx.AsyncClient, urls: List[str], turns: int) -> int:
+    failures = 0
+    latencies = []
+    for turn in range(turns):
+        url = urls[turn % len(urls)]
+        start = time.perf_counter()
+        response = await client.post(f"{url}/bible/characters/chat", headers=HEADERS, json={
+            "user_id": "alternating-user",
+            "character_name": "Moisés",
+            "message": f"Turno {turn + 1}: ¿cómo confiaste en Dios en el desierto?"
+        })
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        history = response.json()["conversation_history"]
+        expected = [f"Turno {index + 1}:" for index in range(turn + 1)]
+        seen = [message["content"].split(" ", 2)[0] + " " + message["content"].split(" ", 2)[1]
+                for message in history if message["role"] == "user"]
+        ok = seen == expected and len(history) == 2 * (turn + 1)
+        failures += not ok
+        print(f"turn {turn + 1:>2} on worker {turn % len(urls)}: {len(history):>2} messages in history {'ok' if ok else 'MISSING TURNS'}")
+    print(f"chat latency p50={percentile(latencies, 50) * 1000:.1f}ms max={max(latencies) * 1000:.1f}ms")
+    return failures
+
+async def check_feeling(client: httpx.AsyncClient, urls: List[str]) -> int:
+    response = await client.post(f"{urls[0]}/api/v1/feeling", headers=HEADERS, json={
+        "feeling": "ansiedad", "text": "Estoy ansioso por mi trabajo"
+    })
+    response.raise_for_status()
+    conversation_id = response.headers["X-Conversation-ID"]
+    failures = 0
+    for index, url in enumerate(urls):
+        found = await client.get(f"{url}/api/v1/feeling/{conversation_id}", headers=HEADERS)
+        failures += found.status_code != 200
+        print(f"feeling conversation posted on worker 0, GET on worker {index}: {found.status_code}")
+    return failures
+
+async def main(workers: int, turns: int, store: str, latency: float) -> int:
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server = StubLLMServer(latency=latency)
+    await server.start()
+    directory = tempfile.mkdtemp(prefix="session-store-")
+    env = {
+        **os.environ,
+        "API_KEY": "bench",
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_API_BASE": server.base_url,
+        "DATABASE_URL": f"sqlite:///{directory}/bible_api.db",
+        "SESSION_STORE": store,
+        "FEELING_CACHE_CAPACITY": "0",
+        "RATE_LIMIT_ENABLED": "0",
+        "REQUEST_LOG_FILE": os.path.join(directory, "requests-{pid}.jsonl"),
+        # Keep every turn verbatim so the history length shows what each worker saw
+        "CHARACTER_MEMORY_TOKENS": "100000"
+    }
+    ports = [free_port() for _ in range(workers)]
+    log = os.path.join(directory, "workers.log")
+    with open(log, "w") as output:
+        processes = [
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                env=env, stdout=output, stderr=subprocess.STDOUT
+            )
+            for port in ports
+        ]
+    urls = [f"http://127.0.0.1:{port}" for port in ports]
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            for url in urls:
+                await wait_ready(client, url, log)
+            print(f"{workers} workers, SESSION_STORE={store}")
+            failures = await check_chat(client, urls, turns)
+            failures += await check_feeling(client, urls)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        # Let the stub see the workers' connections close before stopping it
+        await asyncio.sleep(0.2)
+        await server.stop()
+
+    print("PASS" if not failures else f"FAIL: {failures} checks missed state from another worker")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared session store multi-process check")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--store", choices=["sqlite", "memory"], default="sqlite")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated upstream latency in seconds")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.workers, args.turns, args.store, args.latency)))
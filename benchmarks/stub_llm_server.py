@@ -0,0 +1,263 @@
+"""
+Minimal OpenAI-compatible stub server for local benchmarks.
+
+Implements just enough HTTP/1.1 (keep-alive, Content-Length bodies, chunked
+SSE streams) to serve ``GET /v1/models`` and ``POST /v1/chat/completions``
+(including ``stream: true``) without network access, and counts the TCP
+connections it accepts so benchmarks can compare connection reuse.
+
+Completion latency is drawn from a distribution around ``latency``: fixed,
+uniform on [0, 2 * latency], exponential with that mean, or log-normal with
+that median and ``jitter`` as sigma. A share ``error_rate`` of completions
+fails at once with ``error_status`` and an OpenAI-style error body.
+
+Run standalone with::
+
+    python -m benchmarks.stub_llm_server --port 8099 --latency 0.05 --distribution lognormal --jitter 0.5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from http import HTTPStatus
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_CONTENT = "Esta es una respuesta simulada del modelo de lenguaje."
+
+DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+class StubLLMServer:
+    """In-process asyncio server that answers like the OpenAI chat API."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        content: str = DEFAULT_CONTENT,
+        token_delay: float = 0.0,
+        distribution: str = "fixed",
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        responder: Optional[Callable[[Dict], str]] = None,
+        seed: Optional[int] = 7
+    ):
+        """
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 for any free one
+            latency (float): Typical seconds before a completion (or its first chunk)
+            content (str): Completion text when there is no responder
+            token_delay (float): Seconds between streamed chunks
+            distribution (str): How latencies are drawn, one of DISTRIBUTIONS
+            jitter (float): Log-normal sigma
+            error_rate (float): Share of completions answered with ``error_status``
+            error_status (int): Status of the injected errors, e.g. 500 or 429
+            responder (Optional[Callable[[Dict], str]]): Returns the completion text for a request body
+            seed (Optional[int]): Seed for reproducible latencies and errors
+
+        Raises:
+            ValueError: If the distribution is unknown
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution {distribution!r}, expected one of {DISTRIBUTIONS}")
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.content = content
+        self.token_delay = token_delay
+        self.distribution = distribution
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.responder = responder
+        self.connections_opened = 0
+        self.connections_open = 0
+        self.requests_served = 0
+        self.errors_served = 0
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def sample_latency(self) -> float:
+        """Draw the delay before one completion."""
+        if not self.latency or self.distribution == "fixed":
+            return self.latency
+        if self.distribution == "uniform":
+            return self._random.uniform(0.0, 2 * self.latency)
+        if self.distribution == "exponential":
+            return self._random.expovariate(1 / self.latency)
+        return self.latency * self._random.lognormvariate(0.0, self.jitter)
+
+    def content_for(self, request: Dict) -> str:
+        return self.responder(request) if self.responder else self.content
+
+    def completion_body(self, request: Dict) -> Dict:
+        """Build the JSON body for a chat completion request."""
+        content = self.content_for(request)
+        prompt_tokens = sum(len(message.get("content", "")) // 4 for message in request.get("messages", []))
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    async def handle_request(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        """Produce a status code and JSON body for one request."""
+        if method == "GET" and path.endswith("/models"):
+            return 200, {"object": "list", "data": [{"id": "stub", "object": "model"}]}
+        if method == "POST" and path.endswith("/chat/completions"):
+            delay = self.sample_latency()
+            if delay:
+                await asyncio.sleep(delay)
+            return 200, self.completion_body(json.loads(body or b"{}"))
+        return 404, {"error": {"message": f"Unknown route {method} {path}"}}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections_opened += 1
+        self.connections_open += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", "0"))
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests_served += 1
+                await self.write_response(writer, method, path, body)
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections_open -= 1
+            writer.close()
+
+    def completion_chunks(self, request: Dict):
+        """Split the canned content into streaming chat completion chunks."""
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        words = self.content_for(request).split(" ")
+        for index, word in enumerate(words):
+            yield {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if index == 0 else f" {word}"},
+                    "finish_reason": "stop" if index == len(words) - 1 else None
+                }]
+            }
+
+    async def write_stream(self, writer: asyncio.StreamWriter, request: Dict):
+        """Write a chunked ``text/event-stream`` completion."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        delay = self.sample_latency()
+        if delay:
+            await asyncio.sleep(delay)
+        for chunk in self.completion_chunks(request):
+            frame = f"data: {json.dumps(chunk)}\n\n".encode()
+            writer.write(f"{len(frame):x}\r\n".encode() + frame + b"\r\n")
+            await writer.drain()
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+        done = b"data: [DONE]\n\n"
+        writer.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+        await writer.drain()
+
+    async def write_response(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes):
+        """Write one complete response to the connection."""
+        if method == "POST" and path.endswith("/chat/completions"):
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors_served += 1
+                await self.write_json(writer, self.error_status, {"error": {
+                    "message": "Injected upstream error", "type": "server_error", "code": None
+                }})
+                return
+            request = json.loads(body or b"{}")
+            if request.get("stream"):
+                await self.write_stream(writer, request)
+                return
+
+        status, payload = await self.handle_request(method, path, body)
+        await self.write_json(writer, status, payload)
+
+    async def write_json(self, writer: asyncio.StreamWriter, status: int, payload: Dict):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+async def _serve(args):
+    server = StubLLMServer(
+        port=args.port, latency=args.latency, token_delay=args.token_delay, distribution=args.distribution,
+        jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status
+    )
+    await server.start()
+    print(f"Stub LLM server listening on {server.base_url}")
+    await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each completion")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed tokens")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--jitter", type=float, default=0.5, help="Log-normal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of completions that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,80 @@
+"""
+Benchmark: tracing overhead.
+
+Times ``with span(...)`` outside a traced request (what every instrumented
+stage pays when TRACING_ENABLED is off) and inside one. Then drives a
+minimal ASGI app that opens ``--spans`` stage spans per request, with and
+without TracingMiddleware; the traced figure includes the Server-Timing
+header. Encoding the queued traces as OTLP/JSON happens in the writer's
+thread and is reported separately.
+
+    python -m benchmarks.tracing_bench
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from core.jsonl_writer import JsonlBatchWriter
+from functools import partial
+from core.tracing import SERVER, Span, Trace, TracingMiddleware, export_record, span
+from benchmarks.request_log_bench import per_request
+
+def per_span(samples: int) -> float:
+    start = time.perf_counter()
+    for _ in range(samples):
+        with span("stage", character="Moises"):
+            pass
+    return (time.perf_counter() - start) / samples
+
+def empty(samples: int) -> float:
+    start = time.perf_counter()
+    for _ in range(samples):
+        pass
+    return (time.perf_counter() - start) / samples
+
+def main(samples: int, requests: int, spans: int):
+    loop = empty(samples)
+    disabled = per_span(samples) - loop
+    trace = Trace("0" * 32)
+    with Span(trace, "root", SERVER, {}, None):
+        enabled = 0.0
+        for _ in range(10):
+            enabled += per_span(samples // 100) - loop
+            trace.spans.clear()
+        enabled /= 10
+    print(f"span: disabled {disabled * 1e9:.0f}ns  enabled {enabled * 1e9:.0f}ns")
+
+    async def app(scope, receive, send):
+        for index in range(spans):
+            with span("stage", index=index):
+                pass
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def traced_requests() -> float:
+        writer = JsonlBatchWriter(
+            os.path.join(tempfile.mkdtemp(prefix="traces-"), "traces.jsonl"), max_queue=requests + 1,
+            encode=partial(export_record, service_name="bench")
+        )
+        elapsed = await per_request(TracingMiddleware(app, writer=writer), requests)
+        start = time.perf_counter()
+        await writer.flush()
+        print(f"export: {(time.perf_counter() - start) / requests * 1e6:.2f}us/trace in the writer thread")
+        return elapsed
+
+    bare = asyncio.run(per_request(app, requests))
+    traced = asyncio.run(traced_requests())
+    print(
+        f"request with {spans} spans: untraced {bare * 1e6:.2f}us  traced {traced * 1e6:.2f}us  "
+        f"(+{(traced - bare) * 1e6:.2f}us/request)"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tracing overhead benchmark")
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--spans", type=int, default=8)
+    args = parser.parse_args()
+    main(args.samples, args.requests, args.spans)
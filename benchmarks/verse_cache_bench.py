@@ -0,0 +1,77 @@
+"""
+Benchmark: cached versus uncached verse explanations.
+
+Replays a Zipf-like mix of popular passages (shuffled reference order and
+spelling variants included) through ``BibleVerseService.explain_verses`` and
+reports hit rate, upstream calls and latency for hits and misses.
+
+    python -m benchmarks.verse_cache_bench --requests 1000 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+from benchmarks.fake_gateway import FakeLLMGateway
+from benchmarks.feeling_fused_bench import percentile
+from services.bible_verse import BibleVerseService
+from services.verse_cache import ExplanationCache
+
+PASSAGES = [
+    ["Josué 1:9", "Filipenses 4:13"],
+    ["Juan 3:16"],
+    ["Salmos 23:1", "Salmos 23:4"],
+    ["Romanos 8:28"],
+    ["Isaías 41:10", "Mateo 11:28"],
+    ["Proverbios 3:5", "Proverbios 3:6"],
+    ["Jeremías 29:11"],
+    ["1 Corintios 13:4"]
+]
+
+def respond(messages: List[Dict[str, str]], params: Dict) -> str:
+    return "📖 Dios está contigo en cada paso. 💡 Confía en Él hoy. 🌟 ¿Qué paso darás con fe?"
+
+def variant(passage: List[str], rng: random.Random) -> List[str]:
+    """Reorder and respell a passage the way different clients do."""
+    verses = [verse.lower() if rng.random() < 0.3 else verse for verse in passage]
+    rng.shuffle(verses)
+    return verses
+
+async def main(requests: int, latency: float, use_disk: bool):
+    rng = random.Random(11)
+    weights = [1 / (rank + 1) for rank in range(len(PASSAGES))]
+    workload = [variant(rng.choices(PASSAGES, weights)[0], rng) for _ in range(requests)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, cache in (
+            ("disabled", ExplanationCache(max_entries=0)),
+            ("enabled", ExplanationCache(directory=directory if use_disk else None))
+        ):
+            gateway = FakeLLMGateway(respond, latency=latency)
+            service = BibleVerseService(gateway, cache=cache)
+            hits: List[float] = []
+            misses: List[float] = []
+
+            for verses in workload:
+                calls = gateway.calls
+                start = time.perf_counter()
+                await service.explain_verses(verses)
+                elapsed = time.perf_counter() - start
+                (misses if gateway.calls > calls else hits).append(elapsed)
+
+            print(f"cache {label:<8} upstream calls={gateway.calls} hit rate={len(hits) / requests:.1%} stats={cache.stats()}")
+            if hits:
+                print(f"  hits   mean={statistics.mean(hits) * 1e6:8.1f}us p99={percentile(hits, 99) * 1e6:8.1f}us")
+            if misses:
+                print(f"  misses mean={statistics.mean(misses) * 1e3:8.1f}ms p99={percentile(misses, 99) * 1e3:8.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verse explanation cache benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated upstream latency in seconds")
+    parser.add_argument("--disk", action="store_true", help="Also write the on-disk tier")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.latency, args.disk))
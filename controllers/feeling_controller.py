@@ -1,12 +1,14 @@
 from services.feeling import FeelingService
 from dtos.feeling_conversation import FeelingResponse, FeelingConversation
-from typing import Optional
+from core.llm_gateway import LLMGateway
+from services.session_store import SessionStore
+from typing import Any, AsyncIterator, Optional, Tuple
 
 class FeelingController:
-    def __init__(self):
-        self.service = FeelingService()
+    def __init__(self, llm_client: LLMGateway, session_store: Optional[SessionStore] = None):
+        self.service = FeelingService(llm_client, session_store=session_store)
 
-    def process_feeling(self, conversation_id: str, feeling: str, text: str, include_svg: bool = False) -> FeelingResponse:
+    async def process_feeling(self, conversation_id: str, feeling: str, text: str, include_svg: bool = False) -> FeelingResponse:
         """
         Process a feeling message and generate a response.
         
@@ -19,14 +21,34 @@ class FeelingController:
         Returns:
             FeelingResponse: The processed feeling response
         """
-        return self.service.process_feeling(
+        return await self.service.process_feeling(
             conversation_id=conversation_id,
             feeling=feeling,
             text=text,
             include_svg=include_svg
         )
 
-    def get_conversation(self, conversation_id: str) -> FeelingConversation:
+    def stream_feeling(self, conversation_id: str, feeling: str, text: str, include_svg: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a feeling response as Server-Sent Events.
+        
+        Args:
+            conversation_id (str): The conversation ID
+            feeling (str): The feeling to process
+            text (str): The text context
+            include_svg (bool): Whether to include a motivational SVG
+            
+        Returns:
+            AsyncIterator[Tuple[str, Any]]: Stage, token and done events
+        """
+        return self.service.stream_feeling(
+            conversation_id=conversation_id,
+            feeling=feeling,
+            text=text,
+            include_svg=include_svg
+        )
+
+    async def get_conversation(self, conversation_id: str) -> Optional[FeelingConversation]:
         """
         Get a conversation by its ID.
         
@@ -36,4 +58,4 @@ class FeelingController:
         Returns:
             FeelingConversation: The conversation if found
         """
-        return self.service.get_conversation(conversation_id) 
\ No newline at end of file
+        return await self.service.get_conversation(conversation_id) 
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""
+Spanish Bible reference parser
+
+Parses references such as ``"Josué 1:9"``, ``"Fil 4:13"``, ``"1 Juan 4:7-8"``,
+``"Juan 3:16-4:2"`` or ``"Jn 3,16"`` into validated :class:`BibleReference`
+objects. Book names are matched without regard to accents, case, dots or
+spacing, through an exact alias table with a trie fallback for unambiguous
+prefixes (``"Filip"``, ``"Deuteron"``). Chapters and verses are checked
+against the versification table in :mod:`core.bible_books`.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.bible_books import BOOKS
+
+# Shortest input accepted as a book-name prefix when it is not an exact alias
+MIN_PREFIX_LENGTH = 3
+
+# Distinct book spellings remembered by BookIndex.lookup
+BOOK_MEMO_SIZE = 4096
+
+_ORDINALS = {
+    "1": "1", "i": "1", "1a": "1", "1ra": "1", "1era": "1", "1er": "1", "1o": "1",
+    "primer": "1", "primera": "1", "primero": "1",
+    "2": "2", "ii": "2", "2a": "2", "2da": "2", "2do": "2", "2o": "2", "segunda": "2", "segundo": "2",
+    "3": "3", "iii": "3", "3a": "3", "3ra": "3", "3era": "3", "3er": "3", "3o": "3",
+    "tercera": "3", "tercer": "3", "tercero": "3",
+}
+
+_DASHES = str.maketrans({"\u2013": "-", "\u2014": "-", "\u2011": "-", "\u00a0": " "})
+
+# Matched against the casefolded reference; only the book part needs accent folding
+_REFERENCE = re.compile(
+    r"^\s*(?P<book>.*?[^\W\d_].*?)\s*(?P<chapter>[0-9]+)"
+    r"(?:\s*[:.,]\s*(?P<verse>[0-9]+))?"
+    r"(?:\s*[-\u2010-\u2015]\s*(?:(?P<end_chapter>[0-9]+)\s*[:.,]\s*)?(?P<end_verse>[0-9]+))?\s*$"
+)
+
+_NUMBERED_TOKEN = re.compile(r"^([123])([a-z].*)$")
+
+def _fold(text: str) -> str:
+    """Casefold and drop accents; ASCII input skips the Unicode work entirely."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text.translate(_DASHES))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def book_key(name: str) -> str:
+    """
+    Normalize a book name or alias into its lookup key.
+
+    ``"1 Cor."``, ``"I Corintios"`` and ``"Primera de Corintios"`` all start
+    with ``"1co"``; accents, case, dots and spaces are removed.
+
+    Args:
+        name (str): Book name as written by a client or in the alias table
+
+    Returns:
+        str: Lookup key
+    """
+    tokens = _fold(name).replace(".", " ").split()
+    if not tokens:
+        return ""
+
+    numbered = _NUMBERED_TOKEN.match(tokens[0])
+    if numbered:
+        tokens[0:1] = [numbered.group(1), numbered.group(2)]
+    if len(tokens) > 1 and tokens[0] in _ORDINALS:
+        tokens[0] = _ORDINALS[tokens[0]]
+        if tokens[1] == "de" and len(tokens) > 2:
+            del tokens[1]
+    return "".join(tokens)
+
+@dataclass(frozen=True)
+class Book:
+    """One book of the canon with its chapter/verse bounds."""
+
+    index: int
+    name: str
+    verses: Tuple[int, ...]
+    # Canon-wide ordinal of verse 1 of each chapter (Génesis 1:1 is 0)
+    chapter_starts: Tuple[int, ...]
+
+    @property
+    def chapters(self) -> int:
+        return len(self.verses)
+
+    def verses_in(self, chapter: int) -> int:
+        return self.verses[chapter - 1]
+
+    def ordinal(self, chapter: int, verse: int) -> int:
+        return self.chapter_starts[chapter - 1] + verse - 1
+
+@dataclass(frozen=True)
+class BibleReference:
+    """A validated, inclusive verse range inside one book."""
+
+    book: Book
+    start_chapter: int
+    start_verse: int
+    end_chapter: int
+    end_verse: int
+
+    @property
+    def is_single_verse(self) -> bool:
+        return self.start_chapter == self.end_chapter and self.start_verse == self.end_verse
+
+    def _covers_whole_chapters(self) -> bool:
+        return (
+            self.book.chapters > 1
+            and self.start_verse == 1
+            and self.end_verse == self.book.verses_in(self.end_chapter)
+        )
+
+    def canonical(self) -> str:
+        """
+        Canonical Spanish form of the reference.
+
+        Returns:
+            str: e.g. ``"Juan 3:16"``, ``"Juan 3:16-18"``, ``"Juan 3:16-4:2"``, ``"Salmos 23"`` or ``"Mateo 5-7"``
+        """
+        if self._covers_whole_chapters():
+            if self.start_chapter == self.end_chapter:
+                return f"{self.book.name} {self.start_chapter}"
+            return f"{self.book.name} {self.start_chapter}-{self.end_chapter}"
+        start = f"{self.book.name} {self.start_chapter}:{self.start_verse}"
+        if self.is_single_verse:
+            return start
+        if self.start_chapter == self.end_chapter:
+            return f"{start}-{self.end_verse}"
+        return f"{start}-{self.end_chapter}:{self.end_verse}"
+
+    def expand(self) -> Iterator[Tuple[int, int]]:
+        """
+        Iterate over every verse in the range.
+
+        Yields:
+            Tuple[int, int]: (chapter, verse) pairs in canonical order
+        """
+        for chapter in range(self.start_chapter, self.end_chapter + 1):
+            first = self.start_verse if chapter == self.start_chapter else 1
+            last = self.end_verse if chapter == self.end_chapter else self.book.verses_in(chapter)
+            for verse in range(first, last + 1):
+                yield chapter, verse
+
+    @property
+    def first_ordinal(self) -> int:
+        return self.book.ordinal(self.start_chapter, self.start_verse)
+
+    @property
+    def last_ordinal(self) -> int:
+        return self.book.ordinal(self.end_chapter, self.end_verse)
+
+    def verse_count(self) -> int:
+        return self.last_ordinal - self.first_ordinal + 1
+
+    def __str__(self) -> str:
+        return self.canonical()
+
+class BookIndex:
+    """Compiled book-name lookup: exact alias table plus a prefix trie."""
+
+    def __init__(self, books: Iterable[Tuple[str, Tuple[str, ...], Tuple[int, ...]]]):
+        """
+        Compile the alias table and trie.
+
+        Args:
+            books (Iterable): Rows of (canonical name, aliases, verses per chapter)
+
+        Raises:
+            ValueError: If two books share an alias
+        """
+        self.books: List[Book] = []
+        self._aliases: Dict[str, Book] = {}
+        # Each trie node is (children, indexes of books reachable below it)
+        self._trie: Tuple[Dict[str, tuple], set] = ({}, set())
+        # Resolved client spellings; clients reuse a small vocabulary
+        self._memo: Dict[str, Optional[Book]] = {}
+
+        self.total_verses = 0
+        for index, (name, aliases, verses) in enumerate(books):
+            chapter_starts = []
+            for count in verses:
+                chapter_starts.append(self.total_verses)
+                self.total_verses += count
+            book = Book(index=index, name=name, verses=tuple(verses), chapter_starts=tuple(chapter_starts))
+            self.books.append(book)
+            for alias in (name, *aliases):
+                key = book_key(alias)
+                existing = self._aliases.get(key)
+                if existing is not None and existing is not book:
+                    raise ValueError(f"Alias '{alias}' is used by both {existing.name} and {name}")
+                self._aliases[key] = book
+                self._insert(key, index)
+
+    def _insert(self, key: str, index: int):
+        node = self._trie
+        node[1].add(index)
+        for char in key:
+            node = node[0].setdefault(char, ({}, set()))
+            node[1].add(index)
+
+    def lookup(self, name: str) -> Optional[Book]:
+        """
+        Resolve a book name, alias or unambiguous prefix.
+
+        Args:
+            name (str): Book name as written by the client
+
+        Returns:
+            Optional[Book]: The matching book, or None if unknown or ambiguous
+        """
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+
+        book = self._resolve(book_key(name))
+        if len(self._memo) < BOOK_MEMO_SIZE:
+            self._memo[name] = book
+        return book
+
+    def _resolve(self, key: str) -> Optional[Book]:
+        book = self._aliases.get(key)
+        if book is not None or len(key) < MIN_PREFIX_LENGTH:
+            return book
+
+        node = self._trie
+        for char in key:
+            node = node[0].get(char)
+            if node is None:
+                return None
+        if len(node[1]) == 1:
+            return self.books[next(iter(node[1]))]
+        return None
+
+    def parse(self, text: str) -> BibleReference:
+        """
+        Parse and validate a single reference.
+
+        In single-chapter books (Abdías, Filemón, 2-3 Juan, Judas) a lone
+        number is a verse, so ``"Judas 3"`` means ``"Judas 1:3"``.
+
+        Args:
+            text (str): Reference such as ``"Fil 4:13"`` or ``"Juan 3:16-18"``
+
+        Returns:
+            BibleReference: The validated reference
+
+        Raises:
+            ValueError: If the format, book, chapter or verse is invalid
+        """
+        match = _REFERENCE.match(text.casefold())
+        if match is None:
+            raise ValueError(f"Invalid Bible reference format: '{text}'")
+
+        book_name, chapter, verse, end_chapter, end_verse = match.groups()
+        book = self.lookup(book_name)
+        if book is None:
+            raise ValueError(f"Unknown Bible book in reference: '{text}'")
+
+        verses = book.verses
+        chapter = int(chapter)
+        if verse is None and end_chapter is None and len(verses) == 1:
+            # "Judas 3" / "Judas 3-5"
+            start_chapter, start_verse = 1, chapter
+            end_chapter, end_verse = 1, int(end_verse) if end_verse else chapter
+        elif verse is None:
+            if end_chapter is not None:
+                raise ValueError(f"Invalid Bible reference format: '{text}'")
+            # "Salmos 23" / "Mateo 5-7": whole chapters
+            start_chapter, start_verse = chapter, 1
+            end_chapter = int(end_verse) if end_verse else chapter
+            end_verse = verses[end_chapter - 1] if 1 <= end_chapter <= len(verses) else 1
+        else:
+            start_chapter, start_verse = chapter, int(verse)
+            if end_verse is None:
+                end_chapter, end_verse = start_chapter, start_verse
+            else:
+                end_chapter = int(end_chapter) if end_chapter else start_chapter
+                end_verse = int(end_verse)
+
+        for chapter_number, verse_number in ((start_chapter, start_verse), (end_chapter, end_verse)):
+            if not 1 <= chapter_number <= len(verses):
+                raise ValueError(
+                    f"{book.name} has {len(verses)} chapters; chapter {chapter_number} in '{text}' does not exist"
+                )
+            if not 1 <= verse_number <= verses[chapter_number - 1]:
+                raise ValueError(
+                    f"{book.name} {chapter_number} has {verses[chapter_number - 1]} verses; "
+                    f"verse {verse_number} in '{text}' does not exist"
+                )
+        if (end_chapter, end_verse) < (start_chapter, start_verse):
+            raise ValueError(f"Bible reference range ends before it starts: '{text}'")
+
+        return BibleReference(book, start_chapter, start_verse, end_chapter, end_verse)
+
+BOOK_INDEX = BookIndex(BOOKS)
+
+def parse_reference(text: str) -> BibleReference:
+    """
+    Parse and validate one reference with the default book index.
+
+    Args:
+        text (str): Reference such as ``"Josue 1:9"``
+
+    Returns:
+        BibleReference: The validated reference
+
+    Raises:
+        ValueError: If the reference is malformed or out of bounds
+    """
+    return BOOK_INDEX.parse(text)
+
+def parse_references(texts: Iterable[str]) -> List[BibleReference]:
+    """
+    Parse several references, reporting every invalid one at once.
+
+    Args:
+        texts (Iterable[str]): References as sent by the client
+
+    Returns:
+        List[BibleReference]: Validated references in input order
+
+    Raises:
+        ValueError: If any reference is invalid; the message lists all of them
+    """
+    references = []
+    errors = []
+    for text in texts:
+        try:
+            references.append(BOOK_INDEX.parse(text))
+        except ValueError as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError("; ".join(errors))
+    return references
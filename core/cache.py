@@ -0,0 +1,144 @@
+"""
+In-process and on-disk caches shared by the services.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Generic, Hashable, Optional, TypeVar
+from core.request_log import record_cache_hit
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+class LRUCache(Generic[V]):
+    """Bounded LRU cache with an optional per-entry time-to-live and hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            max_entries (int): Maximum number of entries kept before evicting the least recently used
+            ttl_seconds (Optional[float]): Seconds an entry stays valid, or None to never expire
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not None
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[V]:
+        """
+        Get a value and mark it as recently used.
+
+        Args:
+            key (Hashable): Cache key
+            count (bool): Whether the lookup updates the hit/miss counters
+
+        Returns:
+            Optional[V]: The cached value, or None if missing or expired
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            if count:
+                self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            if count:
+                self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+            record_cache_hit()
+        return value
+
+    def set(self, key: Hashable, value: V):
+        """Store a value, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        entry = self._entries.pop(key, None)
+        return entry[0] if entry else None
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+class DiskCache:
+    """JSON-file cache tier so entries survive restarts; one file per key."""
+
+    def __init__(self, directory: str, ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            directory (str): Directory holding the cache files
+            ttl_seconds (Optional[float]): Seconds an entry stays valid, or None to never expire
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Read a value, returning None if missing, expired or unreadable."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache file {path}: {e}")
+            return None
+
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any):
+        """Write a value atomically (temporary file + rename)."""
+        path = self._path(key)
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        tmp_path = None
+        try:
+            # A temporary file of its own, so concurrent writers of the key never share one
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f"{path.stem}.", suffix=".tmp")
+            with open(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "value": value, "expires_at": expires_at}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache file {path}: {e}")
+            if tmp_path is not None:
+                Path(tmp_path).unlink(missing_ok=True)
@@ -2,11 +2,14 @@
 Core dependencies for the application.
 """
 
+import hmac
 import os
+from typing import Any, Dict
 from dotenv import load_dotenv
-from openai import OpenAI
 from fastapi import Request, Response, HTTPException, Security, Depends
 from fastapi.security.api_key import APIKeyHeader
+from core.llm_cassette import CassetteGateway
+from core.llm_gateway import LLMGateway
 
 # Load environment variables
 load_dotenv()
@@ -42,14 +45,37 @@ def get_api_key():
     
     return validate_api_key
 
-def get_llm_client():
+def has_valid_api_key(scope: Dict[str, Any]) -> bool:
+    """
+    Check the API key of a raw ASGI request, for middleware that runs before the dependency.
+
+    Args:
+        scope (Dict[str, Any]): ASGI HTTP scope
+
+    Returns:
+        bool: Whether the X-API-Key header matches API_KEY
+    """
+    api_key = os.getenv("API_KEY")
+    if not api_key:
+        return False
+    header = API_KEY_NAME.lower().encode()
+    for name, value in scope.get("headers", ()):
+        if name == header:
+            return hmac.compare_digest(value, api_key.encode())
+    return False
+
+def get_llm_client() -> LLMGateway:
     """
     Get an instance of the LLM client.
     
+    The returned gateway owns a pooled connection to the upstream API and is
+    meant to be built once per application and shared by every agent. With
+    LLM_CASSETTE_MODE=record or replay it records or replays cassettes
+    (see core.llm_cassette).
+    
     Returns:
-        OpenAI: Configured OpenAI client
+        LLMGateway: Configured pooled LLM gateway
     """
-    return OpenAI(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        base_url=os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
-    ) 
\ No newline at end of file
+    if os.getenv("LLM_CASSETTE_MODE", "off").lower() != "off":
+        return CassetteGateway.from_env()
+    return LLMGateway.from_env() 
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""
+Batched JSON-lines writer.
+
+Records are handed to :meth:`JsonlBatchWriter.write`, which only appends to a
+bounded in-memory buffer and never waits: when the buffer is full the record
+is dropped and counted instead. A background task serializes and appends the
+buffer in batches from a worker thread, every ``flush_interval`` seconds or
+as soon as ``batch_size`` records are waiting, and rotates the file
+(``path`` -> ``path.1`` -> ... ``path.<backups>``) once it outgrows
+``max_bytes`` or gets older than ``rotate_seconds``.
+
+Each writer assumes it is the only one rotating its file; with several worker
+processes, put ``{pid}`` in the path to give each its own. The pid is taken
+when the writer starts, so workers forked after import get their own too.
+"""
+
+import asyncio
+import json
+import os
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JsonlBatchWriter:
+    """Append JSON lines to a file in background batches, dropping under backpressure."""
+
+    def __init__(
+        self,
+        path: str,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_bytes: int = 50 * 1024 * 1024,
+        rotate_seconds: Optional[float] = 24 * 3600,
+        backups: int = 5,
+        encode: Optional[Callable[[Any], Dict[str, Any]]] = None
+    ):
+        """
+        Args:
+            path (str): File the lines are appended to; ``{pid}`` is replaced by the process id
+            max_queue (int): Records buffered before new ones are dropped
+            batch_size (int): Buffered records that trigger a flush before the interval
+            flush_interval (float): Seconds between flushes
+            max_bytes (int): File size that triggers a rotation
+            rotate_seconds (Optional[float]): File age that triggers a rotation, or None for size only
+            backups (int): Rotated files kept
+            encode (Optional[Callable[[Any], Dict[str, Any]]]): Turns queued records into
+                JSON-serializable dicts in the writer thread, keeping that work off the event loop
+        """
+        self.path_template = path
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backups = backups
+        self.encode = encode
+        self._buffer: List[Any] = []
+        # Records handed to the worker thread but not yet written; they count against max_queue
+        self._inflight = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._opened_at = time.time()
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(
+        cls,
+        prefix: str,
+        path: str,
+        encode: Optional[Callable[[Any], Dict[str, Any]]] = None
+    ) -> "JsonlBatchWriter":
+        """
+        Build a writer from ``<prefix>_*`` environment variables.
+
+        ``<prefix>_FILE`` overrides ``path``; ``_MAX_QUEUE``, ``_BATCH_SIZE``,
+        ``_FLUSH_MS``, ``_MAX_BYTES``, ``_ROTATE_SECONDS`` (0 to rotate by size
+        only) and ``_BACKUPS`` override the other settings.
+
+        Args:
+            prefix (str): Environment variable prefix, e.g. "REQUEST_LOG"
+            path (str): Default file path
+            encode (Optional[Callable[[Any], Dict[str, Any]]]): Record encoder, see the constructor
+
+        Returns:
+            JsonlBatchWriter: The configured writer
+        """
+        rotate_seconds = float(os.getenv(f"{prefix}_ROTATE_SECONDS", str(24 * 3600)))
+        return cls(
+            path=os.getenv(f"{prefix}_FILE", path),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", "10000")),
+            batch_size=int(os.getenv(f"{prefix}_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv(f"{prefix}_FLUSH_MS", "1000")) / 1000,
+            max_bytes=int(os.getenv(f"{prefix}_MAX_BYTES", str(50 * 1024 * 1024))),
+            rotate_seconds=rotate_seconds if rotate_seconds > 0 else None,
+            backups=int(os.getenv(f"{prefix}_BACKUPS", "5")),
+            encode=encode
+        )
+
+    def write(self, record: Any) -> bool:
+        """
+        Queue a record without blocking.
+
+        Args:
+            record (Any): JSON-serializable dict, or anything ``encode`` accepts; it must not
+                be changed afterwards
+
+        Returns:
+            bool: False if the queue was full and the record was dropped
+        """
+        if len(self._buffer) + self._inflight >= self.max_queue:
+            self.dropped += 1
+            return False
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        """Start flushing in the background."""
+        if self._task is None:
+            self.path = self.path_template.replace("{pid}", str(os.getpid()))
+            self._wakeup = asyncio.Event()
+            self._closing = False
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background task and write whatever is still queued."""
+        if self._task is not None:
+            # Let the loop finish its current batch rather than cancelling it mid-write
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        if self.dropped:
+            logger.warning(f"{self.path}: {self.dropped} records dropped under backpressure")
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Error writing {self.path}: {e}")
+
+    async def flush(self):
+        """Write every queued record."""
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        self._inflight = len(batch)
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        finally:
+            self._inflight = 0
+
+    def _write_batch(self, batch: List[Any]):
+        if self.encode is not None:
+            batch = [self.encode(record) for record in batch]
+        lines = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in batch)
+        self._rotate_if_needed()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        self.written += len(batch)
+
+    def _rotate_if_needed(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            self._opened_at = time.time()
+            return
+        expired = self.rotate_seconds is not None and time.time() - self._opened_at > self.rotate_seconds
+        if size < self.max_bytes and not (expired and size):
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{index}"):
+                os.replace(f"{self.path}.{index}", f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._opened_at = time.time()
+        self.rotations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "queued": len(self._buffer) + self._inflight,
+            "written": self.written,
+            "dropped": self.dropped,
+            "rotations": self.rotations,
+            "errors": self.errors
+        }
@@ -0,0 +1,196 @@
+"""
+LLM cassettes
+
+Record upstream chat completions to files and replay them, so the app, its
+benchmarks and profiling runs work offline and give the same answers on
+every run. LLM_CASSETTE_MODE selects what ``get_llm_client`` builds:
+
+- ``off`` (default): the live upstream
+- ``record``: the live upstream, saving every successful completion and its timing
+- ``replay``: answers from the saved completions only; no upstream and no API key
+
+Cassettes live in LLM_CASSETTE_DIR (default ``cassettes``), one JSON file per
+request. Requests are keyed by a SHA-256 of the canonical JSON of the model,
+the messages and the completion parameters. The JSON has sorted keys, and
+transport-only parameters such as ``timeout`` are dropped, so the same
+request finds the same file however its parameters were passed.
+
+A request recorded several times keeps every response, e.g. a retry with the
+same prompt or a repeated chat turn. Replay hands the responses out in the
+order they were recorded and starts over after the last one. Only complete
+responses are recorded: failed calls and streams the client abandoned are
+not.
+
+Replay answers at once unless LLM_CASSETTE_LATENCY is set. It scales the
+recorded delays: 1 reproduces them, and for streams that goes chunk by chunk,
+so latency experiments can be repeated exactly. A request with no cassette
+fails with CassetteMissError.
+
+Cassettes plug in below the gateway's metrics, spans and request log, which
+behave exactly as they do against the upstream.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from core.cache import DiskCache
+from core.llm_gateway import LLMGateway
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay")
+
+# Parameters that change how a request travels, not what the model answers
+_TRANSPORT_PARAMS = frozenset({"timeout", "extra_headers", "extra_query", "extra_body", "user"})
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+def cassette_request(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The parts of a completion request that decide its answer.
+
+    Args:
+        model (str): Model name
+        messages (List[Dict[str, str]]): Chat messages in OpenAI format
+        params (Dict[str, Any]): Completion parameters, ``stream`` included
+
+    Returns:
+        Dict[str, Any]: Model, messages and the parameters that are set, without transport-only ones
+    """
+    kept = {name: value for name, value in params.items() if name not in _TRANSPORT_PARAMS and value is not None}
+    return {"model": model, "messages": messages, "params": kept}
+
+def cassette_key(request: Dict[str, Any]) -> str:
+    """
+    Hash a request from :func:`cassette_request`.
+
+    Args:
+        request (Dict[str, Any]): Normalized request
+
+    Returns:
+        str: SHA-256 hex digest of its canonical JSON
+    """
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class CassetteGateway(LLMGateway):
+    """LLMGateway that records completions to cassettes or replays them instead of calling the upstream."""
+
+    def __init__(self, mode: str, directory: str = "cassettes", latency_scale: float = 0.0, api_key: str = "replay", **kwargs):
+        """
+        Args:
+            mode (str): "record" or "replay"
+            directory (str): Directory holding the cassette files
+            latency_scale (float): Share of the recorded delays replay waits, 0 to answer at once
+            api_key (str): API key for the upstream; unused when replaying
+            **kwargs: Pool settings passed to LLMGateway
+
+        Raises:
+            ValueError: If the mode is not "record" or "replay"
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"CassetteGateway mode must be 'record' or 'replay', got {mode!r}")
+        super().__init__(api_key=api_key, **kwargs)
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.cassettes = DiskCache(directory)
+        self._entries: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._played: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CassetteGateway":
+        """
+        Build a gateway from ``LLM_CASSETTE_*`` variables, plus the upstream ones when recording.
+
+        Returns:
+            CassetteGateway: Gateway in LLM_CASSETTE_MODE
+
+        Raises:
+            ValueError: If the mode is not "record" or "replay", or recording without OPENAI_API_KEY
+        """
+        mode = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+        api_key = os.getenv("OPENAI_API_KEY")
+        if mode == "record" and not api_key:
+            logger.error("OPENAI_API_KEY not found in environment variables")
+            raise ValueError("OPENAI_API_KEY environment variable is required to record cassettes")
+
+        return cls(
+            mode=mode,
+            directory=os.getenv("LLM_CASSETTE_DIR", "cassettes"),
+            latency_scale=float(os.getenv("LLM_CASSETTE_LATENCY", "0")),
+            api_key=api_key or "replay",
+            **cls.pool_settings_from_env()
+        )
+
+    async def start(self):
+        """Pre-warm the pool when recording; replay never connects."""
+        if self.mode == "record":
+            await super().start()
+        logger.info(f"LLM cassettes: {self.mode} in {self.cassettes.directory}")
+
+    async def _create(self, model: str, messages: List[Dict[str, str]], **params) -> Any:
+        request = cassette_request(model, messages, params)
+        key = cassette_key(request)
+        if self.mode == "replay":
+            return await self._replay(key, model, params.get("stream", False))
+
+        start = time.perf_counter()
+        response = await super()._create(model, messages, **params)
+        if params.get("stream"):
+            return self._record_stream(key, request, response, start)
+        await self._save(key, request, {"latency": time.perf_counter() - start, "response": response.model_dump(mode="json")})
+        return response
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        if key not in self._entries:
+            self._entries[key] = await asyncio.to_thread(self.cassettes.get, key)
+        return self._entries[key]
+
+    async def _save(self, key: str, request: Dict[str, Any], interaction: Dict[str, Any]):
+        # One writer at a time, so concurrent recordings of the same request all land in its file
+        async with self._lock:
+            entry = await self._load(key) or {"request": request, "interactions": []}
+            entry["interactions"].append(interaction)
+            self._entries[key] = entry
+            await asyncio.to_thread(self.cassettes.set, key, entry)
+
+    async def _record_stream(
+        self, key: str, request: Dict[str, Any], stream: AsyncIterator[ChatCompletionChunk], start: float
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        chunks = []
+        async for chunk in stream:
+            chunks.append({"offset": time.perf_counter() - start, "chunk": chunk.model_dump(mode="json")})
+            yield chunk
+        await self._save(key, request, {"latency": time.perf_counter() - start, "chunks": chunks})
+
+    async def _replay(self, key: str, model: str, stream: bool) -> Any:
+        entry = await self._load(key)
+        if not entry:
+            raise CassetteMissError(
+                f"No cassette for this {model} request (key {key}) in {self.cassettes.directory}; "
+                "record it with LLM_CASSETTE_MODE=record"
+            )
+        played = self._played.get(key, 0)
+        self._played[key] = played + 1
+        interaction = entry["interactions"][played % len(entry["interactions"])]
+
+        if stream:
+            return self._replay_stream(interaction)
+        if self.latency_scale:
+            await asyncio.sleep(interaction["latency"] * self.latency_scale)
+        return ChatCompletion.model_validate(interaction["response"])
+
+    async def _replay_stream(self, interaction: Dict[str, Any]) -> AsyncIterator[ChatCompletionChunk]:
+        previous = 0.0
+        for recorded in interaction["chunks"]:
+            if self.latency_scale:
+                await asyncio.sleep((recorded["offset"] - previous) * self.latency_scale)
+            previous = recorded["offset"]
+            yield ChatCompletionChunk.model_validate(recorded["chunk"])
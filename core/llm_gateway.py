@@ -0,0 +1,228 @@
+"""
+Shared asynchronous LLM gateway.
+
+Every agent talks to the upstream OpenAI-compatible API through one
+``AsyncOpenAI`` client backed by a single pooled ``httpx.AsyncClient``, so
+TCP/TLS connections are reused across calls instead of being opened per
+request.
+"""
+
+import asyncio
+import os
+import time
+import logging
+from typing import Any, AsyncIterator, Dict, List
+import httpx
+from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+from core.metrics import metrics
+from core.request_log import record_llm_call
+from core.tracing import CLIENT, span
+from core.tokens import count_message_tokens, count_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+LLM_REQUESTS = metrics.counter("llm_requests_total", "Upstream LLM calls by agent and outcome", ("agent", "outcome"))
+LLM_LATENCY = metrics.histogram("llm_request_duration_seconds", "Upstream LLM call latency, until the last token of a stream", ("agent",))
+LLM_FIRST_TOKEN = metrics.histogram("llm_time_to_first_token_seconds", "Time until a stream's first content delta", ("agent",))
+LLM_TOKENS = metrics.counter("llm_tokens_total", "Tokens sent and received by agent; counted locally for streams", ("agent", "kind"))
+
+class LLMGateway:
+    """Pooled async client used by every agent for chat completions."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.openai.com/v1",
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+        warm_connections: int = 2
+    ):
+        """
+        Initialize the gateway and its connection pool.
+
+        Args:
+            api_key (str): API key for the upstream provider
+            base_url (str): Base URL of the OpenAI-compatible API
+            max_connections (int): Maximum number of concurrent upstream connections
+            max_keepalive_connections (int): Idle connections kept open for reuse
+            keepalive_expiry (float): Seconds an idle connection is kept alive
+            timeout (float): Default request timeout in seconds
+            warm_connections (int): Connections opened eagerly by :meth:`start`
+        """
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.warm_connections = warm_connections
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(timeout, connect=10.0)
+        )
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=self.base_url,
+            http_client=self.http_client
+        )
+
+    @classmethod
+    def from_env(cls) -> "LLMGateway":
+        """
+        Build a gateway from environment variables.
+
+        Returns:
+            LLMGateway: Gateway configured from ``OPENAI_*`` and ``LLM_*`` variables
+
+        Raises:
+            ValueError: If OPENAI_API_KEY is not configured
+        """
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            logger.error("OPENAI_API_KEY not found in environment variables")
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+
+        return cls(api_key=api_key, **cls.pool_settings_from_env())
+
+    @staticmethod
+    def pool_settings_from_env() -> Dict:
+        """Upstream URL and pool settings from ``OPENAI_API_BASE`` and ``LLM_*`` variables."""
+        return {
+            "base_url": os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1"),
+            "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+            "max_keepalive_connections": int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            "keepalive_expiry": float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60")),
+            "timeout": float(os.getenv("LLM_TIMEOUT", "60")),
+            "warm_connections": int(os.getenv("LLM_WARM_CONNECTIONS", "2"))
+        }
+
+    async def start(self):
+        """Pre-warm the pool by opening ``warm_connections`` connections concurrently."""
+        if self.warm_connections <= 0:
+            return
+
+        url = f"{self.base_url}/models"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        results = await asyncio.gather(
+            *(self.http_client.get(url, headers=headers) for _ in range(self.warm_connections)),
+            return_exceptions=True
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.warning(f"Could not pre-warm {len(failures)} upstream connections: {failures[0]}")
+        logger.info(f"LLM gateway warmed {len(results) - len(failures)} connections to {self.base_url}")
+
+    async def close(self):
+        """Close every pooled connection."""
+        await self.client.close()
+        logger.info("LLM gateway closed")
+
+    async def _create(self, model: str, messages: List[Dict[str, str]], **params) -> Any:
+        """
+        Send one chat completion request upstream.
+
+        Returns:
+            Any: A ChatCompletion, or an async iterator of ChatCompletionChunk when ``stream`` is set
+        """
+        return await self.client.chat.completions.create(model=model, messages=messages, **params)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        agent: str = "default",
+        **params
+    ) -> ChatCompletion:
+        """
+        Run a chat completion through the shared pool.
+
+        Args:
+            messages (List[Dict[str, str]]): Chat messages in OpenAI format
+            model (str): Model name
+            agent (str): Caller the call is reported under in the metrics
+            **params: Extra completion parameters (temperature, max_tokens, timeout...)
+
+        Returns:
+            ChatCompletion: The upstream completion
+        """
+        with span("llm", CLIENT, agent=agent, model=model) as llm_span:
+            start = time.perf_counter()
+            try:
+                response = await self._create(model, messages, **params)
+            except asyncio.CancelledError:
+                LLM_REQUESTS.labels(agent, "cancelled").inc()
+                raise
+            except Exception:
+                LLM_REQUESTS.labels(agent, "error").inc()
+                raise
+            LLM_LATENCY.labels(agent).observe(time.perf_counter() - start)
+            LLM_REQUESTS.labels(agent, "ok").inc()
+            usage = response.usage
+            prompt_tokens = usage.prompt_tokens if usage else 0
+            completion_tokens = usage.completion_tokens if usage else 0
+            LLM_TOKENS.labels(agent, "prompt").inc(prompt_tokens)
+            LLM_TOKENS.labels(agent, "completion").inc(completion_tokens)
+            record_llm_call(prompt_tokens, completion_tokens)
+            llm_span.set("gen_ai.usage.input_tokens", prompt_tokens)
+            llm_span.set("gen_ai.usage.output_tokens", completion_tokens)
+            return response
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        agent: str = "default",
+        **params
+    ) -> AsyncIterator[str]:
+        """
+        Run a streaming chat completion through the shared pool.
+
+        Args:
+            messages (List[Dict[str, str]]): Chat messages in OpenAI format
+            model (str): Model name
+            agent (str): Caller the call is reported under in the metrics
+            **params: Extra completion parameters (temperature, max_tokens, timeout...)
+
+        Yields:
+            str: Content deltas as they arrive from the upstream
+        """
+        with span("llm", CLIENT, agent=agent, model=model, stream=True) as llm_span:
+            start = time.perf_counter()
+            try:
+                stream = await self._create(model, messages, stream=True, **params)
+            except asyncio.CancelledError:
+                LLM_REQUESTS.labels(agent, "cancelled").inc()
+                raise
+            except Exception:
+                LLM_REQUESTS.labels(agent, "error").inc()
+                raise
+            deltas = []
+            outcome = "error"
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not deltas:
+                            LLM_FIRST_TOKEN.labels(agent).observe(time.perf_counter() - start)
+                        deltas.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+                outcome = "ok"
+            except (GeneratorExit, asyncio.CancelledError):
+                # The client went away mid-stream
+                outcome = "cancelled"
+                raise
+            finally:
+                LLM_LATENCY.labels(agent).observe(time.perf_counter() - start)
+                LLM_REQUESTS.labels(agent, outcome).inc()
+                # Streams carry no usage, so the request log and metrics get counted tokens
+                prompt_tokens = count_message_tokens(messages, model)
+                completion_tokens = count_tokens("".join(deltas), model)
+                LLM_TOKENS.labels(agent, "prompt").inc(prompt_tokens)
+                LLM_TOKENS.labels(agent, "completion").inc(completion_tokens)
+                record_llm_call(prompt_tokens, completion_tokens)
+                llm_span.set("gen_ai.usage.input_tokens", prompt_tokens)
+                llm_span.set("gen_ai.usage.output_tokens", completion_tokens)
@@ -0,0 +1,401 @@
+"""
+Prometheus metrics
+
+Counters, gauges and histograms kept in plain Python objects and rendered in
+the Prometheus text format by ``GET /metrics``. Recording is a dict lookup
+and a list increment with no locks: every sample is recorded from the event
+loop thread, and a scrape renders on that same thread. Histograms keep one
+count per bucket and are only made cumulative when rendered.
+
+Values that already live elsewhere (store sizes, cache counters) are not
+mirrored on every change. They are read by collectors when /metrics is
+scraped, so they cost nothing on the request path.
+
+Metrics are per worker process; with several uvicorn workers each scrape
+sees the worker that served it.
+
+LoopLagMonitor samples how late the event loop wakes a sleeping task every
+LOOP_LAG_INTERVAL_MS (default 50, 0 to disable), so code that blocks the
+loop shows up in ``event_loop_lag_seconds`` rather than only as slow
+requests.
+
+/metrics does not go through the API key dependency, so Prometheus needs no
+application key. Set METRICS_API_KEY to require ``Authorization: Bearer
+<key>`` on it instead, and METRICS_ENABLED=0 to remove it.
+"""
+
+import asyncio
+import hmac
+import logging
+import math
+import os
+import resource
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from core.request_log import matched_route
+
+logger = logging.getLogger(__name__)
+
+# Seconds; LLM routes take seconds, cached and static ones a few milliseconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Any other method is counted as "OTHER", so clients cannot create label values
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"})
+
+class Counter:
+    """Monotonic count of one label set."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+class Gauge:
+    """Value of one label set that goes up and down."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+class Histogram:
+    """Distribution of one label set over fixed bucket bounds."""
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # counts[i] holds samples in (bounds[i - 1], bounds[i]]; the last one is +Inf
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+class MetricFamily:
+    """A named metric and its children, one per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str], factory: Callable[[], Any]):
+        """
+        Args:
+            name (str): Metric name
+            documentation (str): HELP text
+            kind (str): "counter", "gauge" or "histogram"
+            labelnames (Sequence[str]): Label names, in the order values are passed to :meth:`labels`
+            factory (Callable[[], Any]): Builds the child of a new label set
+        """
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: str) -> Any:
+        """
+        Get the child of a label set, creating it on first use.
+
+        Callers on hot paths can keep the child instead of looking it up per sample.
+
+        Args:
+            *values (str): One value per label name
+
+        Returns:
+            Counter | Gauge | Histogram: The child
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._factory()
+        return child
+
+    def render(self, lines: List[str]):
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, child in list(self._children.items()):
+            labels = _labels(self.labelnames, values)
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_braces(labels)} {_number(child.value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(child.bounds + (math.inf,), child.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_braces(labels + [f'le={_quote(_number(bound))}'])} {cumulative}")
+            lines.append(f"{self.name}_sum{_braces(labels)} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{_braces(labels)} {cumulative}")
+
+CollectorValue = Union[float, Dict[Tuple[str, ...], float]]
+
+class MetricsRegistry:
+    """Every metric of the process, rendered together."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        # name -> (documentation, kind, labelnames, read)
+        self._collectors: Dict[str, Tuple[str, str, Tuple[str, ...], Callable[[], CollectorValue]]] = {}
+
+    def _family(self, name: str, documentation: str, kind: str, labelnames: Sequence[str], factory) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(name, documentation, kind, labelnames, factory)
+        elif family.kind != kind or family.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered as a {family.kind} with labels {family.labelnames}")
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Register (or get) a counter; by convention its name ends in ``_total``."""
+        return self._family(name, documentation, "counter", labelnames, Counter)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Register (or get) a gauge."""
+        return self._family(name, documentation, "gauge", labelnames, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> MetricFamily:
+        """Register (or get) a histogram with the given upper bucket bounds."""
+        bounds = tuple(sorted(buckets))
+        return self._family(name, documentation, "histogram", labelnames, lambda: Histogram(bounds))
+
+    def collect(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], CollectorValue],
+        kind: str = "gauge",
+        labelnames: Sequence[str] = ()
+    ):
+        """
+        Register a metric read from elsewhere when /metrics is scraped.
+
+        Registering a name again replaces its collector.
+
+        Args:
+            name (str): Metric name
+            documentation (str): HELP text
+            read (Callable[[], CollectorValue]): Returns the value, or a dict of
+                label values to value when ``labelnames`` is set
+            kind (str): "gauge" or "counter"
+            labelnames (Sequence[str]): Label names of the dict keys
+        """
+        self._collectors[name] = (documentation, kind, tuple(labelnames), read)
+
+    def remove_collectors(self, prefix: str = ""):
+        """Drop the collectors whose names start with ``prefix``, e.g. when their services stop."""
+        for name in [name for name in self._collectors if name.startswith(prefix)]:
+            del self._collectors[name]
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Returns:
+            str: The exposition, newline terminated
+        """
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            family.render(lines)
+        for name, (documentation, kind, labelnames, read) in list(self._collectors.items()):
+            value = read()
+            samples = value if isinstance(value, dict) else {(): value}
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for values, sample in samples.items():
+                lines.append(f"{name}{_braces(_labels(labelnames, values))} {_number(sample)}")
+        lines.append("")
+        return "\n".join(lines)
+
+class ThreadedReading:
+    """
+    Collector for a value too slow to compute on the event loop.
+
+    Reading it returns the last value computed and, when that is older than
+    ``max_age``, starts computing a new one in a thread. A scrape therefore
+    never waits, and it sees values up to one scrape interval stale. Before
+    the first computation finishes there are no samples.
+    """
+
+    def __init__(self, compute: Callable[[], CollectorValue], max_age: float = 15.0):
+        """
+        Args:
+            compute (Callable[[], CollectorValue]): Computes the value; runs in a worker thread
+            max_age (float): Seconds a value is served before a read refreshes it
+        """
+        self.compute = compute
+        self.max_age = max_age
+        self.value: CollectorValue = {}
+        self.updated = -math.inf
+        self._task: Optional[asyncio.Task] = None
+
+    def __call__(self) -> CollectorValue:
+        if self._task is None and time.monotonic() - self.updated > self.max_age:
+            self._task = asyncio.get_running_loop().create_task(self._refresh())
+        return self.value
+
+    async def _refresh(self):
+        try:
+            self.value = await asyncio.to_thread(self.compute)
+            self.updated = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Could not refresh a threaded metric reading: {e}")
+        finally:
+            self._task = None
+
+def _quote(value: str) -> str:
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+def _labels(names: Tuple[str, ...], values: Iterable[str]) -> List[str]:
+    return [f"{name}={_quote(value)}" for name, value in zip(names, values)]
+
+def _braces(labels: List[str]) -> str:
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+# Metrics of this process; modules register their families at import time
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_LATENCY = metrics.histogram("http_request_duration_seconds", "HTTP request latency until the response ends", ("method", "route"))
+HTTP_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests being served").labels()
+
+EVENT_LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke a task sleeping for LOOP_LAG_INTERVAL_MS",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+).labels()
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def resident_memory_bytes() -> float:
+    """Current resident set size, NaN where /proc is not available (macOS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return float("nan")
+
+def max_resident_memory_bytes() -> float:
+    """Peak resident set size; getrusage reports kilobytes on Linux and bytes on macOS."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+class LoopLagMonitor:
+    """Sample event loop lag into ``event_loop_lag_seconds``."""
+
+    def __init__(self, interval: float = 0.05):
+        """
+        Args:
+            interval (float): Seconds between samples, 0 to disable
+        """
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls) -> "LoopLagMonitor":
+        """Build a monitor sampling every LOOP_LAG_INTERVAL_MS milliseconds."""
+        return cls(interval=float(os.getenv("LOOP_LAG_INTERVAL_MS", "50")) / 1000)
+
+    async def start(self):
+        """Start sampling in the background."""
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - self.interval))
+
+# Started and stopped by the service registry
+loop_lag = LoopLagMonitor.from_env()
+
+class MetricsMiddleware:
+    """Count HTTP requests and record their latency per route template."""
+
+    def __init__(self, app):
+        """
+        Args:
+            app (ASGIApp): Application to wrap
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        # Reported if the app fails before sending a response
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.value += 1
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            HTTP_IN_FLIGHT.value -= 1
+            # Requests answered before routing, such as 429s, still count under their route;
+            # paths no route matches share one label
+            route = matched_route(scope) or "unmatched"
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+
+async def metrics_endpoint(request: Request) -> Response:
+    """
+    Serve every metric in the Prometheus text format.
+
+    Args:
+        request (Request): Incoming request
+
+    Returns:
+        Response: The exposition, or 401 when METRICS_API_KEY is set and not presented
+    """
+    key = os.getenv("METRICS_API_KEY")
+    presented = request.headers.get("authorization", "").encode()
+    if key and not hmac.compare_digest(presented, f"Bearer {key}".encode()):
+        return PlainTextResponse("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
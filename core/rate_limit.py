@@ -0,0 +1,102 @@
+"""
+Rate limiting middleware.
+
+A pure ASGI middleware, so requests to rate-limited routes pay for one
+``RateLimiter.check`` and a header list rather than a Starlette request
+object. Allowed responses carry ``X-RateLimit-Limit``,
+``X-RateLimit-Remaining`` and ``X-RateLimit-Reset`` (seconds until the
+bucket is full again); limited requests get a 429 with ``Retry-After``
+before reaching the endpoint or the LLM.
+
+Only authenticated requests are charged. Given ``authorized`` (the app passes
+``core.dependencies.has_valid_api_key``), a request without a valid API key
+goes through uncounted and without rate limit headers, and the route's API key
+dependency rejects it with a 403. Callers cannot spend a client's quota with
+missing or wrong keys, and a limited client still sees 403 rather than 429
+for a bad key.
+
+Behind a reverse proxy, run uvicorn with ``--proxy-headers`` so the client
+address is the caller's rather than the proxy's.
+"""
+
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.routes import rate_limit_key
+from services.rate_limiter import RateLimiter, RateLimitResult
+
+LIMITED_BODY = json.dumps({"detail": "Rate limit exceeded"}).encode()
+
+def rate_limit_headers(result: RateLimitResult) -> List[Tuple[bytes, bytes]]:
+    """
+    Build the X-RateLimit headers for a check result.
+
+    Args:
+        result (RateLimitResult): Result of ``RateLimiter.check``
+
+    Returns:
+        List[Tuple[bytes, bytes]]: Raw ASGI header pairs
+    """
+    return [
+        (b"x-ratelimit-limit", str(result.limit).encode()),
+        (b"x-ratelimit-remaining", str(result.remaining).encode()),
+        (b"x-ratelimit-reset", str(math.ceil(result.reset_after)).encode())
+    ]
+
+class RateLimitMiddleware:
+    """Enforce per-route, per-IP limits from a RateLimiter."""
+
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter,
+        key_for: Callable[[str, str], Optional[str]] = rate_limit_key,
+        authorized: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ):
+        """
+        Args:
+            app (ASGIApp): Application to wrap
+            limiter (RateLimiter): Limiter holding the counters and per-route limits
+            key_for (Callable[[str, str], Optional[str]]): Maps (method, path) to a
+                rate limiter key, or None for routes that are not limited
+            authorized (Optional[Callable[[Dict[str, Any]], bool]]): Whether a request's
+                scope is authenticated; others pass through uncharged. None charges every request
+        """
+        self.app = app
+        self.limiter = limiter
+        self.key_for = key_for
+        self.authorized = authorized
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        key = self.key_for(scope["method"], scope["path"])
+        if key is None or (self.authorized is not None and not self.authorized(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        result = self.limiter.check(key, client[0] if client else "unknown")
+        headers = rate_limit_headers(result)
+
+        if result.limited:
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(LIMITED_BODY)).encode()),
+                    (b"retry-after", str(math.ceil(result.retry_after)).encode()),
+                    *headers
+                ]
+            })
+            await send({"type": "http.response.body", "body": LIMITED_BODY})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,163 @@
+"""
+Application-lifetime service registry.
+
+The registry builds the LLM client, agents and services exactly once when the
+application starts and tears them down when it stops, so in-process caches
+(character contexts, conversation memories, feeling conversations) survive
+across requests. Sessions and conversations go through one SessionStore, which
+shares them between workers when SESSION_STORE=sqlite.
+"""
+
+import logging
+from typing import Optional
+from fastapi import Request
+from controllers.feeling_controller import FeelingController
+from core.dependencies import get_llm_client
+from core.llm_gateway import DEFAULT_MODEL, LLMGateway
+from core.metrics import ThreadedReading, loop_lag, max_resident_memory_bytes, metrics, resident_memory_bytes
+from core.request_log import request_log
+from core.routes import RATE_LIMITED_PREFIXES, RATE_LIMITED_ROUTES
+from core.tokens import preload_encoding
+from core.tracing import trace_log
+from services.bible_character import BibleCharacterService
+from services.bible_verse import BibleVerseService
+from services.prayer_petition import PrayerPetitionService
+from services.rate_limiter import SharedRateLimiter, rate_limiter
+from services.session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+class ServiceRegistry:
+    """Holds the long-lived services shared by every request."""
+
+    def __init__(self):
+        self.llm_client: Optional[LLMGateway] = None
+        self.session_store: Optional[SessionStore] = None
+        self.bible_character_service: Optional[BibleCharacterService] = None
+        self.bible_verse_service: Optional[BibleVerseService] = None
+        self.prayer_petition_service: Optional[PrayerPetitionService] = None
+        self.feeling_controller: Optional[FeelingController] = None
+        self._started = False
+
+    async def startup(self):
+        """Build every service once, warm the LLM pool and start background tasks."""
+        if self._started:
+            return
+
+        self.llm_client = get_llm_client()
+        await self.llm_client.start()
+        # Token counts run on the event loop, so the tokenizer (possibly a download) is resolved here
+        await preload_encoding(DEFAULT_MODEL)
+
+        await rate_limiter.start()
+        await request_log.start()
+        await trace_log.start()
+        await loop_lag.start()
+
+        self.session_store = SessionStore.from_env()
+        await self.session_store.initialize()
+
+        self.bible_character_service = BibleCharacterService(self.llm_client, session_store=self.session_store)
+        await self.bible_character_service.initialize()
+
+        self.bible_verse_service = BibleVerseService(self.llm_client)
+        self.prayer_petition_service = PrayerPetitionService(self.llm_client)
+        self.feeling_controller = FeelingController(self.llm_client, session_store=self.session_store)
+        self._register_metrics()
+
+        self._started = True
+        logger.info("Service registry started")
+
+    async def shutdown(self):
+        """Stop background tasks and close upstream connections."""
+        if not self._started:
+            return
+
+        await self.bible_character_service.cleanup()
+        await self.session_store.close()
+        self.bible_verse_service.close()
+        await self.llm_client.close()
+        await rate_limiter.stop()
+        await request_log.stop()
+        await trace_log.stop()
+        await loop_lag.stop()
+        metrics.remove_collectors()
+
+        self._started = False
+        logger.info("Service registry stopped")
+
+    def _register_metrics(self):
+        """Expose the sizes of the in-memory stores and the cache counters, read when /metrics is scraped."""
+        agent = self.bible_character_service.agent
+        context_store = agent.context_store
+        session_store = self.session_store
+        endpoints = [*RATE_LIMITED_ROUTES.values(), *(key for _, _, key in RATE_LIMITED_PREFIXES)]
+
+        metrics.collect("bible_character_sessions", "Character chat sessions held by this worker", lambda: len(agent.user_sessions))
+        metrics.collect(
+            "bible_character_conversation_memories", "Character conversation memories held by this worker",
+            lambda: len(agent.conversation_memories)
+        )
+        metrics.collect("feeling_conversations", "Feeling conversations held by this worker", session_store.local_conversations)
+
+        def context_lookups():
+            return {
+                ("memory", "hit"): context_store.memory.hits,
+                ("memory", "miss"): context_store.memory.misses,
+                ("database", "hit"): context_store.db_hits,
+                ("database", "miss"): context_store.db_misses
+            }
+
+        def context_hit_ratio():
+            lookups = context_store.memory.hits + context_store.memory.misses
+            return (context_store.memory.hits + context_store.db_hits) / lookups if lookups else float("nan")
+
+        metrics.collect(
+            "character_context_lookups_total", "Character context lookups by tier and result", context_lookups,
+            kind="counter", labelnames=("tier", "result")
+        )
+        metrics.collect(
+            "character_context_hit_ratio", "Share of character context lookups served from memory or the database",
+            context_hit_ratio
+        )
+
+        def buckets():
+            return {(endpoint,): stats["buckets"] for endpoint, stats in rate_limiter.stats(endpoints).items()}
+
+        if isinstance(rate_limiter, SharedRateLimiter):
+            # Counting scans the whole mapped table (tens of milliseconds at 1M slots), so it runs
+            # in a thread and scrapes get the last count
+            buckets = ThreadedReading(buckets)
+        metrics.collect("rate_limiter_buckets", "Rate limit buckets held per endpoint", buckets, labelnames=("endpoint",))
+        if isinstance(rate_limiter, SharedRateLimiter):
+            metrics.collect(
+                "rate_limiter_evictions_total", "Live buckets evicted from full probe sequences by this worker",
+                lambda: rate_limiter.evictions, kind="counter"
+            )
+        else:
+            metrics.collect(
+                "rate_limiter_tables", "Rate limit bucket tables held per endpoint",
+                lambda: {(endpoint,): stats["tables"] for endpoint, stats in rate_limiter.stats(endpoints).items()},
+                labelnames=("endpoint",)
+            )
+
+        metrics.collect("process_resident_memory_bytes", "Resident memory size in bytes", resident_memory_bytes)
+        metrics.collect("process_max_resident_memory_bytes", "Peak resident memory size in bytes", max_resident_memory_bytes)
+
+        metrics.collect(
+            "request_log_records_total", "Request log lines written and dropped under backpressure",
+            lambda: {("written",): request_log.written, ("dropped",): request_log.dropped},
+            kind="counter", labelnames=("outcome",)
+        )
+
+def get_registry(request: Request) -> ServiceRegistry:
+    """
+    Get the registry attached to the running application.
+
+    Args:
+        request (Request): FastAPI request object
+
+    Returns:
+        ServiceRegistry: The application-wide service registry
+    """
+    return request.app.state.registry
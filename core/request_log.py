@@ -0,0 +1,179 @@
+"""
+Structured request log.
+
+RequestLogMiddleware records one JSON line per HTTP request: method, route,
+status, latency (and time to the response headers, which matters for
+streams), the LLM calls made and their tokens, cache hits and a salted hash
+of the client address. Lines go through a JsonlBatchWriter, so the request
+path only appends a dict to a buffer; see ``JsonlBatchWriter.from_env`` for
+the REQUEST_LOG_* settings. Each worker writes its own
+``requests.<pid>.jsonl`` by default.
+
+The client hash is salted with REQUEST_LOG_SALT. Without it each process
+draws a random salt at startup: an unsalted hash of an IPv4 address can be
+reversed by hashing the whole address space. Hashes then only correlate
+requests within one worker's lifetime; set REQUEST_LOG_SALT (kept secret) to
+correlate across workers and restarts.
+
+Code deeper in the stack reports into the current request with
+:func:`record_llm_call` and :func:`record_cache_hit`. The counters live in a
+context variable, so they follow the request into tasks and worker threads it
+starts, and the calls do nothing outside a request.
+"""
+
+import hashlib
+import os
+import secrets
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+from starlette.routing import Match
+from core.jsonl_writer import JsonlBatchWriter
+
+@dataclass
+class RequestStats:
+    """Work done on behalf of one request."""
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_hits: int = 0
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def record_llm_call(prompt_tokens: int = 0, completion_tokens: int = 0):
+    """
+    Count an upstream LLM call against the current request.
+
+    Args:
+        prompt_tokens (int): Tokens sent
+        completion_tokens (int): Tokens received
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.llm_calls += 1
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+
+def record_cache_hit():
+    """Count a cache hit against the current request."""
+    stats = _current.get()
+    if stats is not None:
+        stats.cache_hits += 1
+
+def client_hash(ip: str, salt: str) -> str:
+    """Salted, truncated hash of a client address, so requests can be correlated without logging IPs."""
+    return hashlib.blake2b(f"{salt}{ip}".encode(), digest_size=8).hexdigest()
+
+# Endpoint -> path template of the one route serving it, found on first use
+_templates: Dict[Any, str] = {}
+
+def matched_route(scope: Dict[str, Any]) -> Optional[str]:
+    """
+    The path template of the route serving a request, e.g. ``/api/v1/feeling/{conversation_id}``.
+
+    FastAPI routes leave themselves in the scope. Plain Starlette routes such as /metrics
+    only leave their endpoint, whose route is looked up once in the router. A middleware
+    that answers before routing (a 429 from the rate limiter) leaves neither, so the
+    app's routes are matched against the request instead.
+
+    Args:
+        scope (Dict[str, Any]): ASGI scope after the app handled it
+
+    Returns:
+        Optional[str]: The template, or None when no route matches
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" not in scope:
+        for route in getattr(scope.get("app"), "routes", ()):
+            if route.matches(scope)[0] == Match.FULL:
+                return route.path
+        return None
+
+    endpoint = scope["endpoint"]
+    template = _templates.get(endpoint)
+    if template is not None:
+        return template
+
+    router = scope.get("router")
+    routes = [route for route in getattr(router, "routes", ()) if getattr(route, "endpoint", None) is endpoint]
+    if len(routes) == 1:
+        template = _templates[endpoint] = routes[0].path
+        return template
+    # An endpoint served under several paths: match this request's path instead of caching
+    for route in routes:
+        if route.path_regex.match(scope["path"]):
+            return route.path
+    return None
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """
+    Like :func:`matched_route`, falling back to the raw path when no route matches.
+
+    Args:
+        scope (Dict[str, Any]): ASGI scope after the app handled it
+
+    Returns:
+        str: The template or the raw path
+    """
+    return matched_route(scope) or scope["path"]
+
+class RequestLogMiddleware:
+    """Write one structured line per HTTP request."""
+
+    def __init__(self, app, writer: JsonlBatchWriter, salt: Optional[str] = None):
+        """
+        Args:
+            app (ASGIApp): Application to wrap
+            writer (JsonlBatchWriter): Writer the lines are queued on
+            salt (Optional[str]): Salt of the client hash; REQUEST_LOG_SALT by default, or a
+                random one for this process when that is unset
+        """
+        self.app = app
+        self.writer = writer
+        self.salt = salt or os.getenv("REQUEST_LOG_SALT") or secrets.token_hex(16)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        # Reported if the app fails before sending a response
+        status = 500
+        headers_at = None
+
+        async def send_and_record(message):
+            nonlocal status, headers_at
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers_at = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            _current.reset(token)
+            end = time.perf_counter()
+            client = scope.get("client")
+            self.writer.write({
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "method": scope["method"],
+                "route": route_template(scope),
+                "status": status,
+                "latency_ms": round((end - start) * 1000, 2),
+                "headers_ms": round((headers_at - start) * 1000, 2) if headers_at is not None else None,
+                "llm_calls": stats.llm_calls,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.completion_tokens,
+                "cache_hits": stats.cache_hits,
+                "client": client_hash(client[0], self.salt) if client else None
+            })
+
+# Request log shared by the app's middleware; started and stopped by the service registry
+request_log = JsonlBatchWriter.from_env("REQUEST_LOG", "requests.{pid}.jsonl")
@@ -0,0 +1,42 @@
+"""
+Rate-limited routes.
+
+Maps the API's routes to the rate limiter keys their counters are stored
+under (the keys ``rate_limits.json`` already uses). Routes that are not
+listed, like ``/`` and ``/test``, are never rate limited. Daily limits per key
+are configured on the limiter (see ``RateLimiter.from_env``).
+"""
+
+from typing import Dict, Optional, Tuple
+
+# (method, path) of the routes that call the LLM or read stored conversations
+RATE_LIMITED_ROUTES: Dict[Tuple[str, str], str] = {
+    ("POST", "/bible/characters/chat"): "bible_character_chat",
+    ("POST", "/verses/explain"): "bible_verse_explain",
+    ("POST", "/api/v1/feeling"): "feeling_process",
+    ("POST", "/prayers/petition"): "prayer_petition",
+}
+
+# (method, path prefix) of routes ending in one path parameter
+RATE_LIMITED_PREFIXES: Tuple[Tuple[str, str, str], ...] = (
+    ("GET", "/api/v1/feeling/", "feeling_get"),
+)
+
+def rate_limit_key(method: str, path: str) -> Optional[str]:
+    """
+    Get the rate limiter key of a request.
+
+    Args:
+        method (str): HTTP method
+        path (str): Request path
+
+    Returns:
+        Optional[str]: The route's rate limiter key, or None if it is not rate limited
+    """
+    key = RATE_LIMITED_ROUTES.get((method, path))
+    if key is not None:
+        return key
+    for route_method, prefix, prefix_key in RATE_LIMITED_PREFIXES:
+        if method == route_method and path.startswith(prefix) and "/" not in path[len(prefix):]:
+            return prefix_key
+    return None
@@ -0,0 +1,72 @@
+"""
+Single-flight coalescing of concurrent async calls.
+
+When several coroutines ask for the same key while a call for it is still
+running, they all await that one call instead of starting their own. Results
+are not kept once the call finishes (caching is the caller's job) and
+failures are propagated to every waiter without being remembered, so the next
+request retries.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+class SingleFlight(Generic[V]):
+    """Per-key coalescing of in-flight coroutines, with execution/coalesced counters."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[V]]) -> V:
+        """
+        Run ``func`` for ``key`` unless a call for the same key is already running.
+
+        The call runs in its own task, so a waiter that is cancelled (for
+        example a client that disconnects) does not cancel it for the others.
+
+        Args:
+            key (Hashable): Coalescing key
+            func (Callable[[], Awaitable[V]]): Starts the work when no call is in flight
+
+        Returns:
+            V: The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced call for {key!r}")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so it is not reported as unhandled when every waiter was cancelled
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "failures": self.failures
+        }
@@ -0,0 +1,64 @@
+"""
+Server-Sent Events helpers shared by the streaming endpoints.
+
+Streaming agents and services yield ``(event, data)`` tuples. The helpers
+here encode them as SSE frames and wrap them in a ``StreamingResponse``.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Tuple
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+SSEEvent = Tuple[str, Any]
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode one event as an SSE frame.
+
+    Args:
+        event (str): Event name (token, stage, done, error)
+        data (Any): JSON-serializable payload
+
+    Returns:
+        str: The encoded frame
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+async def sse_response(events: AsyncIterator[SSEEvent]) -> StreamingResponse:
+    """
+    Wrap an event stream in a ``text/event-stream`` response.
+
+    The first event is awaited before the response starts, so validation
+    errors raised ahead of it still surface as regular HTTP errors. Errors
+    raised after that are sent to the client as an ``error`` event.
+
+    Args:
+        events (AsyncIterator[SSEEvent]): Stream of ``(event, data)`` tuples
+
+    Returns:
+        StreamingResponse: The SSE response
+    """
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def body():
+        if first is None:
+            return
+        try:
+            yield format_sse(*first)
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error(f"Error while streaming response: {str(e)}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
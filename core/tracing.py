@@ -0,0 +1,255 @@
+"""
+Request tracing
+
+Code marks the stages of a request with :func:`span`:
+
+    with span("context", character=character_name):
+        context = await self.get_character_context(character_name)
+
+TracingMiddleware opens a root span per HTTP request and the spans opened
+while it runs become its descendants. They follow the request into tasks it
+starts, since the current span lives in a context variable. When the request
+ends its spans are exported as one line of OTLP/JSON (the OpenTelemetry
+protocol's JSON encoding, as written by the collector's file exporter). The
+lines go to ``traces.<pid>.jsonl`` through a JsonlBatchWriter configured by the
+TRACE_LOG_* variables. An incoming W3C ``traceparent`` header makes the
+request part of the caller's trace.
+
+The response also gets a ``Server-Timing`` header with the total duration of
+each span name that finished before the headers were sent, e.g.
+``context;dur=812.4, llm;dur=790.1, dto;dur=0.3, total;dur=813.2``. Stream
+headers leave before the model answers, so for streams the full breakdown
+is only in the exported trace.
+
+Tracing is off unless TRACING_ENABLED=1. Without the middleware no root span
+exists, and :func:`span` returns a shared no-op context manager.
+"""
+
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Dict, List, Optional
+from core.jsonl_writer import JsonlBatchWriter
+from core.request_log import matched_route
+
+# OTLP span kinds
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+class Trace:
+    """Spans of one request, gathered until the request ends."""
+    __slots__ = ("trace_id", "parent_id", "spans", "closed")
+
+    def __init__(self, trace_id: Optional[str] = None, parent_id: Optional[str] = None):
+        """
+        Args:
+            trace_id (Optional[str]): 32 hex digit trace id, drawn at export if None
+            parent_id (Optional[str]): Span id of the caller's span from ``traceparent``
+        """
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.spans: List["Span"] = []
+        # Spans ending after the export, like background work the request started, are not kept
+        self.closed = False
+
+class Span:
+    """A timed stage of a request; use it through :func:`span`."""
+    # Span ids are only drawn when the trace is exported, off the request path
+    __slots__ = ("trace", "name", "kind", "attributes", "parent", "start_ns", "end_ns", "error")
+
+    def __init__(self, trace: Trace, name: str, kind: int, attributes: Dict[str, Any], parent: Optional["Span"]):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.parent = parent
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any):
+        """Set an attribute, e.g. a count only known once the stage is done."""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        # Cancellations and closed generators are not errors
+        if isinstance(exc, Exception):
+            self.error = f"{exc_type.__name__}: {exc}"
+        # set() rather than reset(): a stream's spans may close in another task's context
+        _current.set(self.parent)
+        if not self.trace.closed:
+            self.trace.spans.append(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+class _NoopSpan:
+    """Stands in for a span when the request is not traced."""
+    __slots__ = ()
+
+    def set(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+_NOOP = _NoopSpan()
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def span(name: str, kind: int = INTERNAL, **attributes: Any):
+    """
+    Time a stage of the current request.
+
+    Args:
+        name (str): Stage name; spans of the same name are summed in Server-Timing
+        kind (int): OTLP span kind, INTERNAL or CLIENT for upstream calls
+        **attributes: Span attributes (str, int, float or bool values)
+
+    Returns:
+        Span | _NoopSpan: A context manager, a no-op one outside a traced request
+    """
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.trace, name, kind, attributes, parent)
+
+def server_timing(spans: List[Span], total_ms: float) -> str:
+    """
+    Build a Server-Timing header value from finished spans.
+
+    Args:
+        spans (List[Span]): Finished spans, excluding the root
+        total_ms (float): Milliseconds from the start of the request
+
+    Returns:
+        str: ``name;dur=ms`` entries in order of first completion, then ``total``
+    """
+    durations: Dict[str, float] = {}
+    for finished in spans:
+        durations[finished.name] = durations.get(finished.name, 0.0) + finished.duration_ms
+    entries = [f"{name};dur={duration:.1f}" for name, duration in durations.items()]
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+def _value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # int64 fields are strings in the protobuf JSON mapping
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _value(value)} for key, value in attributes.items() if value is not None]
+
+def export_record(trace: Trace, service_name: str) -> Dict[str, Any]:
+    """
+    Encode a trace's spans as an OTLP/JSON ``ExportTraceServiceRequest``.
+
+    Args:
+        trace (Trace): The finished trace
+        service_name (str): ``service.name`` resource attribute
+
+    Returns:
+        Dict[str, Any]: One line of the trace file
+    """
+    trace_id = trace.trace_id or f"{random.getrandbits(128):032x}"
+    span_ids = {id(finished): f"{random.getrandbits(64):016x}" for finished in trace.spans}
+    spans = []
+    for finished in trace.spans:
+        if finished.parent is not None:
+            parent_id = span_ids.get(id(finished.parent))
+        else:
+            parent_id = trace.parent_id
+        encoded = {
+            "traceId": trace_id,
+            "spanId": span_ids[id(finished)],
+            "name": finished.name,
+            "kind": finished.kind,
+            "startTimeUnixNano": str(finished.start_ns),
+            "endTimeUnixNano": str(finished.end_ns),
+            "attributes": _attributes(finished.attributes),
+            "status": {"code": 2, "message": finished.error} if finished.error else {}
+        }
+        if parent_id is not None:
+            encoded["parentSpanId"] = parent_id
+        spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": service_name, "process.pid": os.getpid()})},
+            "scopeSpans": [{"scope": {"name": "bible-api"}, "spans": spans}]
+        }]
+    }
+
+class TracingMiddleware:
+    """Trace every HTTP request, queue its spans for export and add a Server-Timing header."""
+
+    def __init__(self, app, writer: JsonlBatchWriter):
+        """
+        Args:
+            app (ASGIApp): Application to wrap
+            writer (JsonlBatchWriter): Writer the finished traces are queued on; it must encode
+                them with :func:`export_record`, as ``trace_log`` does
+        """
+        self.app = app
+        self.writer = writer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id = None, None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                match = _TRACEPARENT.match(value.decode("latin-1"))
+                if match:
+                    trace_id, parent_id = match.groups()
+                break
+        trace = Trace(trace_id, parent_id)
+        root = Span(trace, scope["method"], SERVER, {"http.request.method": scope["method"]}, None)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                root.set("http.response.status_code", message["status"])
+                timing = server_timing(trace.spans, (time.time_ns() - root.start_ns) / 1e6)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            with root:
+                try:
+                    await self.app(scope, receive, send_with_timing)
+                finally:
+                    route = matched_route(scope)
+                    if route is not None:
+                        root.name = f"{scope['method']} {route}"
+                        root.set("http.route", route)
+        finally:
+            trace.closed = True
+            self.writer.write(trace)
+
+# Trace file shared by the app's middleware, encoded by the writer's thread; started and
+# stopped by the service registry
+trace_log = JsonlBatchWriter.from_env(
+    "TRACE_LOG", "traces.{pid}.jsonl",
+    encode=partial(export_record, service_name=os.getenv("TRACING_SERVICE_NAME", "bible-api"))
+)
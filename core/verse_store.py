@@ -0,0 +1,230 @@
+"""
+Memory-mapped Bible text store
+
+A compact read-only file holding the text of every verse of one translation,
+indexed by the canon-wide verse ordinal from :mod:`core.bible_references`::
+
+    header   <4sIII   magic b"BVS1", format version, verse count, name length
+    name     UTF-8 translation name, zero-padded to a multiple of 4 bytes
+    offsets  uint32 little-endian x (verse count + 1), end offset of each verse
+    blob     UTF-8 verse texts, concatenated in canonical order
+
+Verse ``n`` is ``blob[offsets[n]:offsets[n + 1]]``; missing verses are empty.
+The file is opened with ``mmap`` so a lookup is two array reads and one slice,
+and every worker process shares the same pages through the OS page cache.
+
+Build a store from a tab-separated source (``reference<TAB>text`` per line)::
+
+    python -m core.verse_store build data/fixtures/rv1909_sample.tsv data/rv1909.bvs --name RV1909
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import logging
+from typing import Iterable, List, Optional, Tuple
+from core.bible_references import BOOK_INDEX, BibleReference, parse_reference
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BVS1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIII")
+
+class VerseStore:
+    """Read-only, memory-mapped verse text lookup."""
+
+    def __init__(self, path: str):
+        """
+        Open and validate a store file.
+
+        Args:
+            path (str): Path to a file produced by :func:`build_store`
+
+        Raises:
+            ValueError: If the file is not a store or its versification does not match
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if sys.byteorder != "little":
+                raise ValueError("Verse stores are little-endian; big-endian hosts are not supported")
+            magic, version, verse_count, name_length = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} verse store")
+            if verse_count != BOOK_INDEX.total_verses:
+                raise ValueError(
+                    f"{path} holds {verse_count} verses but the book table has {BOOK_INDEX.total_verses}"
+                )
+
+            self.name = bytes(self._mmap[HEADER.size:HEADER.size + name_length]).decode("utf-8")
+            offsets_start = HEADER.size + _padded(name_length)
+            offsets_end = offsets_start + 4 * (verse_count + 1)
+            view = memoryview(self._mmap)
+            self._offsets = view[offsets_start:offsets_end].cast("I")
+            self._blob = view[offsets_end:]
+        except Exception:
+            self.close()
+            raise
+
+        logger.info(f"Opened {self.name} verse store {path} ({len(self._blob)} bytes of text)")
+
+    @classmethod
+    def from_env(cls) -> Optional["VerseStore"]:
+        """
+        Open the store named by ``BIBLE_TEXT_STORE``.
+
+        Returns:
+            Optional[VerseStore]: The store, or None if unset or unreadable
+        """
+        path = os.getenv("BIBLE_TEXT_STORE")
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Bible text store disabled: {e}")
+            return None
+
+    def close(self):
+        for name in ("_offsets", "_blob"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+                setattr(self, name, None)
+        if not self._mmap.closed:
+            self._mmap.close()
+
+    def verse(self, ordinal: int) -> Optional[str]:
+        """
+        Text of one verse by canon-wide ordinal.
+
+        Args:
+            ordinal (int): Verse ordinal (Génesis 1:1 is 0)
+
+        Returns:
+            Optional[str]: The verse text, or None if this store does not contain it
+        """
+        start = self._offsets[ordinal]
+        end = self._offsets[ordinal + 1]
+        if start == end:
+            return None
+        return str(self._blob[start:end], "utf-8")
+
+    def text_for(self, reference: BibleReference) -> Optional[str]:
+        """
+        Text of a whole reference, verses joined by spaces.
+
+        Args:
+            reference (BibleReference): Validated reference or range
+
+        Returns:
+            Optional[str]: The text, or None if any verse of the range is missing
+        """
+        offsets = self._offsets
+        blob = self._blob
+        parts = []
+        for ordinal in range(reference.first_ordinal, reference.last_ordinal + 1):
+            start = offsets[ordinal]
+            end = offsets[ordinal + 1]
+            if start == end:
+                return None
+            parts.append(str(blob[start:end], "utf-8"))
+        return " ".join(parts)
+
+def _padded(length: int) -> int:
+    return (length + 3) & ~3
+
+def read_source(lines: Iterable[str]) -> List[Tuple[int, str]]:
+    """
+    Parse ``reference<TAB>text`` lines into (ordinal, text) pairs.
+
+    Blank lines and lines starting with ``#`` are skipped.
+
+    Args:
+        lines (Iterable[str]): Source lines
+
+    Returns:
+        List[Tuple[int, str]]: Verse ordinals and texts
+
+    Raises:
+        ValueError: If a line is malformed, names a range or repeats a verse
+    """
+    verses = {}
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        reference_text, separator, text = line.partition("\t")
+        if not separator or not text.strip():
+            raise ValueError(f"Line {number}: expected 'reference<TAB>text'")
+
+        reference = parse_reference(reference_text)
+        if not reference.is_single_verse:
+            raise ValueError(f"Line {number}: '{reference_text}' is not a single verse")
+        if reference.first_ordinal in verses:
+            raise ValueError(f"Line {number}: duplicate verse {reference.canonical()}")
+        verses[reference.first_ordinal] = " ".join(text.split())
+    return sorted(verses.items())
+
+def build_store(source_path: str, output_path: str, name: str) -> int:
+    """
+    Build a store file from a tab-separated source, replacing the output atomically.
+
+    Args:
+        source_path (str): ``reference<TAB>text`` source file
+        output_path (str): Store file to write
+        name (str): Translation name recorded in the header
+
+    Returns:
+        int: Number of verses written
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        verses = dict(read_source(f))
+
+    total = BOOK_INDEX.total_verses
+    encoded_name = name.encode("utf-8")
+    blob = bytearray()
+    offsets = [0]
+    for ordinal in range(total):
+        text = verses.get(ordinal)
+        if text:
+            blob += text.encode("utf-8")
+        offsets.append(len(blob))
+
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, total, len(encoded_name)))
+        f.write(encoded_name.ljust(_padded(len(encoded_name)), b"\0"))
+        f.write(struct.pack(f"<{total + 1}I", *offsets))
+        f.write(blob)
+    os.replace(tmp_path, output_path)
+    return len(verses)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory-mapped Bible text store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a store from 'reference<TAB>text' lines")
+    build.add_argument("source")
+    build.add_argument("output")
+    build.add_argument("--name", default="RV1909", help="Translation name stored in the header")
+    lookup = commands.add_parser("get", help="Print the text of references from a store")
+    lookup.add_argument("store")
+    lookup.add_argument("references", nargs="+")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            count = build_store(args.source, args.output, args.name)
+            print(f"Wrote {count} verses to {args.output}")
+        else:
+            store = VerseStore(args.store)
+            for reference_text in args.references:
+                reference = parse_reference(reference_text)
+                print(f"{reference.canonical()}\t{store.text_for(reference)}")
+    except ValueError as e:
+        sys.exit(f"error: {e}")
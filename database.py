@@ -1 +1,85 @@
-# Database not required for MVP. Placeholder file. 
\ No newline at end of file
+"""
+Database engine and session factory.
+
+The database is a local SQLite file by default (``DATABASE_URL`` overrides it).
+SQLite connections run in WAL mode so every uvicorn worker on the host can read
+shared tables while another worker writes.
+"""
+
+import os
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bible_api.db")
+
+def build_engine(url: str = DATABASE_URL):
+    """
+    Create an engine, enabling WAL and a busy timeout for SQLite.
+
+    Args:
+        url (str): SQLAlchemy database URL
+
+    Returns:
+        Engine: The configured engine
+    """
+    is_sqlite = url.startswith("sqlite")
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        pool_pre_ping=not is_sqlite
+    )
+
+    if is_sqlite:
+        @event.listens_for(engine, "connect")
+        def _configure_sqlite(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA busy_timeout=5000")
+            cursor.close()
+
+    return engine
+
+engine = build_engine()
+SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+def init_db(bind=None):
+    """
+    Create any missing tables.
+
+    Args:
+        bind (Engine): Engine to create the tables on, the module engine by default
+    """
+    # Import models so their tables are registered on Base.metadata
+    import models.character_context  # noqa: F401
+    import models.session  # noqa: F401
+
+    # Workers starting together race between checking for a table and creating it;
+    # each lost race means another worker created one, so retrying makes progress
+    attempts = len(Base.metadata.tables) + 1
+    for attempt in range(attempts):
+        try:
+            Base.metadata.create_all(bind=bind or engine)
+            break
+        except OperationalError:
+            if attempt == attempts - 1:
+                raise
+    logger.info("Database tables ready")
+
+def get_db():
+    """
+    Yield a session and close it afterwards (FastAPI dependency).
+
+    Yields:
+        Session: Database session
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
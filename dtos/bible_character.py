@@ -4,7 +4,7 @@ Data Transfer Objects for Bible Character endpoints.
 
 from typing import List, Dict, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class CharacterContextDTO(BaseModel):
     """DTO for character context information."""
@@ -16,6 +16,16 @@ class CharacterContextDTO(BaseModel):
     bible_verses: List[str]
     extracted_at: datetime
 
+class CharacterExtractionResult(BaseModel):
+    """Validated Chain 1 output, from JSON mode or the sectioned text parser."""
+    model_config = ConfigDict(extra="forbid", strict=True)
+
+    biographical_info: Dict[str, str] = Field(..., min_length=1)
+    key_events: List[str] = Field(..., min_length=1)
+    character_traits: Dict[str, str] = Field(..., min_length=1)
+    legacy: Dict[str, str] = Field(..., min_length=1)
+    bible_verses: List[str] = Field(..., min_length=1)
+
 class MessageDTO(BaseModel):
     """DTO for a single message in the conversation."""
     role: str = Field(..., description="Role of the message sender (user/assistant)")
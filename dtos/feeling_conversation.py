@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
 
 class FeelingMessage(BaseModel):
     feeling: str = Field(..., description="The feeling or emotion being expressed")
@@ -22,4 +22,28 @@ class FeelingConversation(BaseModel):
     response: Optional[FeelingResponse] = Field(
         default=None,
         description="The response to the last message in the conversation"
-    ) 
\ No newline at end of file
+    ) 
+
+class FeelingAnalysis(BaseModel):
+    model_config = ConfigDict(extra="forbid", strict=True)
+
+    sentimiento_primario: str = Field(..., min_length=1)
+    sentimientos_secundarios: List[str]
+    intensidad: Literal["baja", "media", "alta"]
+    necesidad_emocional: str
+    tono_recomendado: str
+    urgencia: str
+
+class FusedFeelingResult(BaseModel):
+    """Single structured completion carrying analysis, verse and devotional."""
+    model_config = ConfigDict(extra="forbid", strict=True)
+
+    analisis: FeelingAnalysis
+    versiculo_referencia: str = Field(..., min_length=3)
+    versiculo_texto: str = Field(..., min_length=10)
+    devocional: str = Field(..., min_length=50)
+
+    @property
+    def verse(self) -> str:
+        """Verse in the ``[Reference] - [Text]`` format used by the chained prompts."""
+        return f"{self.versiculo_referencia} - {self.versiculo_texto}"
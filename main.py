@@ -2,14 +2,25 @@
 Main FastAPI application entry point.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security.api_key import APIKeyHeader
 from dotenv import load_dotenv
 import os
 import logging
+
+# Load environment variables before importing the modules that read them at import time
+load_dotenv()
+
 from api.endpoints import bible_character, bible_verse, feeling, prayer_petition
-from core.dependencies import get_api_key
+from core.dependencies import get_api_key, has_valid_api_key
+from core.metrics import MetricsMiddleware, metrics_endpoint
+from core.rate_limit import RateLimitMiddleware
+from core.registry import ServiceRegistry
+from core.request_log import RequestLogMiddleware, request_log
+from core.tracing import TracingMiddleware, trace_log
+from services.rate_limiter import rate_limiter
 
 # Configure logging
 logging.basicConfig(
@@ -17,17 +28,31 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-# Load environment variables
-load_dotenv()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build shared services once at startup and release them on shutdown."""
+    registry = ServiceRegistry()
+    await registry.startup()
+    app.state.registry = registry
+    try:
+        yield
+    finally:
+        await registry.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title="Bible API",
     description="API for Bible verse explanations, character interactions, feeling-based devotionals, and prayer petitions",
     version="1.0.0",
+    lifespan=lifespan,
     dependencies=[Depends(get_api_key())]  # Add API key validation to all endpoints
 )
 
+# Enforce per-route daily limits before requests reach the LLM (added first so CORS wraps 429s too).
+# Only requests with a valid API key are charged; the others reach the key dependency and get a 403
+if os.getenv("RATE_LIMIT_ENABLED", "1") != "0":
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, authorized=has_valid_api_key)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,10 +60,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
-    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],  # Expose rate limit headers
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After", "X-Conversation-ID", "Server-Timing"],  # Expose rate limit, conversation and timing headers
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Stage spans exported to traces.<pid>.jsonl and summarized in Server-Timing; off by default
+if os.getenv("TRACING_ENABLED", "0") == "1":
+    app.add_middleware(TracingMiddleware, writer=trace_log)
+
+# Per-route request counters, latency histograms and the in-flight gauge served at /metrics
+metrics_enabled = os.getenv("METRICS_ENABLED", "1") != "0"
+if metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# One JSON line per request, outermost so 429s and CORS preflights are logged too
+if os.getenv("REQUEST_LOG_ENABLED", "1") != "0":
+    app.add_middleware(RequestLogMiddleware, writer=request_log)
+
 # Import and include routers
 # from controllers.bible_controller import router as bible_router
 # app.include_router(bible_router, prefix="/api/v1")
@@ -49,6 +87,10 @@ app.include_router(bible_verse.router)
 app.include_router(feeling.router, prefix="/api/v1", tags=["feelings"])
 app.include_router(prayer_petition.router)
 
+# A plain Starlette route, so the API key dependency does not apply (see core.metrics)
+if metrics_enabled:
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Bible API"}
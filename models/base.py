@@ -1,5 +1,3 @@
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
-
-# Placeholder for future models 
\ No newline at end of file
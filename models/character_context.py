@@ -0,0 +1,21 @@
+"""
+Persisted character contexts.
+
+One row per (character, extraction prompt version). The extracted context is
+stored as JSON so its shape can follow the dataclass without migrations.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, UniqueConstraint
+from models.base import Base
+
+class CharacterContextRecord(Base):
+    __tablename__ = "character_contexts"
+    __table_args__ = (
+        UniqueConstraint("name_key", "template_version", name="uq_character_context_version"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    name_key = Column(String(200), nullable=False, index=True)
+    template_version = Column(String(32), nullable=False)
+    payload = Column(Text, nullable=False)
+    extracted_at = Column(DateTime, nullable=False)
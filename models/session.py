@@ -0,0 +1,39 @@
+"""
+Persisted chat sessions, character conversation memories and feeling conversations.
+
+These tables let every uvicorn worker on the host continue a conversation
+another worker started. Payloads are stored as JSON so their shape can follow
+the dataclasses and DTOs without migrations.
+"""
+
+from sqlalchemy import Column, DateTime, Index, String, Text
+from models.base import Base
+
+class UserSessionRecord(Base):
+    __tablename__ = "user_sessions"
+
+    user_id = Column(String(200), primary_key=True)
+    created_at = Column(DateTime, nullable=False)
+    last_activity = Column(DateTime, nullable=False, index=True)
+
+class ConversationMemoryRecord(Base):
+    __tablename__ = "conversation_memories"
+
+    user_id = Column(String(200), primary_key=True)
+    character_name = Column(String(200), primary_key=True)
+    # Changes on every write so a worker can tell whether its cached copy is current
+    revision = Column(String(32), nullable=False)
+    payload = Column(Text, nullable=False)
+    # Written only by the background summarizer, never by turn saves
+    summary = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime, nullable=False)
+
+class FeelingConversationRecord(Base):
+    __tablename__ = "feeling_conversations"
+    __table_args__ = (
+        Index("ix_feeling_conversations_updated_at", "updated_at"),
+    )
+
+    conversation_id = Column(String(64), primary_key=True)
+    payload = Column(Text, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
@@ -2,9 +2,12 @@
 Service layer for Bible Character functionality.
 """
 
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
 from agents.bible_character import BibleCharacter
+from core.tracing import span
+from services.character_context_store import CharacterContextStore
+from services.session_store import SessionStore
 from dtos.bible_character import (
     CharacterContextDTO,
     MessageDTO,
@@ -15,17 +18,30 @@ from dtos.bible_character import (
 class BibleCharacterService:
     """Service for handling Bible Character interactions."""
 
-    def __init__(self, llm_client):
+    def __init__(
+        self,
+        llm_client,
+        context_store: Optional[CharacterContextStore] = None,
+        session_store: Optional[SessionStore] = None
+    ):
         """
         Initialize the Bible Character service.
         
         Args:
-            llm_client: The LLM client instance for making API calls
+            llm_client (LLMGateway): Shared LLM gateway for making API calls
+            context_store (Optional[CharacterContextStore]): Character context store,
+                configured from the environment by default
+            session_store (Optional[SessionStore]): Sessions and conversation memories
+                shared between workers, in this process only by default
         """
-        self.agent = BibleCharacter(llm_client)
+        self.agent = BibleCharacter(
+            llm_client,
+            context_store=context_store or CharacterContextStore.from_env(),
+            session_store=session_store
+        )
 
     async def initialize(self):
-        """Initialize the agent by starting the cleanup task."""
+        """Initialize the agent: prepare the context store and start the cleanup task."""
         await self.agent.start()
 
     async def cleanup(self):
@@ -49,6 +65,33 @@ class BibleCharacterService:
             message=request.message
         )
 
+        with span("dto"):
+            return await self._build_chat_response(request, response)
+
+    async def stream_chat_with_character(self, request: ChatRequestDTO) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a chat interaction with a biblical character as SSE events.
+        
+        Args:
+            request (ChatRequestDTO): The chat request containing user message and context
+            
+        Yields:
+            Tuple[str, Any]: Stage and token events, then a ``done`` event whose
+            payload is the serialized ChatResponseDTO
+        """
+        async for event, data in self.agent.stream_chat_with_character(
+            user_id=request.user_id,
+            character_name=request.character_name,
+            message=request.message
+        ):
+            if event == "done":
+                with span("dto"):
+                    chat_response = await self._build_chat_response(request, data["response"])
+                    data = chat_response.model_dump(mode="json")
+            yield event, data
+
+    async def _build_chat_response(self, request: ChatRequestDTO, response: str) -> ChatResponseDTO:
+        """Assemble the response DTO with conversation history and character info."""
         # Get conversation memory
         memory = self.agent.get_or_create_memory(
             user_id=request.user_id,
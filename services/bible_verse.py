@@ -1,12 +1,62 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from core.bible_references import parse_references
+from core.llm_gateway import LLMGateway
+from core.tracing import span
+from core.verse_store import VerseStore
 from agents.bible_verse import BibleVerseAgent
 from dtos.bible_verse import BibleVerseRequest, BibleVerseResponse
 from services.base import ServiceBase
+from services.verse_cache import ExplanationCache
 
 class BibleVerseService(ServiceBase):
-    def __init__(self):
+    def __init__(
+        self,
+        llm_client: LLMGateway,
+        cache: Optional[ExplanationCache] = None,
+        verse_store: Optional[VerseStore] = None
+    ):
         super().__init__()
-        self.agent = BibleVerseAgent()
+        self.agent = BibleVerseAgent(llm_client)
+        self.cache = cache if cache is not None else ExplanationCache.from_env()
+        self.verse_store = verse_store if verse_store is not None else VerseStore.from_env()
+
+    def close(self):
+        """Release the memory-mapped verse store."""
+        if self.verse_store is not None:
+            self.verse_store.close()
+            self.verse_store = None
+
+    def _resolve(
+        self,
+        verses: List[str],
+        verse_texts: Optional[List[str]]
+    ) -> Tuple[List[str], Optional[List[str]]]:
+        """
+        Validate references and fill missing texts from the local verse store.
+
+        Args:
+            verses (List[str]): Verse references as sent by the client
+            verse_texts (Optional[List[str]]): Optional verse texts
+
+        Returns:
+            Tuple[List[str], Optional[List[str]]]: Canonical references and the texts to use
+
+        Raises:
+            ValueError: If the counts differ or a reference is invalid
+        """
+        if verse_texts and len(verse_texts) != len(verses):
+            raise ValueError("Number of verse texts must match number of verses")
+
+        # Reject typos and impossible chapters before any upstream call
+        references = parse_references(verses)
+        verses = [reference.canonical() for reference in references]
+
+        if not verse_texts and self.verse_store is not None:
+            texts = [self.verse_store.text_for(reference) for reference in references]
+            # Only use the store when it covers every reference, so the prompt stays consistent
+            if all(texts):
+                verse_texts = texts
+        return verses, verse_texts
 
     async def explain_verses(
         self,
@@ -24,12 +74,24 @@ class BibleVerseService(ServiceBase):
             BibleVerseResponse: Contains the explanation and processed verses
             
         Raises:
-            ValueError: If the number of verse texts doesn't match the number of verses
+            ValueError: If the number of verse texts doesn't match the number of verses,
+                or a reference names an unknown book, chapter or verse
         """
         try:
-            # Validate input
-            if verse_texts and len(verse_texts) != len(verses):
-                raise ValueError("Number of verse texts must match number of verses")
+            # Validate input and fill texts the client left out
+            with span("resolve"):
+                verses, verse_texts = self._resolve(verses, verse_texts)
+
+            # Serve popular passages without an upstream call
+            with span("cache") as lookup:
+                cached = await self.cache.get(verses, verse_texts)
+                lookup.set("hit", cached is not None)
+            if cached is not None:
+                return BibleVerseResponse(
+                    explanation=cached,
+                    verses=verses,
+                    verse_texts=verse_texts or []
+                )
 
             # Create request
             request = BibleVerseRequest(
@@ -39,9 +101,10 @@ class BibleVerseService(ServiceBase):
 
             # Get explanation from agent
             response = await self.agent.explain_verses(request)
+            await self.cache.set(verses, verse_texts, response.explanation)
 
             # Log successful processing
-            self.logger.info(
+            self.logger.debug(
                 f"Successfully processed {len(verses)} verses",
                 extra={
                     "verses": verses,
@@ -60,4 +123,46 @@ class BibleVerseService(ServiceBase):
                     "error": str(e)
                 }
             )
-            raise 
\ No newline at end of file
+            raise 
+
+    async def stream_explain_verses(
+        self,
+        verses: List[str],
+        verse_texts: Optional[List[str]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a unified explanation for a list of Bible verses as SSE events.
+        
+        Args:
+            verses (List[str]): List of verse references
+            verse_texts (Optional[List[str]]): Optional list of verse texts
+            
+        Yields:
+            Tuple[str, Any]: Stage and token events, then a ``done`` event with
+            the BibleVerseResponse
+            
+        Raises:
+            ValueError: If the number of verse texts doesn't match the number of verses,
+                or a reference names an unknown book, chapter or verse
+        """
+        # Validation runs before the first event so it still surfaces as a 400
+        with span("resolve"):
+            verses, verse_texts = self._resolve(verses, verse_texts)
+
+        with span("cache") as lookup:
+            cached = await self.cache.get(verses, verse_texts)
+            lookup.set("hit", cached is not None)
+        if cached is not None:
+            yield "stage", {"name": "cached"}
+            yield "done", BibleVerseResponse(
+                explanation=cached,
+                verses=verses,
+                verse_texts=verse_texts or []
+            ).model_dump()
+            return
+
+        request = BibleVerseRequest(verses=verses, verse_texts=verse_texts)
+        async for event, data in self.agent.stream_explain_verses(request):
+            if event == "done":
+                await self.cache.set(verses, verse_texts, data["explanation"])
+            yield event, data
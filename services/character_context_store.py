@@ -0,0 +1,218 @@
+"""
+Tiered character context store
+
+Extracting a character's context costs a 500-token LLM call, and the result
+only depends on the character and the extraction prompts. Contexts are kept in
+two tiers:
+
+- L1: a bounded in-process LRU, so repeated chats never leave the process.
+- L2: a table in the shared SQLite database (WAL mode), so every worker on the
+  host and every restart reuses contexts another worker already extracted.
+
+Entries are keyed by the accent- and case-folded character name plus
+``CHARACTER_TEMPLATE_VERSION``; editing the extraction prompts changes the
+version, and rows from older versions are ignored and purged at startup.
+
+Contexts whose extraction response could not be fully parsed are held only in
+a short-lived provisional tier: they are reused for a few minutes instead of
+re-extracting on every request, but never persisted.
+"""
+
+import asyncio
+import json
+import os
+import unicodedata
+import logging
+from typing import Dict, Optional
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+from agents.bible_character import CharacterContext
+from agents.prompts.bible_character_agent import CHARACTER_TEMPLATE_VERSION
+from core.cache import LRUCache
+from models.character_context import CharacterContextRecord
+
+logger = logging.getLogger(__name__)
+
+def character_key(character_name: str) -> str:
+    """
+    Normalize a character name so ``"Moisés"``, ``"moises"`` and ``" MOISÉS "`` share one entry.
+
+    Args:
+        character_name (str): Character name as sent by the client
+
+    Returns:
+        str: Normalized name
+    """
+    decomposed = unicodedata.normalize("NFKD", character_name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+class CharacterContextStore:
+    """In-process LRU in front of an optional database table of extracted contexts."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        engine=None,
+        template_version: str = CHARACTER_TEMPLATE_VERSION,
+        retry_seconds: float = 300
+    ):
+        """
+        Args:
+            max_entries (int): Contexts kept in the in-process LRU
+            engine (Optional[Engine]): Database engine for the shared tier, or None for memory only
+            template_version (str): Version of the extraction prompts the contexts come from
+            retry_seconds (float): How long an incomplete context is reused before extracting again
+        """
+        self.memory: LRUCache[CharacterContext] = LRUCache(max_entries=max_entries)
+        self.provisional: LRUCache[CharacterContext] = LRUCache(max_entries=64, ttl_seconds=retry_seconds)
+        self.engine = engine
+        self.template_version = template_version
+        self._sessions = sessionmaker(bind=engine, autoflush=False) if engine is not None else None
+        self.db_hits = 0
+        self.db_misses = 0
+
+    @classmethod
+    def from_env(cls) -> "CharacterContextStore":
+        """
+        Build a store from ``CHARACTER_CONTEXT_*`` environment variables.
+
+        CHARACTER_CONTEXT_CACHE_SIZE bounds the LRU; CHARACTER_CONTEXT_PERSIST=0
+        keeps contexts in memory only; CHARACTER_CONTEXT_RETRY_SECONDS sets how
+        long incomplete contexts are reused. The shared tier uses ``database.engine``.
+
+        Returns:
+            CharacterContextStore: The configured store
+        """
+        engine = None
+        if os.getenv("CHARACTER_CONTEXT_PERSIST", "1") != "0":
+            from database import engine
+        return cls(
+            max_entries=int(os.getenv("CHARACTER_CONTEXT_CACHE_SIZE", "256")),
+            engine=engine,
+            retry_seconds=float(os.getenv("CHARACTER_CONTEXT_RETRY_SECONDS", "300"))
+        )
+
+    def key(self, character_name: str) -> str:
+        """Storage key for a character name (see :func:`character_key`)."""
+        return character_key(character_name)
+
+    async def initialize(self):
+        """Create the table if needed and purge contexts from older prompt versions."""
+        if self._sessions is None:
+            return
+        try:
+            await asyncio.to_thread(self._initialize)
+        except SQLAlchemyError as e:
+            logger.warning(f"Character context database disabled: {e}")
+            self._sessions = None
+
+    def _initialize(self):
+        from database import init_db
+
+        init_db(self.engine)
+        with self._sessions() as session:
+            purged = (
+                session.query(CharacterContextRecord)
+                .filter(CharacterContextRecord.template_version != self.template_version)
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+        if purged:
+            logger.info(f"Purged {purged} character contexts from older prompt versions")
+
+    async def get(self, character_name: str) -> Optional[CharacterContext]:
+        """
+        Look a context up in memory, then in the database.
+
+        Args:
+            character_name (str): Character name as sent by the client
+
+        Returns:
+            Optional[CharacterContext]: The stored context, or None if it must be extracted
+        """
+        key = self.key(character_name)
+        context = self.memory.get(key)
+        if context is None:
+            context = self.provisional.get(key, count=False)
+        if context is not None or self._sessions is None:
+            return context
+
+        try:
+            context = await asyncio.to_thread(self._load, key)
+        except (SQLAlchemyError, ValueError, KeyError) as e:
+            logger.warning(f"Could not read stored context for {character_name}: {e}")
+            context = None
+
+        if context is None:
+            self.db_misses += 1
+            return None
+        self.db_hits += 1
+        self.memory.set(key, context)
+        return context
+
+    def _load(self, key: str) -> Optional[CharacterContext]:
+        with self._sessions() as session:
+            record = (
+                session.query(CharacterContextRecord)
+                .filter_by(name_key=key, template_version=self.template_version)
+                .one_or_none()
+            )
+            if record is None:
+                return None
+            return CharacterContext.from_record(json.loads(record.payload))
+
+    async def set(self, character_name: str, context: CharacterContext, complete: bool = True):
+        """
+        Store a freshly extracted context in both tiers.
+
+        Args:
+            character_name (str): Character name as sent by the client
+            context (CharacterContext): Extracted context
+            complete (bool): False for a context built from a partially parsed
+                response, which is only kept in the provisional tier
+        """
+        key = self.key(character_name)
+        if not complete:
+            self.provisional.set(key, context)
+            return
+        self.provisional.pop(key)
+        self.memory.set(key, context)
+        if self._sessions is None:
+            return
+        try:
+            await asyncio.to_thread(self._save, key, context)
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not persist context for {character_name}: {e}")
+
+    def _save(self, key: str, context: CharacterContext):
+        payload = json.dumps(context.to_record(), ensure_ascii=False)
+        with self._sessions() as session:
+            record = (
+                session.query(CharacterContextRecord)
+                .filter_by(name_key=key, template_version=self.template_version)
+                .one_or_none()
+            )
+            if record is None:
+                session.add(CharacterContextRecord(
+                    name_key=key,
+                    template_version=self.template_version,
+                    payload=payload,
+                    extracted_at=context.extracted_at
+                ))
+            else:
+                record.payload = payload
+                record.extracted_at = context.extracted_at
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another worker stored the same character first; its copy is just as good
+                session.rollback()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.memory.stats(),
+            "provisional": len(self.provisional),
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses
+        }
@@ -1,27 +1,102 @@
-from typing import Optional
-from dtos.feeling_conversation import FeelingMessage, FeelingResponse, FeelingConversation
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from dtos.feeling_conversation import FeelingMessage, FeelingResponse, FeelingConversation, FusedFeelingResult
+from core.llm_gateway import LLMGateway
+from agents.prompts.feeling_agent import get_fused_prompt, get_fused_response_format
+import asyncio
 import logging
+import os
+import openai
+from core.metrics import metrics
+from core.tracing import span
 from services.base import BaseService
+from services.semantic_cache import SemanticCache
+from services.session_store import SessionStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+INCOMPLETE_RESPONSE_MESSAGE = "Lo siento, no pude generar una respuesta completa. Por favor, intenta de nuevo."
+CONNECTION_ERROR_MESSAGE = "Error al conectar con el servicio. Por favor, verifica tu conexión e intenta de nuevo."
+
+FEELING_RETRIES = metrics.counter("feeling_retries_total", "Feeling completions retried, by what was wrong with the attempt", ("reason",))
+
+async def complete_fused(
+    llm_client: LLMGateway,
+    model: str,
+    messages: List[Dict[str, str]],
+    max_tokens: int,
+    retry_count: int = 3,
+    retry_backoff: float = 0.0
+) -> FusedFeelingResult:
+    """
+    Get the analysis, verse and devotional from a single structured completion.
+
+    Shared by FeelingService and FeelingAgent. Invalid completions are retried at once,
+    upstream errors after ``retry_backoff * 2**attempt`` seconds; a rejected request
+    (400, e.g. a model without structured outputs) is not retried.
+
+    Args:
+        llm_client (LLMGateway): Gateway the completions go through
+        model (str): Model with structured outputs
+        messages (List[Dict[str, str]]): Chat messages asking for the fused result
+        max_tokens (int): Completion token limit
+        retry_count (int): Attempts in total
+        retry_backoff (float): Seconds before the first retry after an upstream error
+
+    Returns:
+        FusedFeelingResult: The parsed result
+
+    Raises:
+        ValueError: If no completion was valid JSON matching the schema
+        openai.APIError: If the upstream rejected the request or kept failing
+    """
+    for attempt in range(retry_count):
+        try:
+            response = await llm_client.complete(
+                model=model,
+                agent="feeling",
+                messages=messages,
+                response_format=get_fused_response_format(),
+                temperature=0.7,
+                max_tokens=max_tokens
+            )
+            return FusedFeelingResult.model_validate_json(response.choices[0].message.content or "")
+        except openai.BadRequestError:
+            raise
+        except (ValueError, openai.APIError) as e:
+            if attempt == retry_count - 1:
+                raise
+            logger.warning(f"Structured completion failed (attempt {attempt + 1}/{retry_count}): {str(e)}")
+            if isinstance(e, ValueError):
+                FEELING_RETRIES.labels("invalid").inc()
+            else:
+                FEELING_RETRIES.labels("error").inc()
+                await asyncio.sleep(retry_backoff * (2 ** attempt))
 
 class FeelingService(BaseService):
-    def __init__(self, model: str = "gpt-3.5-turbo"):
+    def __init__(
+        self,
+        llm_client: LLMGateway,
+        model: str = "gpt-3.5-turbo",
+        retry_backoff: float = 0.5,
+        fused: Optional[bool] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        session_store: Optional[SessionStore] = None
+    ):
         super().__init__(model=model)
-        self.conversations: dict[str, FeelingConversation] = {}
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            logger.error("OPENAI_API_KEY not found in environment variables")
-            raise ValueError("OPENAI_API_KEY environment variable is required")
-        
-        self.client = OpenAI(api_key=self.api_key)
+        # Conversations are saved once answered, where every worker can read them
+        self.session_store = session_store if session_store is not None else SessionStore()
+        self.llm_client = llm_client
+        self.retry_backoff = retry_backoff
+        # "fused" asks for verse and devotional in one structured completion, which needs a
+        # model with structured outputs (gpt-3.5-turbo answers json_schema requests with a 400);
+        # "chain" keeps the original verse -> devotional round trips
+        if fused is None:
+            fused = os.getenv("FEELING_PIPELINE_MODE", "chain").lower() == "fused"
+        self.fused = fused
+        # Near-duplicate messages with the same feeling reuse an earlier verse/devotional
+        self.semantic_cache = semantic_cache if semantic_cache is not None else SemanticCache.from_env()
         logger.info("FeelingService initialized successfully")
 
     def _get_verse_prompt(self, feeling: str, text: str) -> str:
@@ -61,16 +136,20 @@ class FeelingService(BaseService):
         [Main message connecting verse to feeling]
         [Practical application and conclusion]"""
 
-    def _get_ai_response(self, prompt: str, retry_count: int = 3) -> str:
+    def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": "You are a helpful assistant that provides Bible verses and devotionals in Spanish. Always provide complete responses."},
+            {"role": "user", "content": prompt}
+        ]
+
+    async def _get_ai_response(self, prompt: str, retry_count: int = 3) -> str:
         for attempt in range(retry_count):
             try:
-                logger.info(f"Attempting OpenAI API call (attempt {attempt + 1}/{retry_count})")
-                response = self.client.chat.completions.create(
+                logger.debug(f"Attempting OpenAI API call (attempt {attempt + 1}/{retry_count})")
+                response = await self.llm_client.complete(
                     model=self.model,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that provides Bible verses and devotionals in Spanish. Always provide complete responses."},
-                        {"role": "user", "content": prompt}
-                    ],
+                    agent="feeling",
+                    messages=self._build_messages(prompt),
                     temperature=0.7,
                     max_tokens=2000,
                     presence_penalty=0.6,
@@ -82,21 +161,87 @@ class FeelingService(BaseService):
                 if not result or len(result) < 50:
                     logger.warning(f"Incomplete response received: {result}")
                     if attempt < retry_count - 1:
+                        FEELING_RETRIES.labels("too_short").inc()
                         continue
-                    return "Lo siento, no pude generar una respuesta completa. Por favor, intenta de nuevo."
+                    return INCOMPLETE_RESPONSE_MESSAGE
                 
                 if result.endswith("...") or result.endswith("..") or result.endswith(".") == False:
                     logger.warning(f"Response appears incomplete: {result}")
                     if attempt < retry_count - 1:
+                        FEELING_RETRIES.labels("truncated").inc()
                         continue
                 
-                logger.info("Successfully received complete response from OpenAI API")
+                logger.debug("Successfully received complete response from OpenAI API")
                 return result
             except Exception as e:
                 logger.error(f"Error during OpenAI API call: {str(e)}")
                 if attempt < retry_count - 1:
+                    FEELING_RETRIES.labels("error").inc()
+                    # Back off without blocking the event loop
+                    await asyncio.sleep(self.retry_backoff * (2 ** attempt))
                     continue
-                return "Error al conectar con el servicio. Por favor, verifica tu conexión e intenta de nuevo."
+                return CONNECTION_ERROR_MESSAGE
+
+    async def _get_fused_response(self, feeling: str, text: str) -> FusedFeelingResult:
+        """
+        Get the verse and devotional from a single structured completion; see :func:`complete_fused`.
+        
+        Raises:
+            ValueError: If no completion was valid JSON matching the schema
+            openai.APIError: If the upstream rejected the request or kept failing
+        """
+        return await complete_fused(
+            self.llm_client,
+            self.model,
+            self._build_messages(get_fused_prompt(text, feeling=feeling)),
+            max_tokens=2000,
+            retry_backoff=self.retry_backoff
+        )
+
+    async def _get_verse_and_devotional(self, feeling: str, text: str) -> tuple[str, str]:
+        """Get the verse and devotional, using one round trip when fused mode is enabled."""
+        if self.fused:
+            try:
+                with span("fused"):
+                    result = await self._get_fused_response(feeling, text)
+                return result.verse, result.devocional
+            except (ValueError, openai.APIError) as e:
+                logger.warning(f"Structured response failed, falling back to chained calls: {str(e)}")
+
+        # Get verse using AI with retry logic
+        with span("verse"):
+            verse_prompt = self._get_verse_prompt(feeling, text)
+            verse = await self._get_ai_response(verse_prompt)
+        
+        # Get devotional using AI with retry logic
+        with span("devotional"):
+            devotional_prompt = self._get_devotional_prompt(feeling, text, verse)
+            devotional = await self._get_ai_response(devotional_prompt)
+        return verse, devotional
+
+    async def _get_cached_verse_and_devotional(self, feeling: str, text: str) -> tuple[str, str]:
+        """Serve near-duplicate requests from the semantic cache, otherwise ask the model and cache the answer."""
+        if self.semantic_cache is None:
+            return await self._get_verse_and_devotional(feeling, text)
+
+        with span("cache") as lookup:
+            cached, similarity, vector = await asyncio.to_thread(self.semantic_cache.lookup, feeling, text)
+            lookup.set("hit", cached is not None)
+        if cached is not None:
+            logger.debug(f"Semantic cache hit for feeling {feeling} (similarity {similarity:.3f})")
+            return cached
+
+        verse, devotional = await self._get_verse_and_devotional(feeling, text)
+        await self._remember(feeling, text, verse, devotional, vector)
+        return verse, devotional
+
+    async def _remember(self, feeling: str, text: str, verse: str, devotional: str, vector=None):
+        """Cache a verse/devotional pair unless it is one of the fallback error messages."""
+        fallbacks = (INCOMPLETE_RESPONSE_MESSAGE, CONNECTION_ERROR_MESSAGE)
+        if self.semantic_cache is None or verse in fallbacks or devotional in fallbacks:
+            return
+        with span("remember"):
+            await asyncio.to_thread(self.semantic_cache.add, feeling, text, (verse, devotional), vector)
 
     def _generate_motivational_svg(self, verse: str, feeling: str, text: str = "") -> str:
         """
@@ -188,40 +333,116 @@ class FeelingService(BaseService):
         
         return svg
 
-    def process_feeling(self, conversation_id: str, feeling: str, text: str, include_svg: bool = False) -> FeelingResponse:
+    async def process_feeling(self, conversation_id: str, feeling: str, text: str, include_svg: bool = False) -> FeelingResponse:
         try:
-            if conversation_id not in self.conversations:
-                self.conversations[conversation_id] = FeelingConversation(messages=[])
+            with span("conversation"):
+                conversation = await self.session_store.get_conversation(conversation_id) or FeelingConversation(messages=[])
             
             message = FeelingMessage(feeling=feeling, text=text)
-            self.conversations[conversation_id].messages.append(message)
+            conversation.messages.append(message)
             
-            logger.info(f"Processing message for feeling: {feeling}")
+            logger.debug(f"Processing message for feeling: {feeling}")
             
-            # Get verse using AI with retry logic
-            verse_prompt = self._get_verse_prompt(feeling, text)
-            verse = self._get_ai_response(verse_prompt)
-            
-            # Get devotional using AI with retry logic
-            devotional_prompt = self._get_devotional_prompt(feeling, text, verse)
-            devotional = self._get_ai_response(devotional_prompt)
+            verse, devotional = await self._get_cached_verse_and_devotional(feeling, text)
             
             # Always generate SVG for consistency
-            svg = self._generate_motivational_svg(verse, feeling, text)
+            with span("svg"):
+                svg = self._generate_motivational_svg(verse, feeling, text)
             
             response = FeelingResponse(
                 verse=verse,
                 devotional=devotional,
                 svg=svg if include_svg else None
             )
-            self.conversations[conversation_id].response = response
+            conversation.response = response
+            with span("save"):
+                await self.session_store.save_conversation(conversation_id, conversation)
             
-            logger.info("Successfully processed message and generated complete response")
+            logger.debug("Successfully processed message and generated complete response")
             return response
             
         except Exception as e:
             logger.error(f"Error processing message: {str(e)}")
             raise
 
-    def get_conversation(self, conversation_id: str) -> Optional[FeelingConversation]:
-        return self.conversations.get(conversation_id) 
\ No newline at end of file
+    async def stream_feeling(
+        self,
+        conversation_id: str,
+        feeling: str,
+        text: str,
+        include_svg: bool = False
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream the verse and devotional as SSE events.
+        
+        Streaming always uses the chained verse -> devotional prompts so the
+        verse can be announced with a ``verse_ready`` stage before the
+        devotional starts.
+        
+        Yields:
+            Tuple[str, Any]: ``stage`` events, ``token`` events tagged with their
+            stage and a final ``done`` event carrying the FeelingResponse
+        """
+        with span("conversation"):
+            conversation = await self.session_store.get_conversation(conversation_id) or FeelingConversation(messages=[])
+        conversation.messages.append(FeelingMessage(feeling=feeling, text=text))
+        yield "stage", {"name": "started", "conversation_id": conversation_id}
+        
+        vector = None
+        if self.semantic_cache is not None:
+            with span("cache") as lookup:
+                cached, similarity, vector = await asyncio.to_thread(self.semantic_cache.lookup, feeling, text)
+                lookup.set("hit", cached is not None)
+            if cached is not None:
+                verse, devotional = cached
+                response = FeelingResponse(
+                    verse=verse,
+                    devotional=devotional,
+                    svg=self._generate_motivational_svg(verse, feeling, text) if include_svg else None
+                )
+                conversation.response = response
+                await self.session_store.save_conversation(conversation_id, conversation)
+                yield "stage", {"name": "cached", "similarity": round(similarity, 3)}
+                yield "done", response.model_dump()
+                return
+        
+        verse_chunks = []
+        with span("verse"):
+            async for delta in self.llm_client.stream(
+                model=self.model,
+                agent="feeling",
+                messages=self._build_messages(self._get_verse_prompt(feeling, text)),
+                temperature=0.7,
+                max_tokens=2000
+            ):
+                verse_chunks.append(delta)
+                yield "token", {"stage": "verse", "text": delta}
+        verse = "".join(verse_chunks).strip()
+        yield "stage", {"name": "verse_ready", "verse": verse}
+        
+        devotional_chunks = []
+        with span("devotional"):
+            async for delta in self.llm_client.stream(
+                model=self.model,
+                agent="feeling",
+                messages=self._build_messages(self._get_devotional_prompt(feeling, text, verse)),
+                temperature=0.7,
+                max_tokens=2000
+            ):
+                devotional_chunks.append(delta)
+                yield "token", {"stage": "devotional", "text": delta}
+        devotional = "".join(devotional_chunks).strip()
+        await self._remember(feeling, text, verse, devotional, vector)
+        
+        response = FeelingResponse(
+            verse=verse,
+            devotional=devotional,
+            svg=self._generate_motivational_svg(verse, feeling, text) if include_svg else None
+        )
+        conversation.response = response
+        await self.session_store.save_conversation(conversation_id, conversation)
+        logger.debug("Successfully streamed feeling response")
+        yield "done", response.model_dump()
+
+    async def get_conversation(self, conversation_id: str) -> Optional[FeelingConversation]:
+        return await self.session_store.get_conversation(conversation_id) 
\ No newline at end of file
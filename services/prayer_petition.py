@@ -1,12 +1,13 @@
-from typing import Optional
+from typing import Any, AsyncIterator, Optional, Tuple
+from core.llm_gateway import LLMGateway
 from dtos.prayer_petition import PrayerPetitionRequest, PrayerPetitionResponse
 from agents.prayer_petition import PrayerPetitionAgent
 from .base import ServiceBase
 
 class PrayerPetitionService(ServiceBase):
-    def __init__(self):
+    def __init__(self, llm_client: LLMGateway):
         super().__init__()
-        self.agent = PrayerPetitionAgent()
+        self.agent = PrayerPetitionAgent(llm_client)
 
     async def process_petition(self, request: PrayerPetitionRequest) -> PrayerPetitionResponse:
         """
@@ -19,4 +20,11 @@ class PrayerPetitionService(ServiceBase):
 
         except Exception as e:
             self.logger.error(f"Error processing prayer petition: {str(e)}")
-            raise 
\ No newline at end of file
+            raise 
+
+    async def stream_petition(self, request: PrayerPetitionRequest) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a prayer petition response as SSE events
+        """
+        async for event, data in self.agent.stream_petition(request):
+            yield event, data
@@ -1,139 +1,869 @@
+"""
+Per-endpoint, per-IP daily rate limiting.
+
+Each IP gets a token bucket per endpoint: it holds the endpoint's daily limit,
+every request takes one token, and tokens drip back continuously so the limit
+applies over any sliding 24 hour window. A bucket is stored as a single
+deadline, the time at which all its tokens are back (GCRA): a request is
+allowed if the deadline is less than a window ahead, and pushes it one token's
+worth further out.
+
+Deadlines sit in compact tables rather than dicts of strings and tuples:
+addresses are packed into ints (IPv4 into 32 bits; IPv6 is limited per /64,
+the block one host or site is normally given, and packed into 64 bits) and
+stored with a uint32 deadline in open-addressing ``array`` tables, about 8
+bytes per slot for IPv4. A table is written during one time bucket, then
+sealed; a client found in a sealed table is copied into the current one.
+Expiry drops whole tables once every deadline in them has passed, so nothing
+is scanned, sorted or deleted entry by entry.
+
+Counters live in memory and a request only updates a table slot, so its cost
+does not depend on how many IPs are tracked. Persistence runs behind the
+requests in a background task:
+
+- changed counters are appended to ``<storage_file>.log`` as JSON lines
+  every ``flush_interval`` seconds (each line holds the counter's new value,
+  so replaying is idempotent and the last line for an IP wins);
+- every ``snapshot_interval`` seconds, or once the log outgrows
+  ``max_log_bytes``, the log is rotated to ``.log.1`` and compacted with the
+  previous snapshot into a new ``<storage_file>`` in a worker thread, written
+  to a temporary file and swapped in with an atomic rename.
+
+Startup loads the snapshot, then replays ``.log.1`` (left behind if the
+process stopped mid-compaction) and ``.log``. Counter updates made less than
+``flush_interval`` before a crash can be lost.
+"""
+
+from array import array
 from datetime import datetime, timedelta
-from typing import Dict, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 from fastapi import HTTPException
+import asyncio
+import fcntl
+import hashlib
 import json
+import mmap
 import os
 from pathlib import Path
+import socket
+import struct
 import threading
 import logging
+import time
+import zlib
 
 logger = logging.getLogger(__name__)
 
+WINDOW = timedelta(hours=24)
+WINDOW_SECONDS = WINDOW.total_seconds()
+# Tables kept per endpoint are dropped oldest first beyond this many stored clients
+MAX_IPS_PER_ENDPOINT = 10_000_000
+
+# Fibonacci hashing: the top bits of key * 2**64/phi pick the slot
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_HASH_MASK = (1 << 64) - 1
+_V4_MAPPED_PREFIX = bytes(10) + b"\xff\xff"
+
+Counters = Dict[str, Dict[str, Tuple[float, datetime]]]
+# A packed address ("I" or "Q" table key type, key), or the raw string of a non-IP client
+Client = Union[Tuple[str, int], str]
+
+class RateLimitResult(NamedTuple):
+    """Outcome of one rate limit check."""
+    limited: bool
+    limit: int
+    remaining: int
+    # Seconds until the bucket is full again
+    reset_after: float
+    # Seconds until the next request would be allowed, 0 if this one was
+    retry_after: float
+
+def pack_client(ip: str) -> Client:
+    """
+    Pack a client address into the key its buckets are stored under.
+
+    Args:
+        ip (str): Client IP address
+
+    Returns:
+        Client: ("I", 32-bit int) for IPv4 and IPv4-mapped IPv6, ("Q", 64-bit /64 prefix)
+            for IPv6, or ``ip`` itself if it is not an IP address
+    """
+    try:
+        if ":" not in ip:
+            return "I", int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+        packed = socket.inet_pton(socket.AF_INET6, ip)
+    except OSError:
+        return ip
+    if packed[:12] == _V4_MAPPED_PREFIX:
+        return "I", int.from_bytes(packed[12:], "big")
+    return "Q", int.from_bytes(packed[:8], "big")
+
+class _BucketTable:
+    """
+    Open-addressing hash table from packed client keys to bucket deadlines.
+
+    A slot holds the key and the deadline in milliseconds after ``base``, 0
+    marking an empty slot. Tables never grow or delete: when one is full a new
+    one is opened, and tables are dropped whole once ``expires`` has passed.
+    """
+
+    __slots__ = ("keys", "deadlines", "shift", "mask", "size", "max_size", "base", "expires")
+
+    def __init__(self, key_type: str, capacity: int, base: float):
+        """
+        Args:
+            key_type (str): ``array`` typecode of the keys, "I" or "Q"
+            capacity (int): Number of slots, a power of two
+            base (float): Epoch seconds the deadlines are stored relative to
+        """
+        self.keys = array(key_type, bytes(array(key_type).itemsize * capacity))
+        self.deadlines = array("I", bytes(4 * capacity))
+        self.shift = 64 - (capacity.bit_length() - 1)
+        self.mask = capacity - 1
+        self.size = 0
+        self.max_size = capacity * 3 // 4
+        self.base = base
+        # Latest deadline stored; every bucket in the table is full again after it
+        self.expires = base
+
+    @property
+    def capacity(self) -> int:
+        return self.mask + 1
+
+    def find(self, hashed: int, key: int) -> int:
+        """Slot holding ``key``, or the empty slot it would be stored in."""
+        keys, deadlines, mask = self.keys, self.deadlines, self.mask
+        slot = hashed >> self.shift
+        while deadlines[slot] and keys[slot] != key:
+            slot = (slot + 1) & mask
+        return slot
+
+    def deadline(self, slot: int) -> float:
+        """Deadline stored in a slot in epoch seconds, 0 if the slot is empty."""
+        stored = self.deadlines[slot]
+        return self.base + stored / 1000 if stored else 0.0
+
+    def store(self, slot: int, key: int, deadline: float) -> bool:
+        """
+        Store a deadline for ``key`` in the slot :meth:`find` returned for it.
+
+        Returns:
+            bool: False if ``key`` is new and the table is full
+        """
+        if not self.deadlines[slot]:
+            if self.size >= self.max_size:
+                return False
+            self.keys[slot] = key
+            self.size += 1
+        self.deadlines[slot] = int((deadline - self.base) * 1000) or 1
+        if deadline > self.expires:
+            self.expires = deadline
+        return True
+
+class _EndpointBuckets:
+    """Bucket deadlines of every client of one endpoint."""
+
+    def __init__(self, bucket_seconds: float, min_capacity: int):
+        """
+        Args:
+            bucket_seconds (float): How long a table takes writes before a new one is opened
+            min_capacity (int): Slots of the first table, a power of two
+        """
+        self.bucket_seconds = bucket_seconds
+        self.min_capacity = min_capacity
+        # Per key type, oldest first; only the last table is written to
+        self.tables: Dict[str, List[_BucketTable]] = {"I": [], "Q": []}
+        # Clients whose address is not an IP, like test clients
+        self.other: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        """Stored buckets, counting a client copied out of a sealed table twice."""
+        return sum(table.size for tables in self.tables.values() for table in tables) + len(self.other)
+
+    def _current(self, tables: List[_BucketTable], now: float) -> Optional[_BucketTable]:
+        """The table new deadlines go to, or None if its time bucket is over."""
+        if tables and now - tables[-1].base <= self.bucket_seconds:
+            return tables[-1]
+        return None
+
+    def get(self, client: Client) -> float:
+        """Deadline of a client's bucket in epoch seconds, 0 if it has none."""
+        if type(client) is str:
+            return self.other.get(client, 0.0)
+        key_type, key = client
+        hashed = key * _HASH_MULTIPLIER & _HASH_MASK
+        # Newest first: a copy in a newer table supersedes older ones
+        for table in reversed(self.tables[key_type]):
+            slot = table.find(hashed, key)
+            if table.deadlines[slot]:
+                return table.deadline(slot)
+        return 0.0
+
+    def set(self, client: Client, deadline: float, now: float):
+        """Store a client's deadline in the current table."""
+        if type(client) is str:
+            self.other[client] = deadline
+            return
+        key_type, key = client
+        hashed = key * _HASH_MULTIPLIER & _HASH_MASK
+        table = self._current(self.tables[key_type], now)
+        if table is None or not table.store(table.find(hashed, key), key, deadline):
+            table = self._open(key_type, now)
+            table.store(table.find(hashed, key), key, deadline)
+
+    def take(self, client: Client, now: float, interval: float, limit: int) -> Tuple[bool, float]:
+        """
+        Take a token from a client's bucket, unless it has none left.
+
+        Does :meth:`get` and :meth:`set` with one hash and one probe of the current table.
+
+        Args:
+            client (Client): Packed client address
+            now (float): Current time in epoch seconds
+            interval (float): Seconds for one token to drip back
+            limit (int): Tokens the bucket holds
+
+        Returns:
+            Tuple[bool, float]: Whether the client is limited, and its tokens in use
+        """
+        if type(client) is str:
+            used = max(0.0, (self.other.get(client, 0.0) - now) / interval)
+            if used + 1 > limit:
+                return True, used
+            used += 1
+            self.other[client] = now + used * interval
+            return False, used
+
+        key_type, key = client
+        hashed = key * _HASH_MULTIPLIER & _HASH_MASK
+        tables = self.tables[key_type]
+        current = self._current(tables, now)
+        used = 0.0
+        slot = -1
+        for table in reversed(tables):
+            # table.find(), inlined as this runs on every request
+            keys, deadlines, mask = table.keys, table.deadlines, table.mask
+            found = hashed >> table.shift
+            while deadlines[found] and keys[found] != key:
+                found = (found + 1) & mask
+            if table is current:
+                slot = found
+            stored = deadlines[found]
+            if stored:
+                deadline = table.base + stored / 1000
+                if deadline > now:
+                    used = (deadline - now) / interval
+                break
+
+        if used + 1 > limit:
+            return True, used
+        used += 1
+        deadline = now + used * interval
+        if current is None or not current.store(slot, key, deadline):
+            current = self._open(key_type, now)
+            current.store(current.find(hashed, key), key, deadline)
+        return False, used
+
+    def _open(self, key_type: str, now: float) -> _BucketTable:
+        tables = self.tables[key_type]
+        capacity = self.min_capacity
+        if tables:
+            previous = tables[-1]
+            if previous.size >= previous.max_size:
+                capacity = previous.capacity * 2
+            else:
+                # Room for as many new clients as the last time bucket had
+                while capacity * 3 // 4 <= previous.size:
+                    capacity *= 2
+        table = _BucketTable(key_type, capacity, now)
+        tables.append(table)
+        self.expire(now)
+        return table
+
+    def expire(self, now: float, max_size: int = MAX_IPS_PER_ENDPOINT) -> int:
+        """
+        Drop sealed tables whose buckets are all full again, then the oldest
+        tables while more than ``max_size`` buckets are stored.
+
+        Returns:
+            int: Number of buckets dropped
+        """
+        dropped = 0
+        for tables in self.tables.values():
+            # The current table stays even when expired, it is still written to
+            while len(tables) > 1 and tables[0].expires <= now:
+                dropped += tables.pop(0).size
+            for table in tables[1:-1]:
+                if table.expires <= now:
+                    tables.remove(table)
+                    dropped += table.size
+        expired = [client for client, deadline in self.other.items() if deadline <= now]
+        for client in expired:
+            del self.other[client]
+        dropped += len(expired)
+
+        size = len(self)
+        while size > max_size:
+            oldest = min(
+                (tables for tables in self.tables.values() if len(tables) > 1),
+                key=lambda tables: tables[0].base,
+                default=None
+            )
+            if oldest is None:
+                break
+            table = oldest.pop(0)
+            size -= table.size
+            dropped += table.size
+        return dropped
+
 class RateLimiter:
-    def __init__(self, requests_per_day: int = 5, storage_file: str = "rate_limits.json"):
+    def __init__(
+        self,
+        requests_per_day: int = 5,
+        storage_file: str = "rate_limits.json",
+        limits: Optional[Dict[str, int]] = None,
+        flush_interval: float = 1.0,
+        snapshot_interval: float = 300.0,
+        max_log_bytes: int = 4 * 1024 * 1024,
+        bucket_seconds: float = WINDOW_SECONDS / 4,
+        min_capacity: int = 1 << 16
+    ):
+        """
+        Args:
+            requests_per_day (int): Requests allowed per IP and endpoint in a 24 hour window
+            storage_file (str): Snapshot path; the change log sits next to it
+            limits (Optional[Dict[str, int]]): Daily limits of specific endpoints, overriding
+                ``requests_per_day``
+            flush_interval (float): Seconds between appends of changed counters to the log
+            snapshot_interval (float): Seconds between compactions of the log into the snapshot
+            max_log_bytes (int): Log size that triggers a compaction before the interval
+            bucket_seconds (float): How long a table takes writes before a new one is opened;
+                expired buckets are freed up to this long after their deadline
+            min_capacity (int): Slots of the first table per endpoint, a power of two
+        """
         self.requests_per_day = requests_per_day
-        # Structure: {endpoint: {ip: (count, timestamp)}}
-        self.endpoint_requests: Dict[str, Dict[str, Tuple[int, datetime]]] = {}
+        self.limits = dict(limits or {})
+        self.bucket_seconds = bucket_seconds
+        self.min_capacity = min_capacity
+        self.buckets: Dict[str, _EndpointBuckets] = {}
         self.storage_file = storage_file
+        self.log_file = f"{storage_file}.log"
+        self.rotated_log_file = f"{storage_file}.log.1"
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.max_log_bytes = max_log_bytes
+        # Guards the counters and the dirty set for callers on other threads; never held during I/O
         self.lock = threading.Lock()
-        self.last_cleanup = datetime.now()
+        # Counters changed since the last log append, as (tokens in use, epoch seconds);
+        # one entry per IP however often it changed
+        self._dirty: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self._persist_task: Optional[asyncio.Task] = None
         self.cleanup_interval = timedelta(minutes=30)  # Cleanup every 30 minutes
-        
+
         # Create storage directory if it doesn't exist
         storage_path = Path(storage_file)
         storage_path.parent.mkdir(parents=True, exist_ok=True)
-        
+
         # Load existing data if available
         self._load_data()
 
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Build a limiter from ``RATE_LIMIT_*`` environment variables.
+
+        RATE_LIMIT_PER_DAY sets the default daily limit, RATE_LIMITS overrides it
+        per endpoint key (``"bible_character_chat=50,feeling_get=200"``) and
+        RATE_LIMIT_FILE moves the snapshot. RATE_LIMIT_BACKEND selects
+        "memory" (per process) or "shm" (SharedRateLimiter, shared by the
+        workers on the host, sized by RATE_LIMIT_SHM_SLOTS and stored at
+        RATE_LIMIT_SHM_FILE).
+
+        Returns:
+            RateLimiter: The configured limiter
+        """
+        limits = {}
+        for item in os.getenv("RATE_LIMITS", "").split(","):
+            if item.strip():
+                endpoint, _, limit = item.partition("=")
+                limits[endpoint.strip()] = int(limit)
+        settings = {
+            "requests_per_day": int(os.getenv("RATE_LIMIT_PER_DAY", "5")),
+            "storage_file": os.getenv("RATE_LIMIT_FILE", "rate_limits.json"),
+            "limits": limits
+        }
+        backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+        if backend == "memory":
+            return cls(**settings)
+        if backend == "shm":
+            return SharedRateLimiter(
+                shared_file=os.getenv("RATE_LIMIT_SHM_FILE"),
+                slots=int(os.getenv("RATE_LIMIT_SHM_SLOTS", str(1 << 20))),
+                **settings
+            )
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+    def limit_for(self, endpoint: str) -> int:
+        """Daily limit of an endpoint."""
+        return self.limits.get(endpoint, self.requests_per_day)
+
     def _load_data(self):
-        """Load rate limit data from file if it exists."""
+        """Load the snapshot and replay the change logs on top of it."""
         try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    self.endpoint_requests = {
-                        endpoint: {
-                            ip: (count, datetime.fromisoformat(timestamp))
-                            for ip, (count, timestamp) in ip_data.items()
-                        }
-                        for endpoint, ip_data in data.items()
-                    }
-                logger.info(f"Loaded rate limit data for {len(self.endpoint_requests)} endpoints")
+            counters = _read_snapshot(self.storage_file)
+            replayed = 0
+            for path in (self.rotated_log_file, self.log_file):
+                replayed += _replay_log(path, counters)
+            self.restore(counters)
+            if counters or replayed:
+                logger.info(
+                    f"Loaded rate limit data for {len(counters)} endpoints "
+                    f"({replayed} logged changes replayed)"
+                )
         except Exception as e:
             logger.error(f"Error loading rate limit data: {e}")
-            self.endpoint_requests = {}
+            self.buckets = {}
+
+    def restore(self, counters: Counters):
+        """
+        Load counters in the snapshot format, skipping buckets that are full again.
 
-    def _save_data(self):
-        """Save rate limit data to file."""
+        Args:
+            counters (Counters): {endpoint: {ip: (tokens in use, when they were counted)}}
+        """
+        now = time.time()
+        with self.lock:
+            for endpoint, ip_data in counters.items():
+                interval = WINDOW_SECONDS / self.limit_for(endpoint)
+                buckets = self._endpoint_buckets(endpoint)
+                for ip, (count, timestamp) in ip_data.items():
+                    deadline = timestamp.timestamp() + count * interval
+                    if deadline > now:
+                        buckets.set(pack_client(ip), deadline, now)
+
+    def _endpoint_buckets(self, endpoint: str) -> _EndpointBuckets:
+        buckets = self.buckets.get(endpoint)
+        if buckets is None:
+            buckets = self.buckets[endpoint] = _EndpointBuckets(self.bucket_seconds, self.min_capacity)
+        return buckets
+
+    async def start(self):
+        """Start persisting counter changes in the background."""
+        if self._persist_task is None:
+            self._persist_task = asyncio.create_task(self._persist_loop())
+
+    async def stop(self):
+        """Stop the background task and append the last changes to the log."""
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+            try:
+                await self._persist_task
+            except asyncio.CancelledError:
+                pass
+            self._persist_task = None
+        await asyncio.to_thread(self._append_log)
+
+    async def _persist_loop(self):
+        loop = asyncio.get_running_loop()
+        last_snapshot = last_cleanup = loop.time()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self._append_log)
+                now = loop.time()
+                if now - last_cleanup > self.cleanup_interval.total_seconds():
+                    self._cleanup_expired()
+                    last_cleanup = now
+                if now - last_snapshot > self.snapshot_interval or self._log_size() > self.max_log_bytes:
+                    await self.compact()
+                    last_snapshot = now
+            except Exception as e:
+                logger.error(f"Error persisting rate limit data: {e}")
+
+    def _append_log(self):
+        """Append every counter changed since the last call to the change log."""
+        with self.lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        lines = "".join(
+            json.dumps([endpoint, ip, count, datetime.fromtimestamp(timestamp).isoformat()]) + "\n"
+            for (endpoint, ip), (count, timestamp) in dirty.items()
+        )
+        with open(self.log_file, "a") as f:
+            f.write(lines)
+
+    def _log_size(self) -> int:
         try:
-            with open(self.storage_file, 'w') as f:
-                data = {
-                    endpoint: {
-                        ip: (count, timestamp.isoformat())
-                        for ip, (count, timestamp) in ip_data.items()
-                    }
-                    for endpoint, ip_data in self.endpoint_requests.items()
-                }
-                json.dump(data, f)
-        except Exception as e:
-            logger.error(f"Error saving rate limit data: {e}")
+            return os.path.getsize(self.log_file)
+        except OSError:
+            return 0
 
-    def is_rate_limited(self, endpoint: str, ip: str) -> bool:
+    async def compact(self):
+        """Fold the change log into a new snapshot without touching the live counters."""
+        await asyncio.to_thread(self._append_log)
+        # A rotated log left by an interrupted compaction is folded in before rotating again
+        if not os.path.exists(self.rotated_log_file):
+            if not os.path.exists(self.log_file):
+                return
+            os.replace(self.log_file, self.rotated_log_file)
+        await asyncio.to_thread(self._write_snapshot)
+
+    def _write_snapshot(self):
+        counters = _read_snapshot(self.storage_file)
+        _replay_log(self.rotated_log_file, counters)
+        cutoff = datetime.now() - WINDOW
+        data = {
+            endpoint: {
+                ip: (count, timestamp.isoformat())
+                for ip, (count, timestamp) in ip_data.items()
+                if timestamp >= cutoff
+            }
+            for endpoint, ip_data in counters.items()
+        }
+        temporary = f"{self.storage_file}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.storage_file)
+        os.remove(self.rotated_log_file)
+        logger.info(f"Compacted rate limit data: {sum(len(ips) for ips in data.values())} live counters")
+
+    def check(self, endpoint: str, ip: str) -> RateLimitResult:
+        """
+        Count a request against an IP's bucket for an endpoint.
+
+        Checking and counting happen under one lock acquisition, so the
+        returned limit, remaining and reset values always describe the same state.
+
+        Args:
+            endpoint (str): Rate limit key of the endpoint
+            ip (str): Client IP address
+
+        Returns:
+            RateLimitResult: Whether the request is limited, plus the values for the X-RateLimit headers
+        """
+        limit = self.limits.get(endpoint, self.requests_per_day)
+        # Seconds for one token to drip back
+        interval = WINDOW_SECONDS / limit
+        client = pack_client(ip)
         with self.lock:
-            current_time = datetime.now()
-            
+            now = time.time()
+
             # Initialize endpoint if it doesn't exist
-            if endpoint not in self.endpoint_requests:
-                self.endpoint_requests[endpoint] = {}
-            
-            # Periodic cleanup
-            if current_time - self.last_cleanup > self.cleanup_interval:
-                self._cleanup_expired()
-                self.last_cleanup = current_time
-                self._save_data()
-            
-            if ip not in self.endpoint_requests[endpoint]:
-                self.endpoint_requests[endpoint][ip] = (1, current_time)
-                self._save_data()
-                return False
-                
-            count, first_request_time = self.endpoint_requests[endpoint][ip]
-            
-            # Check if 24 hours have passed since first request
-            if current_time - first_request_time > timedelta(hours=24):
-                self.endpoint_requests[endpoint][ip] = (1, current_time)
-                self._save_data()
-                return False
-                
-            # Check if limit is reached
-            if count >= self.requests_per_day:
-                return True
-                
-            # Increment request count
-            self.endpoint_requests[endpoint][ip] = (count + 1, first_request_time)
-            self._save_data()
-            return False
+            buckets = self.buckets.get(endpoint)
+            if buckets is None:
+                buckets = self._endpoint_buckets(endpoint)
+
+            limited, used = buckets.take(client, now, interval, limit)
+            if limited:
+                return RateLimitResult(True, limit, 0, used * interval, (used + 1 - limit) * interval)
+            self._dirty[(endpoint, ip)] = (used, now)
+        return RateLimitResult(False, limit, int(limit - used), used * interval, 0.0)
+
+    def is_rate_limited(self, endpoint: str, ip: str) -> bool:
+        return self.check(endpoint, ip).limited
+
+    def _used(self, endpoint: str, ip: str) -> float:
+        """Tokens in use by an IP on an endpoint right now, without counting a request."""
+        buckets = self.buckets.get(endpoint)
+        if buckets is None:
+            return 0.0
+        deadline = buckets.get(pack_client(ip))
+        return max(0.0, (deadline - time.time()) * self.limit_for(endpoint) / WINDOW_SECONDS)
 
     def _cleanup_expired(self):
-        """Remove expired entries and limit total storage."""
-        current_time = datetime.now()
-        
-        # Remove expired entries for each endpoint
-        for endpoint in self.endpoint_requests:
-            expired_ips = [
-                ip for ip, (_, timestamp) in self.endpoint_requests[endpoint].items()
-                if current_time - timestamp > timedelta(hours=24)
-            ]
-            for ip in expired_ips:
-                del self.endpoint_requests[endpoint][ip]
-            
-            # Limit total storage per endpoint
-            if len(self.endpoint_requests[endpoint]) > 100000:  # Limit to 100k IPs per endpoint
-                sorted_ips = sorted(
-                    self.endpoint_requests[endpoint].items(),
-                    key=lambda x: x[1][1]  # Sort by timestamp
-                )
-                # Keep only the most recent 100k entries
-                self.endpoint_requests[endpoint] = dict(sorted_ips[-100000:])
-            
-        logger.info(f"Cleaned up rate limit data. Current endpoints: {len(self.endpoint_requests)}")
+        """Drop the tables whose buckets are all full again and cap the clients kept per endpoint."""
+        now = time.time()
+        with self.lock:
+            dropped = sum(buckets.expire(now) for buckets in self.buckets.values())
+        logger.info(
+            f"Cleaned up rate limit data: {dropped} buckets dropped, "
+            f"{sum(len(buckets) for buckets in self.buckets.values())} kept"
+        )
 
     def get_remaining_requests(self, endpoint: str, ip: str) -> int:
-        if endpoint not in self.endpoint_requests or ip not in self.endpoint_requests[endpoint]:
-            return self.requests_per_day
-            
-        count, first_request_time = self.endpoint_requests[endpoint][ip]
-        if datetime.now() - first_request_time > timedelta(hours=24):
-            return self.requests_per_day
-            
-        return max(0, self.requests_per_day - count)
+        return max(0, int(self.limit_for(endpoint) - self._used(endpoint, ip)))
+
+    def stats(self, endpoints: Iterable[str] = ()) -> Dict[str, Dict[str, int]]:
+        """
+        Buckets and tables held per endpoint.
+
+        Args:
+            endpoints (Iterable[str]): Endpoint keys to report even before their first check
+
+        Returns:
+            Dict[str, Dict[str, int]]: Buckets and tables per endpoint key
+        """
+        stats = {endpoint: {"buckets": 0, "tables": 0} for endpoint in endpoints}
+        with self.lock:
+            for endpoint, buckets in self.buckets.items():
+                stats[endpoint] = {
+                    "buckets": len(buckets),
+                    "tables": sum(len(tables) for tables in buckets.tables.values())
+                }
+        return stats
 
     def get_reset_time(self, endpoint: str, ip: str) -> datetime:
         """Get the time when the rate limit will reset for an IP on a specific endpoint."""
-        if endpoint not in self.endpoint_requests or ip not in self.endpoint_requests[endpoint]:
-            return datetime.now()
-        return self.endpoint_requests[endpoint][ip][1] + timedelta(hours=24)
+        seconds = self._used(endpoint, ip) * WINDOW_SECONDS / self.limit_for(endpoint)
+        return datetime.now() + timedelta(seconds=seconds)
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose buckets live in a memory-mapped file shared by every
+    worker process on the host, so N uvicorn workers enforce one quota
+    instead of N.
+
+    The file holds a fixed-size open-addressing table of 24 byte slots: the
+    packed client, a tag of the endpoint and address family, and the bucket
+    deadline in epoch milliseconds. The table is split into stripes, each
+    guarded by an ``fcntl`` lock on one byte of the file, and a key's probe
+    sequence never leaves its stripe, so a check holds one stripe lock and
+    workers only contend when they hit the same stripe. Expired slots are
+    reused in place, and when a probe sequence is full the bucket closest to
+    its deadline is evicted, so the table needs no cleanup pass.
+
+    The file is the persistence: the kernel writes it back like any mapped
+    file, and it outlives worker restarts. Point it at ``/dev/shm`` to skip
+    disk writeback. A new file is seeded from the JSON snapshot and change
+    log of the in-memory backend.
+    """
+
+    MAGIC = b"BRLSHM01"
+    # Magic, slot count, stripe count
+    HEADER = struct.Struct("<8sQQ")
+    DATA_OFFSET = 64
+    SLOT_WORDS = 3
+
+    def __init__(
+        self,
+        requests_per_day: int = 5,
+        storage_file: str = "rate_limits.json",
+        limits: Optional[Dict[str, int]] = None,
+        shared_file: Optional[str] = None,
+        slots: int = 1 << 20,
+        stripes: int = 1024,
+        max_probes: int = 32
+    ):
+        """
+        Args:
+            requests_per_day (int): Requests allowed per IP and endpoint in a 24 hour window
+            storage_file (str): JSON snapshot a new shared file is seeded from
+            limits (Optional[Dict[str, int]]): Daily limits of specific endpoints, overriding
+                ``requests_per_day``
+            shared_file (Optional[str]): Path of the shared table, ``<storage_file>.shm`` by default
+            slots (int): Slots in the table, a power of two; every worker must use the same
+            stripes (int): Lock stripes, a power of two dividing ``slots``
+            max_probes (int): Slots a lookup visits before evicting
+        """
+        if slots & (slots - 1) or stripes & (stripes - 1) or slots % stripes:
+            raise ValueError("slots and stripes must be powers of two, with stripes dividing slots")
+        self.shared_file = shared_file or f"{storage_file}.shm"
+        self.slots = slots
+        self.stripes = stripes
+        self.max_probes = min(max_probes, slots // stripes)
+        self.evictions = 0
+        self._shift = 64 - (slots.bit_length() - 1)
+        self._stripe_mask = slots // stripes - 1
+        self._stripe_shift = (slots // stripes).bit_length() - 1
+        self._tags: Dict[str, int] = {}
+        super().__init__(requests_per_day=requests_per_day, storage_file=storage_file, limits=limits)
+
+    def _load_data(self):
+        """Map the shared table, creating and seeding it if this worker is the first."""
+        self._fd = os.open(self.shared_file, os.O_RDWR | os.O_CREAT, 0o644)
+        size = self.DATA_OFFSET + self.slots * self.SLOT_WORDS * 8
+        # Lock byte past the stripes' bytes serializes creating the file
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, self.stripes)
+        try:
+            created = os.fstat(self._fd).st_size == 0
+            if created:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, self.slots, self.stripes), 0)
+            magic, slots, stripes = self.HEADER.unpack(os.pread(self._fd, self.HEADER.size, 0))
+            if (magic, slots, stripes) != (self.MAGIC, self.slots, self.stripes):
+                raise ValueError(
+                    f"{self.shared_file} holds a table of {slots} slots in {stripes} stripes, not "
+                    f"{self.slots} in {self.stripes}; remove it or match RATE_LIMIT_SHM_SLOTS"
+                )
+            self._mm = mmap.mmap(self._fd, size)
+            self._words = memoryview(self._mm)[self.DATA_OFFSET:].cast("Q")
+            if created:
+                super()._load_data()
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, self.stripes)
+        logger.info(f"Rate limits shared through {self.shared_file} ({self.slots} slots, created={created})")
+
+    def restore(self, counters: Counters):
+        """Write counters in the snapshot format into the shared table."""
+        now = int(time.time() * 1000)
+        with self.lock:
+            for endpoint, ip_data in counters.items():
+                interval = WINDOW_SECONDS * 1000 / self.limit_for(endpoint)
+                for ip, (count, timestamp) in ip_data.items():
+                    deadline = int(timestamp.timestamp() * 1000 + count * interval)
+                    if deadline > now:
+                        tag, key, slot = self._locate(endpoint, ip)
+                        slot, _ = self._probe(tag, key, slot, now)
+                        self._store(slot, tag, key, deadline)
+
+    async def start(self):
+        """Nothing runs in the background; the shared file is the persistence."""
+
+    async def stop(self):
+        """Flush the mapped table to its file."""
+        self._mm.flush()
+
+    def _cleanup_expired(self):
+        """Expired slots are reused in place, so there is nothing to clean up."""
+
+    def _locate(self, endpoint: str, ip: str) -> Tuple[int, int, int]:
+        """Tag, key and home slot of an IP's bucket for an endpoint."""
+        tag = self._tags.get(endpoint)
+        if tag is None:
+            # Stable across processes, unlike hash(); the low bits hold the address family
+            tag = self._tags[endpoint] = zlib.crc32(endpoint.encode()) << 2
+        client = pack_client(ip)
+        if type(client) is str:
+            tag |= 3
+            key = int.from_bytes(hashlib.blake2b(client.encode(), digest_size=8).digest(), "big")
+        else:
+            tag |= 1 if client[0] == "I" else 2
+            key = client[1]
+        slot = ((key ^ tag) * _HASH_MULTIPLIER & _HASH_MASK) >> self._shift
+        return tag, key, slot
+
+    def _probe(self, tag: int, key: int, slot: int, now: int) -> Tuple[int, int]:
+        """
+        Find a bucket within its stripe.
+
+        Returns:
+            Tuple[int, int]: The slot holding the bucket and its deadline, or the slot to
+                store a new bucket in and 0
+        """
+        words = self._words
+        stripe = slot & ~self._stripe_mask
+        free = victim = -1
+        victim_deadline = 0
+        for _ in range(self.max_probes):
+            offset = slot * 3
+            slot_tag = words[offset + 1]
+            if not slot_tag:
+                if free < 0:
+                    free = slot
+                break
+            deadline = words[offset + 2]
+            if slot_tag == tag and words[offset] == key:
+                return slot, deadline
+            if deadline <= now:
+                if free < 0:
+                    free = slot
+            elif victim < 0 or deadline < victim_deadline:
+                victim, victim_deadline = slot, deadline
+            slot = stripe | ((slot + 1) & self._stripe_mask)
+        if free < 0:
+            self.evictions += 1
+            free = victim
+        return free, 0
+
+    def _store(self, slot: int, tag: int, key: int, deadline: int):
+        offset = slot * 3
+        words = self._words
+        words[offset] = key
+        words[offset + 1] = tag
+        words[offset + 2] = deadline
+
+    def check(self, endpoint: str, ip: str) -> RateLimitResult:
+        limit = self.limits.get(endpoint, self.requests_per_day)
+        # Milliseconds for one token to drip back
+        interval = WINDOW_SECONDS * 1000 / limit
+        tag, key, slot = self._locate(endpoint, ip)
+        stripe = slot >> self._stripe_shift
+        with self.lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                now = int(time.time() * 1000)
+                slot, deadline = self._probe(tag, key, slot, now)
+                used = (deadline - now) / interval if deadline > now else 0.0
+                if used + 1 > limit:
+                    return RateLimitResult(
+                        True, limit, 0, used * interval / 1000, (used + 1 - limit) * interval / 1000
+                    )
+                used += 1
+                self._store(slot, tag, key, now + int(used * interval))
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        return RateLimitResult(False, limit, int(limit - used), used * interval / 1000, 0.0)
+
+    def _used(self, endpoint: str, ip: str) -> float:
+        tag, key, slot = self._locate(endpoint, ip)
+        stripe = slot >> self._stripe_shift
+        with self.lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_SH, 1, stripe)
+            try:
+                now = int(time.time() * 1000)
+                _, deadline = self._probe(tag, key, slot, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+        return max(0.0, (deadline - now) / 1000 * self.limit_for(endpoint) / WINDOW_SECONDS)
+
+    def stats(self, endpoints: Iterable[str] = ()) -> Dict[str, Dict[str, int]]:
+        """
+        Live buckets per endpoint, read without locking.
+
+        Slots only hold a checksum of their endpoint, so buckets of endpoints this
+        worker has neither checked nor been told about are reported under "other".
+
+        Args:
+            endpoints (Iterable[str]): Endpoint keys to name besides the configured and seen ones
+
+        Returns:
+            Dict[str, Dict[str, int]]: Live buckets per endpoint key
+        """
+        import numpy as np
+
+        names = {zlib.crc32(endpoint.encode()): endpoint for endpoint in {*endpoints, *self.limits, *self._tags}}
+        words = np.frombuffer(self._mm, dtype=np.uint64, count=self.slots * self.SLOT_WORDS, offset=self.DATA_OFFSET)
+        slots = words.reshape(self.slots, self.SLOT_WORDS)
+        checksums, counts = np.unique(slots[slots[:, 2] > int(time.time() * 1000), 1] >> 2, return_counts=True)
+        del words, slots
+        stats: Dict[str, Dict[str, int]] = {}
+        for checksum, count in zip(checksums.tolist(), counts.tolist()):
+            endpoint = stats.setdefault(names.get(checksum, "other"), {"buckets": 0})
+            endpoint["buckets"] += count
+        return stats
+
+def _read_snapshot(path: str) -> Counters:
+    """Read a snapshot written by :meth:`RateLimiter._write_snapshot` (or the older whole-file format)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {
+        endpoint: {
+            ip: (count, datetime.fromisoformat(timestamp))
+            for ip, (count, timestamp) in ip_data.items()
+        }
+        for endpoint, ip_data in data.items()
+    }
+
+def _replay_log(path: str, counters: Counters) -> int:
+    """Apply a change log to ``counters``; a torn last line from a crash is skipped."""
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                endpoint, ip, count, timestamp = json.loads(line)
+            except ValueError:
+                continue
+            counters.setdefault(endpoint, {})[ip] = (count, datetime.fromisoformat(timestamp))
+            applied += 1
+    return applied
 
 # Create a singleton instance
-rate_limiter = RateLimiter() 
\ No newline at end of file
+rate_limiter = RateLimiter.from_env()
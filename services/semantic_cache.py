@@ -0,0 +1,272 @@
+"""
+Semantic cache for feeling requests
+
+Many feeling messages are near-duplicates of earlier ones ("estoy ansioso
+por mi trabajo", "Estoy ansiosa por mi trabajo!"). This cache turns each
+message into a hashed character n-gram vector. Each feeling keeps its
+vectors in its own NumPy block, so a single matrix-vector product over that
+block finds the most similar earlier message with the same feeling, and its
+verse/devotional is reused when the cosine similarity clears the threshold.
+A lookup never touches the rows of other feelings.
+
+Everything runs locally: no embedding model or network access is needed.
+Memory is bounded by ``capacity`` entries across all feelings; when full, the
+oldest entry is evicted, whatever its feeling. Blocks grow by doubling, so
+they hold at most twice their entries. Lookups and inserts take an internal
+lock, so callers can run them in worker threads (NumPy releases the GIL
+during the product) and keep large caches off the event loop.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+import logging
+from collections import deque
+from typing import Deque, Dict, Generic, List, Optional, Tuple, TypeVar
+import numpy as np
+from core.request_log import record_cache_hit
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+_WORDS = re.compile(r"[a-z0-9]+")
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+def normalize_text(text: str) -> str:
+    """Casefold, drop accents and punctuation, and pad with spaces for word-boundary n-grams."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return f" {' '.join(_WORDS.findall(text))} "
+
+class NGramVectorizer:
+    """Hashing-trick vectorizer over character n-grams, with signed buckets and L2 normalization."""
+
+    def __init__(self, dim: int = 512, ngram_sizes: Tuple[int, ...] = (2, 3, 4)):
+        """
+        Args:
+            dim (int): Number of hash buckets (vector length)
+            ngram_sizes (Tuple[int, ...]): Character n-gram lengths to hash
+        """
+        self.dim = dim
+        self.ngram_sizes = ngram_sizes
+
+    def transform(self, text: str) -> np.ndarray:
+        """
+        Vectorize one text.
+
+        N-grams are hashed with a polynomial rolling hash and a 64-bit mixer
+        computed over the whole byte array at once, so the cost is a handful of
+        NumPy operations per n-gram size rather than a Python loop per n-gram.
+
+        Args:
+            text (str): Text to vectorize
+
+        Returns:
+            np.ndarray: float32 vector of length ``dim`` with unit norm (all zeros for empty text)
+        """
+        data = np.frombuffer(normalize_text(text).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        vector = np.zeros(self.dim, dtype=np.float32)
+
+        with np.errstate(over="ignore"):
+            for size in self.ngram_sizes:
+                count = len(data) - size + 1
+                if count <= 0:
+                    continue
+                hashes = np.full(count, size, dtype=np.uint64)
+                for offset in range(size):
+                    hashes = hashes * np.uint64(1000003) + data[offset:offset + count]
+                # splitmix64 finalizer spreads nearby n-grams over all buckets
+                hashes ^= hashes >> np.uint64(30)
+                hashes = (hashes * np.uint64(0xBF58476D1CE4E5B9)) & _MASK64
+                hashes ^= hashes >> np.uint64(27)
+                hashes = (hashes * np.uint64(0x94D049BB133111EB)) & _MASK64
+                hashes ^= hashes >> np.uint64(31)
+
+                buckets = (hashes % np.uint64(self.dim)).astype(np.intp)
+                signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+                vector += np.bincount(buckets, weights=signs, minlength=self.dim).astype(np.float32)
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+class _ScopeBlock(Generic[V]):
+    """Rows of one scope: vectors packed at the top of a growable matrix, with their values and entry ids."""
+
+    def __init__(self, dim: int, rows: int):
+        self.matrix = np.zeros((rows, dim), dtype=np.float32)
+        self.values: List[V] = []
+        self.ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, entry_id: int, vector: np.ndarray, value: V, max_rows: int) -> int:
+        """Add a row, doubling the matrix up to ``max_rows`` when it is full; returns the row."""
+        row = len(self.ids)
+        if row == len(self.matrix):
+            grown = np.zeros((min(2 * row, max_rows), self.matrix.shape[1]), dtype=np.float32)
+            grown[:row] = self.matrix
+            self.matrix = grown
+        self.matrix[row] = vector
+        self.values.append(value)
+        self.ids.append(entry_id)
+        return row
+
+    def remove(self, row: int) -> Optional[int]:
+        """Drop a row by moving the last row into it; returns the id of the moved entry, if any."""
+        last = len(self.ids) - 1
+        moved = None
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.values[row] = self.values[last]
+            self.ids[row] = moved = self.ids[last]
+        self.values.pop()
+        self.ids.pop()
+        return moved
+
+class SemanticCache(Generic[V]):
+    """Bounded nearest-neighbour cache keyed by text similarity within a scope."""
+
+    # Rows a new scope's block starts with
+    INITIAL_BLOCK_ROWS = 64
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        threshold: float = 0.85,
+        vectorizer: Optional[NGramVectorizer] = None
+    ):
+        """
+        Args:
+            capacity (int): Maximum number of cached entries over all scopes
+            threshold (float): Minimum cosine similarity for a hit
+            vectorizer (Optional[NGramVectorizer]): Text vectorizer, 512 buckets by default
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectorizer = vectorizer or NGramVectorizer()
+        self._blocks: Dict[int, _ScopeBlock[V]] = {}
+        # Entry id -> (scope id, row in its block); ids are handed out in insertion order
+        self._locations: Dict[int, Tuple[int, int]] = {}
+        self._order: Deque[int] = deque()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self._lookup_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["SemanticCache"]:
+        """
+        Build a cache from ``FEELING_CACHE_*`` environment variables.
+
+        Returns:
+            Optional[SemanticCache]: The cache, or None when FEELING_CACHE_CAPACITY is 0
+        """
+        capacity = int(os.getenv("FEELING_CACHE_CAPACITY", "10000"))
+        if capacity <= 0:
+            return None
+        return cls(
+            capacity=capacity,
+            threshold=float(os.getenv("FEELING_CACHE_THRESHOLD", "0.85")),
+            vectorizer=NGramVectorizer(dim=int(os.getenv("FEELING_CACHE_DIM", "512")))
+        )
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @staticmethod
+    def scope_id(scope: str) -> int:
+        """Stable integer id for a scope such as the feeling label."""
+        return zlib.crc32(normalize_text(scope).encode("utf-8"))
+
+    def lookup(self, scope: str, text: str) -> Tuple[Optional[V], float, np.ndarray]:
+        """
+        Find the most similar cached entry in the same scope.
+
+        Args:
+            scope (str): Partition key; only entries with the same scope can match
+            text (str): Query text
+
+        Returns:
+            Tuple[Optional[V], float, np.ndarray]: The cached value (None on a miss),
+            the best similarity found and the query vector, reusable by :meth:`add`
+        """
+        start = time.perf_counter()
+        vector = self.vectorizer.transform(text)
+        scope_id = self.scope_id(scope)
+        value, similarity = None, 0.0
+
+        with self._lock:
+            block = self._blocks.get(scope_id)
+            if block:
+                scores = block.matrix[:len(block)] @ vector
+                best = int(np.argmax(scores))
+                similarity = float(scores[best])
+                if similarity >= self.threshold:
+                    value = block.values[best]
+
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                record_cache_hit()
+            self._lookup_seconds += time.perf_counter() - start
+        return value, similarity, vector
+
+    def add(self, scope: str, text: str, value: V, vector: Optional[np.ndarray] = None):
+        """
+        Insert an entry, evicting the oldest one when the cache is full.
+
+        Args:
+            scope (str): Partition key
+            text (str): Text the value answers
+            value (V): Value returned on later hits
+            vector (Optional[np.ndarray]): Precomputed vector from :meth:`lookup`
+        """
+        if vector is None:
+            vector = self.vectorizer.transform(text)
+        if not vector.any():
+            return
+
+        scope_id = self.scope_id(scope)
+        with self._lock:
+            if len(self._order) >= self.capacity:
+                self._evict(self._order.popleft())
+            block = self._blocks.get(scope_id)
+            if block is None:
+                block = self._blocks[scope_id] = _ScopeBlock(
+                    self.vectorizer.dim, min(self.INITIAL_BLOCK_ROWS, self.capacity)
+                )
+            entry_id = self._next_id
+            self._next_id += 1
+            self._locations[entry_id] = (scope_id, block.append(entry_id, vector, value, self.capacity))
+            self._order.append(entry_id)
+
+    def _evict(self, entry_id: int):
+        scope_id, row = self._locations.pop(entry_id)
+        block = self._blocks[scope_id]
+        moved = block.remove(row)
+        if moved is not None:
+            self._locations[moved] = (scope_id, row)
+        if not block:
+            del self._blocks[scope_id]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._order),
+            "capacity": self.capacity,
+            "scopes": len(self._blocks),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_lookup_ms": self._lookup_seconds / lookups * 1000 if lookups else 0.0,
+            "matrix_bytes": sum(block.matrix.nbytes for block in self._blocks.values())
+        }
@@ -0,0 +1,426 @@
+"""
+Session and conversation stores
+
+Chat sessions, character conversation memories and feeling conversations are
+read and written through a SessionStore, with two backends:
+
+- SessionStore: in memory, the process is the store. Memories live only in the
+  agent's dictionaries and feeling conversations in a dict, which is right for
+  a single worker.
+- SQLiteSessionStore: tables in the shared SQLite database (WAL mode), so any
+  uvicorn worker on the host can continue a conversation another worker
+  started, and ``GET /api/v1/feeling/{conversation_id}`` works on every worker.
+
+SQLiteSessionStore uses the agent's in-process memories as a local cache. Each
+turn reads only the row's revision, and the payload is transferred only when
+another worker has written since. Writes from concurrent requests are
+group-committed: they queue for ``flush_interval`` seconds and share one
+transaction. Turn and conversation saves wait for their commit, so the user's
+next request may land on any worker. Session activity updates do not wait.
+A transaction that fails is retried with backoff; if it still fails, the
+saves waiting on it raise the database error.
+"""
+
+import asyncio
+import json
+import os
+import uuid
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from sqlalchemy import bindparam, case, delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+from agents.bible_character import ConversationMemory
+from core.cache import LRUCache
+from dtos.feeling_conversation import FeelingConversation
+from models.session import ConversationMemoryRecord, FeelingConversationRecord, UserSessionRecord
+
+logger = logging.getLogger(__name__)
+
+_SESSIONS = UserSessionRecord.__table__
+_MEMORIES = ConversationMemoryRecord.__table__
+_CONVERSATIONS = FeelingConversationRecord.__table__
+
+# Statement per kind of queued write, executed in this order within a flush
+_WRITES = {
+    "session": insert(_SESSIONS).on_conflict_do_update(
+        index_elements=[_SESSIONS.c.user_id],
+        set_={"last_activity": insert(_SESSIONS).excluded.last_activity}
+    ),
+    "memory": insert(_MEMORIES).on_conflict_do_update(
+        index_elements=[_MEMORIES.c.user_id, _MEMORIES.c.character_name],
+        set_={
+            "revision": insert(_MEMORIES).excluded.revision,
+            "payload": insert(_MEMORIES).excluded.payload,
+            "updated_at": insert(_MEMORIES).excluded.updated_at
+        }
+    ),
+    "summary": update(_MEMORIES).where(
+        _MEMORIES.c.user_id == bindparam("key_user_id"),
+        _MEMORIES.c.character_name == bindparam("key_character_name")
+    ).values(summary=bindparam("new_summary"), revision=bindparam("new_revision")),
+    "conversation": insert(_CONVERSATIONS).on_conflict_do_update(
+        index_elements=[_CONVERSATIONS.c.conversation_id],
+        set_={
+            "payload": insert(_CONVERSATIONS).excluded.payload,
+            "updated_at": insert(_CONVERSATIONS).excluded.updated_at
+        }
+    )
+}
+
+# The payload column is only sent back when the caller's cached revision is out of date
+_READ_MEMORY = select(
+    _MEMORIES.c.revision,
+    _MEMORIES.c.summary,
+    case((_MEMORIES.c.revision != bindparam("cached_revision"), _MEMORIES.c.payload), else_=None)
+).where(
+    _MEMORIES.c.user_id == bindparam("key_user_id"),
+    _MEMORIES.c.character_name == bindparam("key_character_name")
+)
+_READ_CONVERSATION = select(_CONVERSATIONS.c.payload).where(
+    _CONVERSATIONS.c.conversation_id == bindparam("key_conversation_id")
+)
+
+class SessionStore:
+    """
+    In-memory session store, and the interface every backend implements.
+
+    The agents keep their own in-process copies of sessions and memories;
+    a store decides whether they are shared with other workers.
+    """
+
+    def __init__(self):
+        # Kept in save order with their save time, so expiring only looks at the oldest
+        self.conversations: "OrderedDict[str, Tuple[datetime, FeelingConversation]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """
+        Build the backend selected by SESSION_STORE ("memory" or "sqlite").
+
+        The SQLite backend uses ``database.engine`` and SESSION_FLUSH_MS as its
+        group-commit window.
+
+        Returns:
+            SessionStore: The configured store
+        """
+        backend = os.getenv("SESSION_STORE", "memory").lower()
+        if backend == "memory":
+            return cls()
+        if backend == "sqlite":
+            from database import engine
+            return SQLiteSessionStore(engine, flush_interval=float(os.getenv("SESSION_FLUSH_MS", "5")) / 1000)
+        raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
+
+    async def initialize(self):
+        """Prepare the backend."""
+
+    async def close(self):
+        """Write anything still queued and release the backend."""
+
+    def touch_session(self, user_id: str, created_at: datetime, last_activity: datetime):
+        """Record a user's activity; backends may write it behind the request."""
+
+    async def load_memory(
+        self,
+        user_id: str,
+        character_name: str,
+        cached: Optional[ConversationMemory]
+    ) -> Optional[ConversationMemory]:
+        """
+        Get the current conversation memory before a turn.
+
+        Args:
+            user_id (str): Unique identifier for the user
+            character_name (str): Name of the biblical character
+            cached (Optional[ConversationMemory]): This process's copy, if any
+
+        Returns:
+            Optional[ConversationMemory]: ``cached`` if it is current, a fresh copy
+            if another worker changed it, or None if there is no conversation yet
+        """
+        return cached
+
+    async def save_memory(self, memory: ConversationMemory):
+        """Persist a memory after a turn; returns once other workers can read it."""
+
+    async def save_summary(self, memory: ConversationMemory):
+        """Persist a memory's running summary without touching its messages."""
+
+    async def expire(self, cutoff: datetime) -> int:
+        """
+        Delete sessions inactive since ``cutoff`` and their memories, and feeling
+        conversations not saved since then.
+
+        Returns:
+            int: Number of sessions deleted
+        """
+        while self.conversations:
+            conversation_id, (saved_at, _) = next(iter(self.conversations.items()))
+            if saved_at >= cutoff:
+                break
+            del self.conversations[conversation_id]
+        return 0
+
+    async def get_conversation(self, conversation_id: str) -> Optional[FeelingConversation]:
+        """Get a feeling conversation by its ID, or None if unknown."""
+        entry = self.conversations.get(conversation_id)
+        return entry[1] if entry else None
+
+    async def save_conversation(self, conversation_id: str, conversation: FeelingConversation):
+        """Store a feeling conversation once its response is complete."""
+        self.conversations[conversation_id] = (datetime.utcnow(), conversation)
+        self.conversations.move_to_end(conversation_id)
+
+    def local_conversations(self) -> int:
+        """Feeling conversations held in this process."""
+        return len(self.conversations)
+
+    def stats(self) -> Dict[str, int]:
+        return {"conversations": len(self.conversations)}
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions, memories and feeling conversations shared through SQLite tables."""
+
+    def __init__(
+        self,
+        engine,
+        flush_interval: float = 0.005,
+        cache_size: int = 1024,
+        write_attempts: int = 3,
+        retry_backoff: float = 0.05
+    ):
+        """
+        Args:
+            engine (Engine): SQLite engine; ``database.build_engine`` enables WAL
+            flush_interval (float): Seconds writes wait to share a transaction
+            cache_size (int): Feeling conversations kept in the local cache
+            write_attempts (int): Tries per transaction before its waiters fail
+            retry_backoff (float): Seconds before the first retry, doubled for each one after
+        """
+        super().__init__()
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.write_attempts = write_attempts
+        self.retry_backoff = retry_backoff
+        # Feeling conversations are written once, so a cached copy never goes stale
+        self.conversation_cache: LRUCache[FeelingConversation] = LRUCache(max_entries=cache_size)
+        self._pending: Dict[Tuple[str, Hashable], Dict[str, Any]] = {}
+        self._inflight: Dict[Tuple[str, Hashable], Dict[str, Any]] = {}
+        self._waiters: List[asyncio.Future] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.flushes = 0
+        self.writes = 0
+        self.failed_flushes = 0
+        self.revision_hits = 0
+        self.payload_reads = 0
+
+    async def initialize(self):
+        """Create the tables if needed."""
+        from database import init_db
+
+        await asyncio.to_thread(init_db, self.engine)
+
+    async def close(self):
+        """Write anything still queued."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.flush()
+
+    def _queue(self, kind: str, key: Hashable, params: Dict[str, Any], wait: bool = True) -> Optional[asyncio.Future]:
+        """Queue a write, replacing any queued write of the same row, and schedule a flush."""
+        self._pending[(kind, key)] = params
+        future = None
+        if wait:
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append(future)
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Commit every queued write in one transaction and release the requests waiting on it.
+
+        A failed transaction is retried up to ``write_attempts`` times in all.
+        If it never commits, the waiting requests get the error and the batch
+        is dropped.
+        """
+        async with self._flush_lock:
+            batch, waiters = self._pending, self._waiters
+            self._pending, self._waiters = {}, []
+            error = None
+            if batch:
+                self._inflight = batch
+                try:
+                    error = await self._write_with_retries(batch)
+                finally:
+                    self._inflight = {}
+            for waiter in waiters:
+                if waiter.done():
+                    continue
+                if error is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(error)
+
+    async def _write_with_retries(self, batch: Dict[Tuple[str, Hashable], Dict[str, Any]]) -> Optional[SQLAlchemyError]:
+        """Write a batch, retrying with backoff; returns the last error if it never committed."""
+        for attempt in range(self.write_attempts):
+            try:
+                await asyncio.to_thread(self._write, batch)
+                self.flushes += 1
+                self.writes += len(batch)
+                return None
+            except SQLAlchemyError as e:
+                if attempt == self.write_attempts - 1:
+                    self.failed_flushes += 1
+                    logger.error(f"Could not write {len(batch)} session store rows after {self.write_attempts} attempts: {e}")
+                    return e
+                logger.warning(f"Could not write {len(batch)} session store rows (attempt {attempt + 1}), retrying: {e}")
+                await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+    def _write(self, batch: Dict[Tuple[str, Hashable], Dict[str, Any]]):
+        by_kind: Dict[str, List[Dict[str, Any]]] = {}
+        for (kind, _), params in batch.items():
+            by_kind.setdefault(kind, []).append(params)
+        with self.engine.begin() as connection:
+            for kind, statement in _WRITES.items():
+                if kind in by_kind:
+                    connection.execute(statement, by_kind[kind])
+
+    def _is_queued(self, kind: str, key: Hashable) -> bool:
+        return (kind, key) in self._pending or (kind, key) in self._inflight
+
+    def touch_session(self, user_id: str, created_at: datetime, last_activity: datetime):
+        self._queue("session", user_id, {
+            "user_id": user_id,
+            "created_at": created_at,
+            "last_activity": last_activity
+        }, wait=False)
+
+    async def load_memory(
+        self,
+        user_id: str,
+        character_name: str,
+        cached: Optional[ConversationMemory]
+    ) -> Optional[ConversationMemory]:
+        key = (user_id, character_name)
+        # Our own unwritten changes are newer than the row
+        if self._is_queued("memory", key) or self._is_queued("summary", key):
+            return cached
+        try:
+            row = await asyncio.to_thread(
+                self._read_memory, user_id, character_name, cached.revision if cached else ""
+            )
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not read conversation memory of user {user_id}: {e}")
+            return cached
+
+        if row is None:
+            return cached
+        revision, summary, payload = row
+        if payload is None:
+            self.revision_hits += 1
+            return cached
+        self.payload_reads += 1
+        return ConversationMemory.from_record(json.loads(payload), summary=summary, revision=revision)
+
+    def _read_memory(self, user_id: str, character_name: str, revision: str):
+        with self.engine.connect() as connection:
+            return connection.execute(_READ_MEMORY, {
+                "cached_revision": revision,
+                "key_user_id": user_id,
+                "key_character_name": character_name
+            }).first()
+
+    async def save_memory(self, memory: ConversationMemory):
+        memory.revision = uuid.uuid4().hex
+        await self._queue("memory", (memory.user_id, memory.character_name), {
+            "user_id": memory.user_id,
+            "character_name": memory.character_name,
+            "revision": memory.revision,
+            "payload": json.dumps(memory.to_record(), ensure_ascii=False),
+            # Only used when the row is new; turn saves never overwrite the summary
+            "summary": memory.summary,
+            "updated_at": datetime.utcnow()
+        })
+
+    async def save_summary(self, memory: ConversationMemory):
+        # The row may hold another worker's newer turns, so reload it on the next turn
+        memory.revision = ""
+        await self._queue("summary", (memory.user_id, memory.character_name), {
+            "key_user_id": memory.user_id,
+            "key_character_name": memory.character_name,
+            "new_summary": memory.summary,
+            "new_revision": uuid.uuid4().hex
+        })
+
+    async def expire(self, cutoff: datetime) -> int:
+        try:
+            sessions, conversation_ids = await asyncio.to_thread(self._expire, cutoff)
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not expire stored sessions: {e}")
+            return 0
+        for conversation_id in conversation_ids:
+            self.conversation_cache.pop(conversation_id)
+        return sessions
+
+    def _expire(self, cutoff: datetime) -> Tuple[int, List[str]]:
+        expired = select(_SESSIONS.c.user_id).where(_SESSIONS.c.last_activity < cutoff)
+        with self.engine.begin() as connection:
+            connection.execute(delete(_MEMORIES).where(_MEMORIES.c.user_id.in_(expired)))
+            sessions = connection.execute(delete(_SESSIONS).where(_SESSIONS.c.last_activity < cutoff)).rowcount
+            # Uses ix_feeling_conversations_updated_at
+            conversation_ids = connection.execute(
+                delete(_CONVERSATIONS).where(_CONVERSATIONS.c.updated_at < cutoff).returning(_CONVERSATIONS.c.conversation_id)
+            ).scalars().all()
+        return sessions, conversation_ids
+
+    async def get_conversation(self, conversation_id: str) -> Optional[FeelingConversation]:
+        conversation = self.conversation_cache.get(conversation_id)
+        if conversation is not None:
+            return conversation
+        try:
+            payload = await asyncio.to_thread(self._read_conversation, conversation_id)
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not read feeling conversation {conversation_id}: {e}")
+            return None
+        if payload is None:
+            return None
+        conversation = FeelingConversation.model_validate_json(payload)
+        self.conversation_cache.set(conversation_id, conversation)
+        return conversation
+
+    def _read_conversation(self, conversation_id: str) -> Optional[str]:
+        with self.engine.connect() as connection:
+            return connection.execute(_READ_CONVERSATION, {"key_conversation_id": conversation_id}).scalar()
+
+    async def save_conversation(self, conversation_id: str, conversation: FeelingConversation):
+        self.conversation_cache.set(conversation_id, conversation)
+        await self._queue("conversation", conversation_id, {
+            "conversation_id": conversation_id,
+            "payload": conversation.model_dump_json(),
+            "updated_at": datetime.utcnow()
+        })
+
+    def local_conversations(self) -> int:
+        return len(self.conversation_cache)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "conversations_cached": len(self.conversation_cache),
+            "flushes": self.flushes,
+            "writes": self.writes,
+            "failed_flushes": self.failed_flushes,
+            "revision_hits": self.revision_hits,
+            "payload_reads": self.payload_reads
+        }
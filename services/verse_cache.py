@@ -0,0 +1,132 @@
+"""
+Verse explanation cache
+
+Explanations depend only on the set of references, their texts and the prompt
+templates, so requests for the same passage in any order or spelling share one
+entry. A bounded in-memory LRU answers popular passages without touching the
+upstream; an optional directory of JSON files keeps entries across restarts.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import unicodedata
+import logging
+from typing import Dict, List, Optional
+from agents.prompts.bible_verse_agent import BIBLE_VERSE_PROMPT_VERSION
+from core.cache import DiskCache, LRUCache
+from core.request_log import record_cache_hit
+
+logger = logging.getLogger(__name__)
+
+_SEPARATOR_SPACES = re.compile(r"\s*([:,\-])\s*")
+
+def normalize_reference(reference: str) -> str:
+    """
+    Normalize a verse reference for cache keys.
+
+    Accents and case are dropped and whitespace is collapsed, so
+    ``"Josué 1 : 9"`` and ``"josue 1:9"`` produce the same value.
+
+    Args:
+        reference (str): Verse reference as sent by the client
+
+    Returns:
+        str: Normalized reference
+    """
+    decomposed = unicodedata.normalize("NFKD", reference.replace("–", "-").replace("—", "-"))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    collapsed = " ".join(stripped.casefold().split())
+    return _SEPARATOR_SPACES.sub(r"\1", collapsed)
+
+def explanation_cache_key(verses: List[str], verse_texts: Optional[List[str]] = None) -> str:
+    """
+    Build the order-insensitive cache key for an explanation request.
+
+    Args:
+        verses (List[str]): Verse references
+        verse_texts (Optional[List[str]]): Optional verse texts, aligned with ``verses``
+
+    Returns:
+        str: Prompt version, sorted normalized references and a hash of the texts
+    """
+    references = [normalize_reference(verse) for verse in verses]
+
+    if verse_texts:
+        pairs = sorted(f"{ref}\x1f{' '.join(text.split())}" for ref, text in zip(references, verse_texts))
+        texts_hash = hashlib.sha256("\x1e".join(pairs).encode("utf-8")).hexdigest()[:16]
+    else:
+        texts_hash = "-"
+
+    return "|".join([BIBLE_VERSE_PROMPT_VERSION, ";".join(sorted(set(references))), texts_hash])
+
+class ExplanationCache:
+    """Two-tier (memory, optional disk) cache of verse explanations."""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: Optional[float] = 86400,
+        directory: Optional[str] = None
+    ):
+        """
+        Args:
+            max_entries (int): Explanations kept in memory
+            ttl_seconds (Optional[float]): Lifetime of an entry in both tiers, None to never expire
+            directory (Optional[str]): Directory for the on-disk tier, None to keep entries in memory only
+        """
+        self.memory: LRUCache[str] = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.disk = DiskCache(directory, ttl_seconds=ttl_seconds) if directory else None
+        self.disk_hits = 0
+
+    @classmethod
+    def from_env(cls) -> "ExplanationCache":
+        """Build a cache from ``VERSE_CACHE_*`` environment variables."""
+        ttl_seconds = float(os.getenv("VERSE_CACHE_TTL_SECONDS", "86400"))
+        return cls(
+            max_entries=int(os.getenv("VERSE_CACHE_MAX_ENTRIES", "2048")),
+            ttl_seconds=ttl_seconds if ttl_seconds > 0 else None,
+            directory=os.getenv("VERSE_CACHE_DIR") or None
+        )
+
+    async def get(self, verses: List[str], verse_texts: Optional[List[str]] = None) -> Optional[str]:
+        """
+        Look up a cached explanation.
+
+        Args:
+            verses (List[str]): Verse references
+            verse_texts (Optional[List[str]]): Optional verse texts
+
+        Returns:
+            Optional[str]: The cached explanation, or None on a miss
+        """
+        key = explanation_cache_key(verses, verse_texts)
+        explanation = self.memory.get(key)
+        if explanation is not None or self.disk is None:
+            return explanation
+
+        explanation = await asyncio.to_thread(self.disk.get, key)
+        if explanation is not None:
+            self.disk_hits += 1
+            record_cache_hit()
+            self.memory.set(key, explanation)
+        return explanation
+
+    async def set(self, verses: List[str], verse_texts: Optional[List[str]], explanation: str):
+        """
+        Store an explanation in every tier.
+
+        Args:
+            verses (List[str]): Verse references
+            verse_texts (Optional[List[str]]): Optional verse texts
+            explanation (str): Cleaned explanation returned by the agent
+        """
+        key = explanation_cache_key(verses, verse_texts)
+        self.memory.set(key, explanation)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, explanation)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters; ``misses`` counts lookups that missed memory, ``disk_hits`` those the disk tier served."""
+        return {**self.memory.stats(), "disk_hits": self.disk_hits}